@@ -33,9 +33,13 @@ NETWORK_DATA_PATH: Path = PROJECT_ROOT / "data" / "data_network"
 PLOT_DATA_PATH: Path = PROJECT_ROOT / "data" / "data_plot"
 COMPOUND_DATA_PATH: Path = PROJECT_ROOT / "data" / "data_compound"
 CACHE_PATH: Path = PROJECT_ROOT / ".cache"
+CONFIG_PATH: Path = PROJECT_ROOT / "config" / "conf.yaml"
 TEST_RESULT_PATH: Path = PROJECT_ROOT / "test_results"
 UNISWAP_V2_DATA_PATH: Path = PROJECT_ROOT / "data" / "data_uniswap_v2"
 UNISWAP_V3_DATA_PATH: Path = PROJECT_ROOT / "data" / "data_uniswap_v3"
+SWAP_STORE_PATH: Path = PROJECT_ROOT / "data" / "swap_store"
+DAY_DATA_CACHE_PATH: Path = PROJECT_ROOT / "data" / "day_data_cache"
+VOLUME_STORE_PATH: Path = PROJECT_ROOT / "data" / "volume_store"
 
 HTTP_V2 = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v2"
 HTTP_V3 = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3"
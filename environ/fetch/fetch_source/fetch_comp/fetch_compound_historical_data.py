@@ -3,13 +3,12 @@
 Fetch the compound data by Compound official API
 """
 from os import path
-import time
 from tqdm import tqdm
 from datetime import datetime, timedelta
 import calendar
-import requests
 import pandas as pd
 
+from environ.fetch.fetch_utils.http_client import get_client
 from environ.utils.config_parser import Config
 
 
@@ -53,17 +52,12 @@ def fetch_asset_historical_data(
         "num_buckets": horizon,
         "network": "mainnet",
     }
-    while True:
-        try:
-            token_history_result = requests.get(
-                url=market_history_url, params=ctoken_params
-            )
-            token_history_result = token_history_result.json()
-        except Exception as e:
-            print(f"{ctoken_params} Error {e}")
-            time.sleep(10)
-        else:
-            break
+    # The shared client retries throttled and failed requests with backoff
+    token_history_result = get_client(market_history_url).request(
+        "GET", market_history_url, params=ctoken_params, timeout=120
+    )
+    token_history_result.raise_for_status()
+    token_history_result = token_history_result.json()
 
     # total_supply_dict = token_history_result["total_supply_history"]
     # total_borrow_dict = token_history_result["total_borrows_history"]
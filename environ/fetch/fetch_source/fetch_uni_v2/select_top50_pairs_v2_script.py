@@ -8,8 +8,14 @@ import calendar
 from os import path
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
 import environ.fetch.fetch_utils.subgraph_query as subgraph
+from environ.fetch.fetch_utils.day_data_cache import (
+    DAY_SECONDS,
+    DayDataCache,
+    to_day_timestamp,
+    window_volume,
+)
+from environ.fetch.fetch_utils.graphql_batch import GraphQLEnum, SubQuery, run_batched
 from environ.utils.config_parser import Config
 
 
@@ -55,118 +61,81 @@ def select_candidate_pairs(end_date: datetime.datetime) -> pd.DataFrame:
     return df_top500_pairs
 
 
+def select_candidate_pairs_batched(
+    end_dates: list[datetime.datetime], batch_size: int = 25, max_concurrency: int = 8
+) -> list[pd.DataFrame]:
+    """
+    select top 500 pairs order by daily volume USD as candidate pairs of
+    several end dates, in batched documents
+    """
+    sub_queries = [
+        SubQuery(
+            f"m{i}",
+            "pairDayDatas",
+            {
+                "first": 500,
+                "orderBy": GraphQLEnum("dailyVolumeUSD"),
+                "orderDirection": GraphQLEnum("desc"),
+                "where": {"date": to_day_timestamp(end_date)},
+            },
+            "pairAddress token0 { symbol } token1 { symbol } dailyVolumeUSD",
+        )
+        for i, end_date in enumerate(end_dates)
+    ]
+    run_batched(subgraph.HTTP_V2, sub_queries, batch_size, max_concurrency)
+
+    return [pd.DataFrame.from_dict(sub_query.result) for sub_query in sub_queries]
+
+
 def get_avg_volume_candidate_pairs(
-    df_top500_pairs: pd.DataFrame, start_date: datetime.datetime, period: int
+    df_top500_pairs: pd.DataFrame,
+    start_date: datetime.datetime,
+    period: int,
+    cache: DayDataCache | None = None,
 ) -> pd.DataFrame:
     """
     get the average daily volume by dividing the sum of each daily volume for the past horizon
     """
-    # The previous date before the start date as the last timestamp gt
-    end_date = start_date + datetime.timedelta(days=period)
-    end_timestamp = int(calendar.timegm(end_date.timetuple()))
-    last_date = start_date - datetime.timedelta(days=1)
-    last_timestamp = int(calendar.timegm(last_date.timetuple()))
-
-    # For each pair, sum up the daily aggregated volume
-    for index, row in tqdm(df_top500_pairs.iterrows(), total=df_top500_pairs.shape[0]):
-        candidate_pair = row["pairAddress"]
-        params_candidate_pair = {
-            "period": period,
-            "candidate_pair": candidate_pair,
-            "last_date_gt": last_timestamp,
-        }
-
-        # Query the historical daily aggregated volume for the past period
-        candidate_daily_volume_query = """
-          query($period: Int!, $candidate_pair: String!, $last_date_gt: Int!) 
-          {
-            pairDayDatas(first: $period, orderBy: date, orderDirection: asc,
-              where: {
-                pairAddress: $candidate_pair,
-                date_gt: $last_date_gt
-              })
-              {
-                date
-                dailyVolumeToken0
-                dailyVolumeToken1
-                dailyVolumeUSD
-              }
-          }
-        """
-        candidate_daily_volume = subgraph.run_query_var(
-            subgraph.HTTP_V2, candidate_daily_volume_query, params_candidate_pair
-        )
+    cache = cache or DayDataCache("v2")
+    first_date = to_day_timestamp(start_date)
+    last_date = first_date + (period - 1) * DAY_SECONDS
+    pairs = df_top500_pairs["pairAddress"].tolist()
+
+    # Only fetch the days of the period missing from the cache
+    cache.update({pair: (first_date, last_date) for pair in pairs})
+    valid_days, total_volume = window_volume(
+        cache.volume_matrix(pairs, first_date, last_date), [(first_date, last_date)]
+    )
 
-        # Check whether the api returns data
-        if list(candidate_daily_volume.keys()) == ["data"]:
-
-            # The variable to control the divisor of the total volume
-            df_top500_pairs.loc[index, "pastValidDays"] = len(
-                candidate_daily_volume["data"]["pairDayDatas"]
-            )
-
-            # Sum up the daily volume
-            past_total_volume_usd = 0
-            for i, _ in enumerate(candidate_daily_volume["data"]["pairDayDatas"]):
-                # Fix the bug for recent created pools
-                if (
-                    int(candidate_daily_volume["data"]["pairDayDatas"][i]["date"])
-                    > end_timestamp
-                ):
-                    df_top500_pairs.loc[index, "pastValidDays"] = i
-                else:
-                    past_total_volume_usd = past_total_volume_usd + float(
-                        candidate_daily_volume["data"]["pairDayDatas"][i][
-                            "dailyVolumeUSD"
-                        ]
-                    )
-
-            # Complete summing, store the total volume to dataframe
-            df_top500_pairs.loc[index, "pastTotalVolumeUSD"] = past_total_volume_usd
-            df_top500_pairs.loc[
-                index, "avgDailyVolumeUSD"
-            ] = past_total_volume_usd / len(
-                candidate_daily_volume["data"]["pairDayDatas"]
-            )
+    return _set_avg_volume(df_top500_pairs, valid_days[0], total_volume[0])
+
+
+def _set_avg_volume(
+    df_top500_pairs: pd.DataFrame, valid_days: np.ndarray, total_volume: np.ndarray
+) -> pd.DataFrame:
+    """
+    Store the valid days, total and average daily volume of the candidates
+    """
+    # Pools created within the period only count the days with volume,
+    # e.g. a pool created at 17 May 2022 has no volume between 1 and 16 May
+    df_top500_pairs["pastValidDays"] = valid_days
+    df_top500_pairs["pastTotalVolumeUSD"] = total_volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df_top500_pairs["avgDailyVolumeUSD"] = total_volume / valid_days
 
     return df_top500_pairs
 
 
-def select_top50_pairs_v2(
-    end_date: datetime.datetime, period: int, output_label: str
+def _write_top50_pairs(
+    df_top500_pairs: pd.DataFrame, valid_threshold: int, output_label: str
 ) -> None:
     """
-    Select the top50 pools of v2 by given end date, past period, and output label
-    (eg. MAY2022). Output to the separate data file.
+    Rank the candidates by average daily volume and write the top 50 pairs
+    with enough valid days
     """
     # Initialize configuration
     config = Config()
 
-    # Example of time period: 01/05/2022 -> 31/05/2022
-    # 31 days in May
-    start_date = end_date - datetime.timedelta(days=period - 1)
-
-    # Filter condition of the new pool
-    # Example: trace back 1 May to 31 May, but pool was created at 15 May, so only 16 valid days
-    valid_threshold = 30
-
-    # Select the top 500 candidate pairs
-    df_top500_pairs = select_candidate_pairs(end_date)
-
-    # Add a column for the valid days in the past period
-    # Example: some pool was created at 17 May 2022
-    # So that there was no volume between 1 May and 16 May
-    df_top500_pairs["pastValidDays"] = 0
-    # Add a column for the sum up of daily aggregated volume USD in the past N days
-    df_top500_pairs["pastTotalVolumeUSD"] = np.zeros
-    # Add a column for the average of the daily volume USD in the past N days
-    df_top500_pairs["avgDailyVolumeUSD"] = np.zeros
-
-    # Get the average daily volume by summing up daily aggregated data
-    df_top500_pairs = get_avg_volume_candidate_pairs(
-        df_top500_pairs, start_date, period
-    )
-
     # Sort the dataframe by avgDailyVolumeUSD, here change to the new index as ranking
     df_top500_pairs = df_top500_pairs.sort_values(
         by="avgDailyVolumeUSD", ascending=False, ignore_index=True
@@ -191,3 +160,75 @@ def select_top50_pairs_v2(
 
     # Write dataframe to csv
     df_top50_avg_pairs.to_csv(file_name)
+
+
+def select_top50_pairs_v2(
+    end_date: datetime.datetime,
+    period: int,
+    output_label: str,
+    cache: DayDataCache | None = None,
+) -> None:
+    """
+    Select the top50 pools of v2 by given end date, past period, and output label
+    (eg. MAY2022). Output to the separate data file.
+    """
+    select_top50_pairs_v2_monthly([(end_date, period, output_label)], cache=cache)
+
+
+def select_top50_pairs_v2_monthly(
+    months: list[tuple[datetime.datetime, int, str]],
+    cache: DayDataCache | None = None,
+    batch_size: int = 25,
+    max_concurrency: int = 8,
+) -> None:
+    """
+    Select the top50 pools of v2 of several months, given as (end date, past
+    period, output label), in one pass over the cached daily volume. Only the
+    days missing from the cache are fetched. Output to the separate data files.
+    """
+    cache = cache or DayDataCache("v2")
+
+    # Filter condition of the new pool
+    # Example: trace back 1 May to 31 May, but pool was created at 15 May, so only 16 valid days
+    valid_threshold = 30
+
+    # Example of time period: 01/05/2022 -> 31/05/2022
+    # 31 days in May
+    windows = [
+        (
+            to_day_timestamp(end_date) - (period - 1) * DAY_SECONDS,
+            to_day_timestamp(end_date),
+        )
+        for end_date, period, _ in months
+    ]
+
+    # Select the top 500 candidate pairs of every month
+    candidates = select_candidate_pairs_batched(
+        [end_date for end_date, _, _ in months], batch_size, max_concurrency
+    )
+
+    # Fetch the days missing from the cache, over the union of the months
+    # in which each pair is a candidate
+    ranges = {}
+    for df_top500_pairs, (first_date, last_date) in zip(candidates, windows):
+        for pair in df_top500_pairs["pairAddress"]:
+            pair_first, pair_last = ranges.get(pair, (first_date, last_date))
+            ranges[pair] = (min(pair_first, first_date), max(pair_last, last_date))
+    cache.update(ranges, batch_size, max_concurrency)
+
+    # Valid days and total volume of all pairs over all months at once
+    volume = cache.volume_matrix(
+        list(ranges),
+        min(first_date for first_date, _ in windows),
+        max(last_date for _, last_date in windows),
+    )
+    valid_days, total_volume = window_volume(volume, windows)
+
+    for i, (df_top500_pairs, (_, _, output_label)) in enumerate(
+        zip(candidates, months)
+    ):
+        columns = volume.columns.get_indexer(df_top500_pairs["pairAddress"])
+        df_top500_pairs = _set_avg_volume(
+            df_top500_pairs, valid_days[i, columns], total_volume[i, columns]
+        )
+        _write_top50_pairs(df_top500_pairs, valid_threshold, output_label)
@@ -6,8 +6,14 @@ Compute Directional Daily Volume USD for Top 50 Pairs
 import datetime
 import calendar
 from os import path
+import numpy as np
 import pandas as pd
 import environ.fetch.fetch_utils.subgraph_query as subgraph
+from environ.fetch.fetch_utils.graphql_batch import (
+    PairDailyQueries,
+    fetch_pair_daily,
+    fetch_pairs_daily_batched,
+)
 from environ.utils.config_parser import Config
 
 
@@ -300,11 +306,86 @@ def compute_daily_directional_volume(
     return swaps_count, tx_0to1_count, volume_0to1, tx_1to0_count, volume_1to0
 
 
+# Minimal swap fields for the vectorized directional volume
+SWAP_AMOUNT_FIELDS = ["amount0In", "amount1In", "amount0Out", "amount1Out", "amountUSD"]
+
+
+def aggregate_directional_volume(
+    swaps: dict[str, np.ndarray]
+) -> tuple[int, int, float, int, float]:
+    """
+    count the swaps and sum the volume of each direction on whole arrays
+    """
+    # token0 to token1, then token1 to token0 for the other swaps
+    mask_0to1 = (swaps["amount0In"] != 0.0) & (swaps["amount1Out"] != 0.0)
+    mask_1to0 = ~mask_0to1 & (swaps["amount1In"] != 0.0) & (swaps["amount0Out"] != 0.0)
+
+    return (
+        len(swaps["amountUSD"]),
+        int(mask_0to1.sum()),
+        float(swaps["amountUSD"][mask_0to1].sum()),
+        int(mask_1to0.sum()),
+        float(swaps["amountUSD"][mask_1to0].sum()),
+    )
+
+
+def _timestamp_of(item: dict) -> int:
+    """
+    timestamp of a mint, burn or swap
+    """
+    return int(item["transaction"]["timestamp"])
+
+
+def _add_swap(swaps: list, swap: dict) -> None:
+    """
+    count a swap and add its volume to its direction as
+    compute_daily_directional_volume does
+    """
+    swaps[0] = swaps[0] + 1
+    if (float(swap["amount0In"]) != 0.0) and (float(swap["amount1Out"]) != 0.0):
+        swaps[1] = swaps[1] + 1
+        swaps[2] = swaps[2] + float(swap["amountUSD"])
+    elif (float(swap["amount1In"]) != 0.0) and (float(swap["amount0Out"]) != 0.0):
+        swaps[3] = swaps[3] + 1
+        swaps[4] = swaps[4] + float(swap["amountUSD"])
+
+
+PAIR_DAILY_QUERIES = PairDailyQueries(
+    http=subgraph.HTTP_V2,
+    label="Uniswap V2",
+    day_entity="pairDayDatas",
+    day_pair_field="pairAddress",
+    day_selection=(
+        "dailyTxns dailyVolumeToken0 dailyVolumeToken1 dailyVolumeUSD reserveUSD"
+    ),
+    day_volume_field="dailyVolumeUSD",
+    pair_field="pair",
+    event_selection="transaction { id timestamp } amountUSD",
+    swap_selection=(
+        "transaction { id timestamp } "
+        "amount0In amount1In amount0Out amount1Out amountUSD"
+    ),
+    swap_amount_fields=SWAP_AMOUNT_FIELDS,
+    timestamp_of=_timestamp_of,
+    add_swap=_add_swap,
+    aggregate_swaps=aggregate_directional_volume,
+    get_gross_volume=get_gross_volume,
+    count_daily_mints=count_daily_mints,
+    count_daily_burns=count_daily_burns,
+    compute_daily_directional_volume=compute_daily_directional_volume,
+)
+
+
 def top50_pair_directional_volume_v2(
-    aggregate_date: datetime, token_list_label: str
+    aggregate_date: datetime,
+    token_list_label: str,
+    batched: bool = True,
+    vectorized: bool = False,
 ) -> None:
     """
-    Get the directional volume and transaction counts, then save to file
+    Get the directional volume and transaction counts, then save to file.
+    With batched, the queries of all pairs are packed into aliased documents.
+    With vectorized, the swaps are aggregated on arrays of the minimal fields.
     """
     # Initialize configuration
     config = Config()
@@ -331,13 +412,32 @@ def top50_pair_directional_volume_v2(
         ]
     )
 
-    # Do iteration to sum up all transaction (directional) for each pair
-    for index, row in df_top50_pairs_dir_volume.iterrows():
-        # Pool id for this batch
-        batch_pair_id = row["pairAddress"]
+    # Fetch the daily info of all pairs
+    pair_ids = df_top50_pairs_dir_volume["pairAddress"].tolist()
+    if batched:
+        pairs_daily = fetch_pairs_daily_batched(
+            PAIR_DAILY_QUERIES,
+            pair_ids,
+            date_timestamp,
+            end_timestamp,
+            vectorized=vectorized,
+        )
+    else:
+        pairs_daily = [
+            fetch_pair_daily(
+                PAIR_DAILY_QUERIES,
+                batch_pair_id,
+                date_timestamp,
+                end_timestamp,
+                vectorized,
+            )
+            for batch_pair_id in pair_ids
+        ]
 
+    # Do iteration to sum up all transaction (directional) for each pair
+    for index, pair_daily in zip(df_top50_pairs_dir_volume.index, pairs_daily):
         # Get the daily gross volume from subgraph API
-        batch_pair_info = get_gross_volume(batch_pair_id, date_timestamp)
+        batch_pair_info = pair_daily["gross"]
 
         # fix the bug of null data
         if len(batch_pair_info) == 0:
@@ -370,12 +470,12 @@ def top50_pair_directional_volume_v2(
         ]
 
         # Get the daily count for the mints transactions
-        mints_count = count_daily_mints(batch_pair_id, date_timestamp, end_timestamp)
+        mints_count = pair_daily["mints"]
         # Store the values to the dataframe for this pair
         df_top50_pairs_dir_volume.loc[index, "mintsCount"] = mints_count
 
         # Get the daily count for the burns transactions
-        burns_count = count_daily_burns(batch_pair_id, date_timestamp, end_timestamp)
+        burns_count = pair_daily["burns"]
         # Store the values to the dataframe for this pair
         df_top50_pairs_dir_volume.loc[index, "burnsCount"] = burns_count
 
@@ -386,9 +486,7 @@ def top50_pair_directional_volume_v2(
             volume_0to1,
             tx_1to0_count,
             volume_1to0,
-        ) = compute_daily_directional_volume(
-            batch_pair_id, date_timestamp, end_timestamp
-        )
+        ) = pair_daily["swaps"]
         # Store the values to the dataframe for this pair
         df_top50_pairs_dir_volume.loc[index, "swapsCount"] = swaps_count
         df_top50_pairs_dir_volume.loc[index, "token0To1Txs"] = tx_0to1_count
@@ -9,8 +9,14 @@ import calendar
 from os import path
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
 import environ.fetch.fetch_utils.subgraph_query as subgraph
+from environ.fetch.fetch_utils.day_data_cache import (
+    DAY_SECONDS,
+    DayDataCache,
+    to_day_timestamp,
+    window_volume,
+)
+from environ.fetch.fetch_utils.graphql_batch import GraphQLEnum, SubQuery, run_batched
 from environ.utils.config_parser import Config
 
 
@@ -55,124 +61,101 @@ def select_candidate_pools(end_date: datetime) -> pd.DataFrame:
         top500_candidate_pairs["data"]["poolDayDatas"]
     )
 
-    # Data manupulation: split pool info separately
-    # {pool: {id, token0, token1}} -> {id} {token0} {token1}
-    for index, row in df_top500_pairs.iterrows():
-        df_top500_pairs.loc[index, "id"] = row["pool"]["id"]
-        df_top500_pairs.loc[index, "token0"] = row["pool"]["token0"]["symbol"]
-        df_top500_pairs.loc[index, "token1"] = row["pool"]["token1"]["symbol"]
+    return _split_pool_info(df_top500_pairs)
+
+
+def _split_pool_info(df_top500_pairs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Data manupulation: split pool info separately
+    {pool: {id, token0, token1}} -> {id} {token0} {token1}
+    """
+    pools = df_top500_pairs["pool"].tolist()
+    df_top500_pairs["id"] = [pool["id"] for pool in pools]
+    df_top500_pairs["token0"] = [pool["token0"]["symbol"] for pool in pools]
+    df_top500_pairs["token1"] = [pool["token1"]["symbol"] for pool in pools]
 
     # Drop the original column
-    df_top500_pairs = df_top500_pairs.drop(columns=["pool", "volumeUSD"])
+    return df_top500_pairs.drop(columns=["pool", "volumeUSD"])
 
-    return df_top500_pairs
+
+def select_candidate_pools_batched(
+    end_dates: list[datetime], batch_size: int = 25, max_concurrency: int = 8
+) -> list[pd.DataFrame]:
+    """
+    select top 500 pools order by daily volume USD as candidate pools of
+    several end dates, in batched documents
+    """
+    sub_queries = [
+        SubQuery(
+            f"m{i}",
+            "poolDayDatas",
+            {
+                "first": 500,
+                "orderBy": GraphQLEnum("volumeUSD"),
+                "orderDirection": GraphQLEnum("desc"),
+                "where": {"date": to_day_timestamp(end_date)},
+            },
+            "pool { id token0 { symbol } token1 { symbol } } volumeUSD",
+        )
+        for i, end_date in enumerate(end_dates)
+    ]
+    run_batched(subgraph.HTTP_V3, sub_queries, batch_size, max_concurrency)
+
+    return [
+        _split_pool_info(pd.DataFrame.from_dict(sub_query.result))
+        for sub_query in sub_queries
+    ]
 
 
 def get_avg_volume_candidate_pools(
-    df_top500_pairs: pd.DataFrame, start_date: datetime, period: int
+    df_top500_pairs: pd.DataFrame,
+    start_date: datetime,
+    period: int,
+    cache: DayDataCache | None = None,
 ) -> pd.DataFrame:
     """
     get the average daily volume by dividing the sum of each daily volume for the past horizon
     """
-    # The previous date before the start date as the last timestamp gt
-    end_date = start_date + datetime.timedelta(days=period)
-    end_timestamp = int(calendar.timegm(end_date.timetuple()))
-    last_date = start_date - datetime.timedelta(days=1)
-    last_timestamp = int(calendar.timegm(last_date.timetuple()))
-
-    # For each pool, sum up the daily aggregated volume
-    for index, row in tqdm(df_top500_pairs.iterrows(), total=df_top500_pairs.shape[0]):
-        candidate_pair = row["id"]
-        params_candidate_pair = {
-            "period": period,
-            "candidate_pair": candidate_pair,
-            "last_date_gt": last_timestamp,
-        }
+    cache = cache or DayDataCache("v3")
+    first_date = to_day_timestamp(start_date)
+    last_date = first_date + (period - 1) * DAY_SECONDS
+    pools = df_top500_pairs["id"].tolist()
+
+    # Only fetch the days of the period missing from the cache
+    cache.update({pool: (first_date, last_date) for pool in pools})
+    valid_days, total_volume = window_volume(
+        cache.volume_matrix(pools, first_date, last_date), [(first_date, last_date)]
+    )
 
-        # Query the historical daily aggregated volume for the past period
-        candidate_daily_volume_query = """
-      query($period: Int!, $candidate_pair: String!, $last_date_gt: Int!) 
-      {
-        poolDayDatas(first: $period, orderBy: date, orderDirection: asc,
-          where: {
-            pool: $candidate_pair,
-            date_gt: $last_date_gt
-          })
-          {
-            date
-            volumeToken0
-            volumeToken1
-            volumeUSD
-          }
-      }
-    """
-        candidate_daily_volume = subgraph.run_query_var(
-            subgraph.HTTP_V3, candidate_daily_volume_query, params_candidate_pair
-        )
+    return _set_avg_volume(df_top500_pairs, valid_days[0], total_volume[0])
 
-        # Check whether the api returns data
-        if list(candidate_daily_volume.keys()) == ["data"]:
-
-            # The variable to control the divisor of the total volume
-            valid_days = len(candidate_daily_volume["data"]["poolDayDatas"])
-            df_top500_pairs.loc[index, "pastValidDays"] = valid_days
-
-            # Sum up the daily volume
-            past_total_volume_usd = 0
-            for i in range(valid_days):
-                # Fix the bug for recent created pools
-                if (
-                    int(candidate_daily_volume["data"]["poolDayDatas"][i]["date"])
-                    > end_timestamp
-                ):
-                    df_top500_pairs.loc[index, "pastValidDays"] = i
-                else:
-                    past_total_volume_usd = past_total_volume_usd + float(
-                        candidate_daily_volume["data"]["poolDayDatas"][i]["volumeUSD"]
-                    )
-
-            # Complete summing, store the total volume to dataframe
-            df_top500_pairs.loc[index, "pastTotalVolumeUSD"] = past_total_volume_usd
-            df_top500_pairs.loc[index, "avgDailyVolumeUSD"] = (
-                past_total_volume_usd / valid_days
-            )
+
+def _set_avg_volume(
+    df_top500_pairs: pd.DataFrame, valid_days: np.ndarray, total_volume: np.ndarray
+) -> pd.DataFrame:
+    """
+    Store the valid days, total and average daily volume of the candidates
+    """
+    # Pools created within the period only count the days with volume,
+    # e.g. a pool created at 17 May 2022 has no volume between 1 and 16 May
+    df_top500_pairs["pastValidDays"] = valid_days
+    df_top500_pairs["pastTotalVolumeUSD"] = total_volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df_top500_pairs["avgDailyVolumeUSD"] = total_volume / valid_days
 
     return df_top500_pairs
 
 
-def select_top50_pairs_v3(end_date: datetime, period: int, output_label: str) -> None:
+def _write_top50_pools(
+    df_top500_pairs: pd.DataFrame, valid_threshold: int, output_label: str
+) -> None:
     """
-    Select the top50 pools of v3 by given end date, past period, and output label
-    (eg. MAY2022). Output to the separate data file.
+    Rank the candidates by average daily volume and write the top 50 pools
+    with enough valid days
     """
     # Initialize configuration
     config = Config()
 
-    # Example of time period: 01/05/2022 -> 31/05/2022
-    # 31 days in May
-    start_date = end_date - datetime.timedelta(days=period - 1)
-
-    # Filter condition of the new pool
-    # Example: trace back 1 May to 31 May, but pool was created at 15 May, so only 16 valid days
-    valid_threshold = period
-
-    # Select the top 500 candidate pools
-    df_top500_pairs = select_candidate_pools(end_date)
-
-    # Add a column for the valid days in the past period
-    # Example: some pool was created at 17 May 2022
-    # So that there was no volume between 1 May and 16 May
-    df_top500_pairs["pastValidDays"] = 0
-    # Add a column for the sum up of daily aggregated volume USD in the past N days
-    df_top500_pairs["pastTotalVolumeUSD"] = np.zeros
-    # Add a column for the average of the daily volume USD in the past N days
-    df_top500_pairs["avgDailyVolumeUSD"] = np.zeros
-
-    # Get the average daily volume by summing up daily aggregated data
-    df_top500_pairs = get_avg_volume_candidate_pools(
-        df_top500_pairs, start_date, period
-    )
-
     # Sort the dataframe by avgDailyVolumeUSD, here change to the new index as ranking
     df_top500_pairs = df_top500_pairs.sort_values(
         by="avgDailyVolumeUSD", ascending=False, ignore_index=True
@@ -197,3 +180,74 @@ def select_top50_pairs_v3(end_date: datetime, period: int, output_label: str) ->
 
     # Write dataframe to csv
     df_top50_avg_pairs.to_csv(file_name)
+
+
+def select_top50_pairs_v3(
+    end_date: datetime,
+    period: int,
+    output_label: str,
+    cache: DayDataCache | None = None,
+) -> None:
+    """
+    Select the top50 pools of v3 by given end date, past period, and output label
+    (eg. MAY2022). Output to the separate data file.
+    """
+    select_top50_pairs_v3_monthly([(end_date, period, output_label)], cache=cache)
+
+
+def select_top50_pairs_v3_monthly(
+    months: list[tuple[datetime, int, str]],
+    cache: DayDataCache | None = None,
+    batch_size: int = 25,
+    max_concurrency: int = 8,
+) -> None:
+    """
+    Select the top50 pools of v3 of several months, given as (end date, past
+    period, output label), in one pass over the cached daily volume. Only the
+    days missing from the cache are fetched. Output to the separate data files.
+    """
+    cache = cache or DayDataCache("v3")
+
+    # Example of time period: 01/05/2022 -> 31/05/2022
+    # 31 days in May
+    windows = [
+        (
+            to_day_timestamp(end_date) - (period - 1) * DAY_SECONDS,
+            to_day_timestamp(end_date),
+        )
+        for end_date, period, _ in months
+    ]
+
+    # Select the top 500 candidate pools of every month
+    candidates = select_candidate_pools_batched(
+        [end_date for end_date, _, _ in months], batch_size, max_concurrency
+    )
+
+    # Fetch the days missing from the cache, over the union of the months
+    # in which each pool is a candidate
+    ranges = {}
+    for df_top500_pairs, (first_date, last_date) in zip(candidates, windows):
+        for pool in df_top500_pairs["id"]:
+            pool_first, pool_last = ranges.get(pool, (first_date, last_date))
+            ranges[pool] = (min(pool_first, first_date), max(pool_last, last_date))
+    cache.update(ranges, batch_size, max_concurrency)
+
+    # Valid days and total volume of all pools over all months at once
+    volume = cache.volume_matrix(
+        list(ranges),
+        min(first_date for first_date, _ in windows),
+        max(last_date for _, last_date in windows),
+    )
+    valid_days, total_volume = window_volume(volume, windows)
+
+    for i, (df_top500_pairs, (_, period, output_label)) in enumerate(
+        zip(candidates, months)
+    ):
+        columns = volume.columns.get_indexer(df_top500_pairs["id"])
+        df_top500_pairs = _set_avg_volume(
+            df_top500_pairs, valid_days[i, columns], total_volume[i, columns]
+        )
+        # Filter condition of the new pool
+        # Example: trace back 1 May to 31 May, but pool was created at 15 May,
+        # so only 16 valid days
+        _write_top50_pools(df_top500_pairs, period, output_label)
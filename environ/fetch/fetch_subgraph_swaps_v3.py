@@ -9,6 +9,13 @@ from dotenv import load_dotenv
 import aiohttp
 
 from environ.constants import DATA_PATH
+from environ.fetch.fetch_utils.http_client import (
+    CircuitOpenError,
+    get_client,
+    log_metrics,
+)
+from environ.process.betweeness_centrality.subgraph_swaps import subgraph_swaps_to_frame
+from environ.utils import swap_store
 
 # Load environment variables
 load_dotenv()
@@ -66,23 +73,24 @@ async def query_swaps_batch_async(
     payload = {"query": query}
 
     try:
-        async with session.post(UNISWAP_V3_SUBGRAPH_URL, json=payload) as response:
-            response.raise_for_status()
-            data = await response.json()
-
-            if "errors" in data:
-                error_message = data["errors"][0].get("message", "Unknown GraphQL error")
-                print(
-                    f"  GraphQL Error (period: {start_timestamp}-{end_timestamp}, last_id: {last_id}): {error_message}"
-                )
-                return None
+        status, data = await get_client(UNISWAP_V3_SUBGRAPH_URL).request_async(
+            session, "POST", UNISWAP_V3_SUBGRAPH_URL, json=payload
+        )
+        if status != 200:
+            print(f"  HTTP error (last_id: {last_id}, status: {status})")
+            return None
 
-            return data.get("data", {}).get("swaps", [])
+        if "errors" in data:
+            error_message = data["errors"][0].get("message", "Unknown GraphQL error")
+            print(
+                f"  GraphQL Error (period: {start_timestamp}-{end_timestamp}, last_id: {last_id}): {error_message}"
+            )
+            return None
 
-    except aiohttp.ClientResponseError as http_err:
-        print(
-            f"  HTTP error (last_id: {last_id}, status: {http_err.status}): {http_err.message}"
-        )
+        return data.get("data", {}).get("swaps", [])
+
+    except CircuitOpenError as e:
+        print(f"  Subgraph unavailable (last_id: {last_id}): {e}")
         return None
     except aiohttp.ClientError as e:
         print(f"  AIOHTTP client error (last_id: {last_id}): {e}")
@@ -97,46 +105,135 @@ async def query_swaps_batch_async(
         return None
 
 
-async def fetch_all_swaps_for_period_async(
-    session: aiohttp.ClientSession, start_ts: int, end_ts: int, limit: int = 1000
-) -> list[dict]:
+async def page_swaps_for_period_async(
+    session: aiohttp.ClientSession,
+    start_ts: int,
+    end_ts: int,
+    limit: int = 1000,
+    last_id: str | None = None,
+    max_pages: int | None = None,
+) -> tuple[list[dict], str | None, bool]:
     """
-    Fetches all swaps for a given period asynchronously, handling attribute-based pagination.
+    Pages through the swaps of a period asynchronously from the cursor last_id, for at most max_pages pages.
+    Returns the swaps, the last cursor and whether the period is exhausted.
     """
-    all_swaps_for_period = []
-    last_fetched_id = None
+    swaps_for_period = []
+    # HTTP failures are retried by the shared client, these retries cover
+    # the GraphQL errors of the indexer
     retries = 3
-    retry_delay = 5
+    policy = get_client(UNISWAP_V3_SUBGRAPH_URL).policy
+    n_pages = 0
 
-    while True:
+    while max_pages is None or n_pages < max_pages:
         batch = None
         for attempt in range(retries):
             batch = await query_swaps_batch_async(
-                session, start_ts, end_ts, limit=limit, last_id=last_fetched_id
+                session, start_ts, end_ts, limit=limit, last_id=last_id
             )
             if batch is not None:
                 break
+            retry_delay = policy.backoff_delay(attempt)
             print(
-                f"  Batch fetch failed (last_id: {last_fetched_id}), attempt {attempt + 1}/{retries}. Retrying in {retry_delay}s..."
+                f"  Batch fetch failed (last_id: {last_id}), attempt {attempt + 1}/{retries}. Retrying in {retry_delay:.1f}s..."
             )
             await asyncio.sleep(retry_delay)
 
         if batch is None:
             print(
-                f"  Error fetching batch (last_id: {last_fetched_id}) after {retries} attempts. Returning collected data for this period."
+                f"  Error fetching batch (last_id: {last_id}) after {retries} attempts. Returning collected data for this period."
             )
-            return all_swaps_for_period
+            return swaps_for_period, last_id, True
 
-        if not batch:
-            break
-
-        all_swaps_for_period.extend(batch)
-        last_fetched_id = batch[-1]["id"]
+        n_pages += 1
+        swaps_for_period.extend(batch)
+        if batch:
+            last_id = batch[-1]["id"]
 
         if len(batch) < limit:
-            break
+            return swaps_for_period, last_id, True
+
+    return swaps_for_period, last_id, False
+
+
+async def fetch_all_swaps_for_period_async(
+    session: aiohttp.ClientSession,
+    start_ts: int,
+    end_ts: int,
+    limit: int = 1000,
+    last_id: str | None = None,
+    page_budget: int | None = None,
+) -> list[dict]:
+    """
+    Fetches all swaps for a given period asynchronously, handling attribute-based pagination.
+    A period still unfinished after page_budget pages is split in two halves fetched concurrently.
+    """
+    all_swaps_for_period, last_id, exhausted = await page_swaps_for_period_async(
+        session, start_ts, end_ts, limit=limit, last_id=last_id, max_pages=page_budget
+    )
+    if exhausted:
+        return all_swaps_for_period
+
+    if end_ts <= start_ts:
+        # A single second cannot be split further
+        rest = await fetch_all_swaps_for_period_async(
+            session, start_ts, end_ts, limit=limit, last_id=last_id
+        )
+        return all_swaps_for_period + rest
+
+    # Every swap of the period up to the cursor is fetched, so both halves
+    # resume from the cursor
+    mid_ts = (start_ts + end_ts) // 2
+    halves = await asyncio.gather(
+        fetch_all_swaps_for_period_async(
+            session, start_ts, mid_ts, limit, last_id, page_budget
+        ),
+        fetch_all_swaps_for_period_async(
+            session, mid_ts + 1, end_ts, limit, last_id, page_budget
+        ),
+    )
+    return all_swaps_for_period + halves[0] + halves[1]
+
+
+def merge_swaps(shards: list[list[dict]]) -> list[dict]:
+    """
+    Merges the swaps of several periods, deduplicated by id and ordered by id as a single paginated query returns them.
+    """
+    swaps_by_id = {}
+    for shard in shards:
+        for swap in shard:
+            swaps_by_id.setdefault(swap["id"], swap)
 
-    return all_swaps_for_period
+    return [swaps_by_id[swap_id] for swap_id in sorted(swaps_by_id)]
+
+
+async def fetch_sharded_swaps_for_period_async(
+    session: aiohttp.ClientSession,
+    start_ts: int,
+    end_ts: int,
+    n_shards: int = 4,
+    limit: int = 1000,
+    page_budget: int | None = 10,
+) -> list[dict]:
+    """
+    Fetches all swaps for a given period as n_shards time windows fetched concurrently on the same session.
+    """
+    n_shards = max(1, min(n_shards, end_ts - start_ts + 1))
+    span = end_ts - start_ts + 1
+    bounds = [start_ts + span * i // n_shards for i in range(n_shards + 1)]
+
+    shards = await asyncio.gather(
+        *(
+            fetch_all_swaps_for_period_async(
+                session,
+                bounds[i],
+                bounds[i + 1] - 1,
+                limit=limit,
+                page_budget=page_budget,
+            )
+            for i in range(n_shards)
+        )
+    )
+    return merge_swaps(shards)
 
 
 def save_swaps_to_file(swaps_data: list[dict], filename: str) -> None:
@@ -160,8 +257,27 @@ def save_swaps_to_file(swaps_data: list[dict], filename: str) -> None:
         print(f"  Unexpected error writing to {os.path.basename(filename)}: {e}")
 
 
+def save_swaps_to_store(swaps_data: list[dict], day_str: str) -> None:
+    """
+    Saves a list of swap data to the columnar swap store.
+    """
+    if not swaps_data:
+        return
+
+    try:
+        swap_store.write_swaps(
+            subgraph_swaps_to_frame(swaps_data), "subgraph_v3", day_str
+        )
+    except Exception as e:
+        print(f"  Unexpected error writing {day_str} to the swap store: {e}")
+
+
 async def process_day_async(
-    session: aiohttp.ClientSession, current_dt: datetime, semaphore: asyncio.Semaphore
+    session: aiohttp.ClientSession,
+    current_dt: datetime,
+    semaphore: asyncio.Semaphore,
+    n_shards: int = 4,
+    page_budget: int | None = 10,
 ) -> None:
     """
     Asynchronously fetches and saves swap data for a single day.
@@ -179,8 +295,12 @@ async def process_day_async(
         day_end_timestamp = int(day_end_dt.timestamp())
 
         try:
-            daily_swaps = await fetch_all_swaps_for_period_async(
-                session, day_start_timestamp, day_end_timestamp
+            daily_swaps = await fetch_sharded_swaps_for_period_async(
+                session,
+                day_start_timestamp,
+                day_end_timestamp,
+                n_shards=n_shards,
+                page_budget=page_budget,
             )
 
             print(f"  Fetched {len(daily_swaps)} swaps for {day_str}.")
@@ -191,6 +311,9 @@ async def process_day_async(
                 await loop.run_in_executor(
                     None, save_swaps_to_file, daily_swaps, str(file_name)
                 )
+                await loop.run_in_executor(
+                    None, save_swaps_to_store, daily_swaps, day_str
+                )
         except Exception as e:
             print(f"Error processing day {day_str}: {e}")
         finally:
@@ -201,9 +324,13 @@ async def fetch_uniswap_v3(
     overall_start_date_str: str,
     overall_end_date_str: str,
     max_concurrent_days: int = 8,
+    n_shards: int = 4,
+    page_budget: int | None = 10,
+    max_concurrent_requests: int = 32,
 ) -> None:
     """
     Main asynchronous function to coordinate fetching data for all days.
+    Each day is fetched as n_shards concurrent time windows, with at most max_concurrent_requests requests in flight.
     """
     if (
         not GRAPH_API_KEY
@@ -235,14 +362,23 @@ async def fetch_uniswap_v3(
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_NONE
 
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
+    connector = aiohttp.TCPConnector(ssl=ssl_context, limit=max_concurrent_requests)
 
     async with aiohttp.ClientSession(connector=connector) as session:
         current_dt = overall_start_dt
         while current_dt <= overall_end_dt:
-            tasks.append(process_day_async(session, current_dt, semaphore))
+            tasks.append(
+                process_day_async(
+                    session,
+                    current_dt,
+                    semaphore,
+                    n_shards=n_shards,
+                    page_budget=page_budget,
+                )
+            )
             current_dt += timedelta(days=1)
 
         await asyncio.gather(*tasks)
 
+    log_metrics()
     print("\nDaily swap export process complete.")
@@ -0,0 +1,247 @@
+"""
+Local cache of the daily volume of Uniswap pairs and pools, keyed by
+(pair, day). Only the days not fetched yet are queried from the subgraph.
+
+The daily rows of each version are kept in
+``<DAY_DATA_CACHE_PATH>/<version>_day_data.parquet`` next to the range of days
+already fetched per pair, ``<version>_coverage.parquet``: a day without a row
+inside the covered range had no volume.
+"""
+
+import calendar
+import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from environ.constants import DAY_DATA_CACHE_PATH
+from environ.fetch.fetch_utils.graphql_batch import TimestampPager, run_batched
+from environ.fetch.fetch_utils.subgraph_query import HTTP_V2, HTTP_V3
+from environ.utils.atomic_io import atomic_write
+from environ.utils.info_logger import print_info_log
+
+DAY_SECONDS = 86400
+
+# Entity, pair filter and volume fields (token0, token1, USD) of each version
+DAY_DATA_SOURCES = {
+    "v2": {
+        "http": HTTP_V2,
+        "field": "pairDayDatas",
+        "pair_field": "pairAddress",
+        "volume_fields": ("dailyVolumeToken0", "dailyVolumeToken1", "dailyVolumeUSD"),
+    },
+    "v3": {
+        "http": HTTP_V3,
+        "field": "poolDayDatas",
+        "pair_field": "pool",
+        "volume_fields": ("volumeToken0", "volumeToken1", "volumeUSD"),
+    },
+}
+
+DAY_DATA_COLUMNS = ["pair", "date", "volumeToken0", "volumeToken1", "volumeUSD"]
+
+
+def to_day_timestamp(date: datetime.datetime) -> int:
+    """
+    Convert a date to its utc unix timestamp
+    """
+
+    return int(calendar.timegm(date.timetuple()))
+
+
+class DayDataCache:
+    """
+    Daily volume of the pairs (v2) or pools (v3) of one version
+    """
+
+    def __init__(self, version: str, cache_path: Path = DAY_DATA_CACHE_PATH) -> None:
+        self.version = version
+        self.source = DAY_DATA_SOURCES[version]
+        self.cache_path = Path(cache_path)
+        self.day_data_file = self.cache_path / f"{version}_day_data.parquet"
+        self.coverage_file = self.cache_path / f"{version}_coverage.parquet"
+
+        if self.day_data_file.exists() and self.coverage_file.exists():
+            self.day_data = pd.read_parquet(self.day_data_file)
+            self.coverage = pd.read_parquet(self.coverage_file).set_index("pair")
+        else:
+            self.day_data = pd.DataFrame(
+                {
+                    "pair": pd.Series(dtype=str),
+                    "date": pd.Series(dtype="int64"),
+                    "volumeToken0": pd.Series(dtype="float64"),
+                    "volumeToken1": pd.Series(dtype="float64"),
+                    "volumeUSD": pd.Series(dtype="float64"),
+                }
+            )
+            self.coverage = pd.DataFrame(
+                {
+                    "pair": pd.Series(dtype=str),
+                    "first_date": pd.Series(dtype="int64"),
+                    "last_date": pd.Series(dtype="int64"),
+                }
+            ).set_index("pair")
+
+    def save(self) -> None:
+        """
+        Write the cache to disk atomically
+        """
+
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self.day_data_file, "wb") as f:
+            self.day_data.to_parquet(
+                f, engine="pyarrow", compression="zstd", index=False
+            )
+        with atomic_write(self.coverage_file, "wb") as f:
+            self.coverage.reset_index().to_parquet(
+                f, engine="pyarrow", compression="zstd", index=False
+            )
+
+    def missing_ranges(
+        self, ranges: dict[str, tuple[int, int]]
+    ) -> list[tuple[str, int, int]]:
+        """
+        Return the (pair, first day, last day) ranges still to fetch to cover
+        the requested inclusive day ranges of each pair. The covered range of
+        a pair stays contiguous, so a request after a gap fetches the gap too.
+        """
+
+        missing = []
+        for pair, (first_date, last_date) in ranges.items():
+            if pair not in self.coverage.index:
+                missing.append((pair, first_date, last_date))
+                continue
+            covered_first, covered_last = self.coverage.loc[
+                pair, ["first_date", "last_date"]
+            ]
+            if first_date < covered_first:
+                missing.append((pair, first_date, int(covered_first) - DAY_SECONDS))
+            if last_date > covered_last:
+                missing.append((pair, int(covered_last) + DAY_SECONDS, last_date))
+        return missing
+
+    def update(
+        self,
+        ranges: dict[str, tuple[int, int]],
+        batch_size: int = 25,
+        max_concurrency: int = 8,
+    ) -> int:
+        """
+        Fetch the missing days of the requested inclusive day ranges, in
+        batched documents, and save the cache. Days from today on are never
+        marked as covered since their volume is not final.
+
+        Returns the number of documents sent.
+        """
+
+        last_final_date = (
+            to_day_timestamp(datetime.datetime.utcnow()) - DAY_SECONDS
+        )
+        ranges = {
+            pair: (first_date, min(last_date, last_final_date))
+            for pair, (first_date, last_date) in ranges.items()
+            if first_date <= min(last_date, last_final_date)
+        }
+        missing = self.missing_ranges(ranges)
+        if not missing:
+            return 0
+
+        volume_fields = self.source["volume_fields"]
+        pages = []
+
+        def collect(pair: str, page: list[dict]) -> None:
+            columns = {
+                "pair": pair,
+                "date": np.array([item["date"] for item in page], "int64"),
+            }
+            for column, field in zip(DAY_DATA_COLUMNS[2:], volume_fields):
+                columns[column] = np.array([item[field] for item in page], "float64")
+            pages.append(pd.DataFrame(columns, columns=DAY_DATA_COLUMNS))
+
+        pagers = [
+            TimestampPager(
+                f"d{i}",
+                self.source["field"],
+                {self.source["pair_field"]: pair},
+                "date " + " ".join(volume_fields),
+                first_date,
+                last_date + DAY_SECONDS,
+                lambda item: int(item["date"]),
+                on_page=lambda page, pair=pair: collect(pair, page),
+                order_field="date",
+            )
+            for i, (pair, first_date, last_date) in enumerate(missing)
+        ]
+        n_documents = run_batched(
+            self.source["http"], pagers, batch_size, max_concurrency
+        )
+        print_info_log(
+            f"{self.version} day data: fetched {len(missing)} missing ranges "
+            f"in {n_documents} documents",
+            "cache",
+        )
+
+        self.day_data = (
+            pd.concat([self.day_data, *pages], ignore_index=True)
+            .drop_duplicates(["pair", "date"], keep="last")
+            .sort_values(["pair", "date"], ignore_index=True)
+        )
+        for pair, (first_date, last_date) in ranges.items():
+            if pair in self.coverage.index:
+                first_date = min(first_date, int(self.coverage.at[pair, "first_date"]))
+                last_date = max(last_date, int(self.coverage.at[pair, "last_date"]))
+            self.coverage.loc[pair, ["first_date", "last_date"]] = [
+                first_date,
+                last_date,
+            ]
+        self.coverage = self.coverage.astype("int64")
+        self.save()
+
+        return n_documents
+
+    def volume_matrix(
+        self, pairs: list[str], first_date: int, last_date: int
+    ) -> pd.DataFrame:
+        """
+        Return the daily volume USD of the pairs from the first to the last
+        day, one row per day and one column per pair, NaN on days without
+        volume
+        """
+
+        dates = np.arange(first_date, last_date + DAY_SECONDS, DAY_SECONDS)
+        day_data = self.day_data[
+            self.day_data["pair"].isin(pairs)
+            & self.day_data["date"].between(first_date, last_date)
+        ]
+        return (
+            day_data.pivot(index="date", columns="pair", values="volumeUSD")
+            .reindex(index=dates, columns=pd.Index(pairs).unique())
+        )
+
+
+def window_volume(
+    volume: pd.DataFrame, windows: list[tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Count the days with volume and sum the volume of every pair of the
+    volume matrix over each inclusive (first day, last day) window.
+
+    Returns the valid days and the total volume, of shape (windows, pairs).
+    """
+
+    dates = volume.index.to_numpy()
+    values = volume.to_numpy()
+    has_volume = ~np.isnan(values)
+    values = np.where(has_volume, values, 0.0)
+
+    starts = np.searchsorted(dates, [first_date for first_date, _ in windows], "left")
+    ends = np.searchsorted(dates, [last_date for _, last_date in windows], "right")
+
+    valid_days = np.empty((len(windows), values.shape[1]), dtype="int64")
+    total_volume = np.empty((len(windows), values.shape[1]), dtype="float64")
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        valid_days[i] = has_volume[start:end].sum(axis=0)
+        total_volume[i] = values[start:end].sum(axis=0)
+
+    return valid_days, total_volume
@@ -0,0 +1,492 @@
+"""
+Batch many subgraph sub-queries into aliased GraphQL documents, run the
+documents concurrently and de-multiplex the responses, and fetch the daily
+info of the top 50 pairs (v2) or pools (v3) of a subgraph with them.
+"""
+
+import asyncio
+import bisect
+import json
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from environ.fetch.fetch_utils.subgraph_query import (
+    close_async_session,
+    run_query_async,
+)
+from environ.utils.info_logger import print_info_log
+
+
+class GraphQLEnum(str):
+    """
+    GraphQL enum value, rendered without quotes
+    """
+
+
+def render_value(value) -> str:
+    """
+    Render a Python value as a GraphQL literal
+    """
+
+    if isinstance(value, GraphQLEnum):
+        return str(value)
+    if isinstance(value, dict):
+        fields = ", ".join(f"{k}: {render_value(v)}" for k, v in value.items())
+        return "{" + fields + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(render_value(v) for v in value) + "]"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return json.dumps(value)
+
+
+class SubQuery:
+    """
+    One aliased field of a batched document, answered by a single page
+    """
+
+    def __init__(self, alias: str, field: str, args: dict, selection: str) -> None:
+        self.alias = alias
+        self.field = field
+        self.args = args
+        self.selection = selection
+        self.result = None
+
+    def render(self) -> str:
+        """
+        Render the aliased field
+        """
+
+        return (
+            f"{self.alias}: {self.field}({render_value(self.args)[1:-1]}) "
+            f"{{ {self.selection} }}"
+        )
+
+    def consume(self, page: list[dict]) -> bool:
+        """
+        Take the answer of the sub-query and return whether it is finished
+        """
+
+        self.result = page
+        return True
+
+
+class TimestampPager(SubQuery):
+    """
+    Sub-query paged by `<order_field>_gt` in ascending order of the timestamp
+    field `order_field` until the end timestamp, passing every item before
+    the end to `on_item`, or every page cut at the end to `on_page`
+    """
+
+    def __init__(
+        self,
+        alias: str,
+        field: str,
+        where: dict,
+        selection: str,
+        start_timestamp: int,
+        end_timestamp: int,
+        timestamp_of: Callable[[dict], int],
+        on_item: Callable[[dict], None] | None = None,
+        page_size: int = 1000,
+        on_page: Callable[[list[dict]], None] | None = None,
+        order_field: str = "timestamp",
+    ) -> None:
+        super().__init__(alias, field, {}, selection)
+        self.order_field = order_field
+        self.where = where
+        self.last_timestamp_gt = start_timestamp - 1
+        self.end_timestamp = end_timestamp
+        self.timestamp_of = timestamp_of
+        self.on_item = on_item
+        self.on_page = on_page
+        self.page_size = page_size
+
+    def render(self) -> str:
+        self.args = {
+            "first": self.page_size,
+            "where": {**self.where, f"{self.order_field}_gt": self.last_timestamp_gt},
+            "orderBy": GraphQLEnum(self.order_field),
+            "orderDirection": GraphQLEnum("asc"),
+        }
+        return super().render()
+
+    def consume(self, page: list[dict]) -> bool:
+        # no transaction in the rest of the date
+        if len(page) == 0:
+            return True
+
+        if self.on_page is not None:
+            # the page is ordered by timestamp: cut it at the first item
+            # at or after the end
+            timestamps = [self.timestamp_of(item) for item in page]
+            n_items = bisect.bisect_left(timestamps, self.end_timestamp)
+            self.last_timestamp_gt = timestamps[min(n_items, len(page) - 1)]
+            self.on_page(page[:n_items])
+            return self.last_timestamp_gt >= self.end_timestamp
+
+        for item in page:
+            # last_timestamp_gt >= end_timestamp once the end is passed
+            self.last_timestamp_gt = self.timestamp_of(item)
+            if self.last_timestamp_gt < self.end_timestamp:
+                self.on_item(item)
+            else:
+                break
+
+        return self.last_timestamp_gt >= self.end_timestamp
+
+
+async def run_batched_async(
+    http: str,
+    sub_queries: list[SubQuery],
+    batch_size: int = 25,
+    max_concurrency: int = 8,
+    max_retries: int = 5,
+) -> int:
+    """
+    Run the sub-queries in rounds of aliased documents of at most batch_size
+    fields, max_concurrency documents at a time, until every sub-query is
+    finished. A document answered with errors is retried as a whole.
+
+    Returns the number of documents sent.
+    """
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    failures = {sub_query.alias: 0 for sub_query in sub_queries}
+    n_documents = 0
+
+    async def run_document(batch: list[SubQuery]) -> dict:
+        document = "query {\n" + "\n".join(sq.render() for sq in batch) + "\n}"
+        async with semaphore:
+            return await run_query_async(http, document)
+
+    pending = list(sub_queries)
+    while pending:
+        batches = [
+            pending[i : i + batch_size] for i in range(0, len(pending), batch_size)
+        ]
+        results = await asyncio.gather(*(run_document(batch) for batch in batches))
+        n_documents += len(batches)
+
+        pending = []
+        for batch, result in zip(batches, results):
+            data = result.get("data") or {}
+            for sub_query in batch:
+                if "errors" in result or data.get(sub_query.alias) is None:
+                    failures[sub_query.alias] += 1
+                    if failures[sub_query.alias] > max_retries:
+                        raise Exception(
+                            f"Query failed. {sub_query.alias}: {result.get('errors')}"
+                        )
+                    pending.append(sub_query)
+                elif not sub_query.consume(data[sub_query.alias]):
+                    pending.append(sub_query)
+
+    return n_documents
+
+
+def run_batched(
+    http: str,
+    sub_queries: list[SubQuery],
+    batch_size: int = 25,
+    max_concurrency: int = 8,
+    max_retries: int = 5,
+) -> int:
+    """
+    Run the sub-queries in batched documents from synchronous code
+    """
+
+    async def run() -> int:
+        try:
+            return await run_batched_async(
+                http, sub_queries, batch_size, max_concurrency, max_retries
+            )
+        finally:
+            await close_async_session()
+
+    return asyncio.run(run())
+
+
+@dataclass
+class PairDailyQueries:
+    """
+    Version-specific endpoint, entity and field names of the daily queries of
+    the pairs (v2) or pools (v3) of a subgraph, with the per-pair functions of
+    the version
+    """
+
+    http: str
+    label: str
+    # Day aggregate entity, its pair field, selection and volume field
+    day_entity: str
+    day_pair_field: str
+    day_selection: str
+    day_volume_field: str
+    # Pair field of the mints, burns and swaps, and their selections
+    pair_field: str
+    event_selection: str
+    swap_selection: str
+    # Minimal swap fields for the vectorized directional volume
+    swap_amount_fields: list[str]
+    timestamp_of: Callable[[dict], int]
+    # Count a swap and add its volume to its direction, in place
+    add_swap: Callable[[list, dict], None]
+    # Count the swaps and sum the volume of each direction on whole arrays
+    aggregate_swaps: Callable[[dict[str, np.ndarray]], tuple]
+    get_gross_volume: Callable[[str, int], list]
+    count_daily_mints: Callable[[str, int, int], int]
+    count_daily_burns: Callable[[str, int, int], int]
+    compute_daily_directional_volume: Callable[[str, int, int], tuple]
+
+
+def swaps_to_arrays(swaps_page: list[dict], fields: list[str]) -> dict[str, np.ndarray]:
+    """
+    Convert a page of swaps into one float array per amount field
+    """
+
+    return {
+        field: np.array([swap[field] for swap in swaps_page], dtype=np.float64)
+        for field in fields
+    }
+
+
+def concat_swap_arrays(
+    chunks: list[dict[str, np.ndarray]], fields: list[str]
+) -> dict[str, np.ndarray]:
+    """
+    Concatenate the arrays of several pages
+    """
+
+    return {
+        field: np.concatenate(
+            [chunk[field] for chunk in chunks] + [np.empty(0, dtype=np.float64)]
+        )
+        for field in fields
+    }
+
+
+def swaps_pager(
+    queries: PairDailyQueries,
+    alias: str,
+    batch_pair_id: str,
+    date_timestamp: int,
+    end_timestamp: int,
+    chunks: list[dict[str, np.ndarray]],
+) -> TimestampPager:
+    """
+    Pager of the swaps of a pair with the minimal fields, converting every
+    page to arrays
+    """
+
+    return TimestampPager(
+        alias,
+        "swaps",
+        {queries.pair_field: batch_pair_id},
+        "timestamp " + " ".join(queries.swap_amount_fields),
+        date_timestamp,
+        end_timestamp,
+        lambda swap: int(swap["timestamp"]),
+        on_page=lambda swaps_page: chunks.append(
+            swaps_to_arrays(swaps_page, queries.swap_amount_fields)
+        ),
+    )
+
+
+def compute_daily_directional_volume_vectorized(
+    queries: PairDailyQueries,
+    batch_pair_id: str,
+    date_timestamp: int,
+    end_timestamp: int,
+) -> tuple[int, int, float, int, float]:
+    """
+    Compute the directional volume on arrays of the minimal swap fields, the
+    vectorized counterpart of compute_daily_directional_volume
+    """
+
+    chunks = []
+    run_batched(
+        queries.http,
+        [
+            swaps_pager(
+                queries, "swaps", batch_pair_id, date_timestamp, end_timestamp, chunks
+            )
+        ],
+    )
+    return queries.aggregate_swaps(
+        concat_swap_arrays(chunks, queries.swap_amount_fields)
+    )
+
+
+def cross_check_directional_volume(
+    queries: PairDailyQueries,
+    batch_pair_id: str,
+    date_timestamp: int,
+    end_timestamp: int,
+    rtol: float = 1e-9,
+) -> dict:
+    """
+    Compare the per-swap and vectorized directional volume of a pair, and the
+    gross volume with the daily aggregate of the subgraph
+    """
+
+    loop_result = queries.compute_daily_directional_volume(
+        batch_pair_id, date_timestamp, end_timestamp
+    )
+    vectorized_result = compute_daily_directional_volume_vectorized(
+        queries, batch_pair_id, date_timestamp, end_timestamp
+    )
+    gross_info = queries.get_gross_volume(batch_pair_id, date_timestamp)
+    day_volume = float(gross_info[0][queries.day_volume_field]) if gross_info else 0.0
+
+    # counts must be equal, volumes only differ by the summation order
+    match = all(loop_result[i] == vectorized_result[i] for i in [0, 1, 3]) and all(
+        np.isclose(loop_result[i], vectorized_result[i], rtol=rtol, atol=0.0)
+        for i in [2, 4]
+    )
+    if not match:
+        print_info_log(
+            f"Directional volume mismatch for {batch_pair_id}: "
+            f"{loop_result} != {vectorized_result}",
+            "warning",
+        )
+
+    return {
+        "loop": loop_result,
+        "vectorized": vectorized_result,
+        "match": match,
+        "dayVolumeUSD": day_volume,
+        "grossVolumeUSD": vectorized_result[2] + vectorized_result[4],
+    }
+
+
+def fetch_pair_daily(
+    queries: PairDailyQueries,
+    batch_pair_id: str,
+    date_timestamp: int,
+    end_timestamp: int,
+    vectorized: bool = False,
+) -> dict:
+    """
+    Fetch the daily info of one pair with sequential queries
+    """
+
+    if vectorized:
+        swaps = compute_daily_directional_volume_vectorized(
+            queries, batch_pair_id, date_timestamp, end_timestamp
+        )
+    else:
+        swaps = queries.compute_daily_directional_volume(
+            batch_pair_id, date_timestamp, end_timestamp
+        )
+
+    return {
+        "gross": queries.get_gross_volume(batch_pair_id, date_timestamp),
+        "mints": queries.count_daily_mints(
+            batch_pair_id, date_timestamp, end_timestamp
+        ),
+        "burns": queries.count_daily_burns(
+            batch_pair_id, date_timestamp, end_timestamp
+        ),
+        "swaps": swaps,
+    }
+
+
+def fetch_pairs_daily_batched(
+    queries: PairDailyQueries,
+    pair_ids: list[str],
+    date_timestamp: int,
+    end_timestamp: int,
+    batch_size: int = 25,
+    max_concurrency: int = 8,
+    vectorized: bool = False,
+) -> list[dict]:
+    """
+    Fetch the daily info of many pairs with aliased sub-queries packed into
+    concurrent batched documents, paging every pair until the end of the date.
+    With vectorized, the swaps are aggregated on arrays of the minimal fields.
+    """
+
+    pairs_daily = []
+    sub_queries = []
+    for i, batch_pair_id in enumerate(pair_ids):
+        counts = {"mints": 0, "burns": 0}
+        # swap counts and volumes, or the array chunks when vectorized
+        swaps = [] if vectorized else [0, 0, 0.0, 0, 0.0]
+        gross = SubQuery(
+            f"p{i}_day",
+            queries.day_entity,
+            {"where": {queries.day_pair_field: batch_pair_id, "date": date_timestamp}},
+            queries.day_selection,
+        )
+        sub_queries.append(gross)
+        for kind in ["mints", "burns"]:
+            sub_queries.append(
+                TimestampPager(
+                    f"p{i}_{kind}",
+                    kind,
+                    {queries.pair_field: batch_pair_id},
+                    queries.event_selection,
+                    date_timestamp,
+                    end_timestamp,
+                    queries.timestamp_of,
+                    lambda _, counts=counts, kind=kind: counts.update(
+                        {kind: counts[kind] + 1}
+                    ),
+                )
+            )
+        if vectorized:
+            sub_queries.append(
+                swaps_pager(
+                    queries,
+                    f"p{i}_swaps",
+                    batch_pair_id,
+                    date_timestamp,
+                    end_timestamp,
+                    swaps,
+                )
+            )
+        else:
+            sub_queries.append(
+                TimestampPager(
+                    f"p{i}_swaps",
+                    "swaps",
+                    {queries.pair_field: batch_pair_id},
+                    queries.swap_selection,
+                    date_timestamp,
+                    end_timestamp,
+                    queries.timestamp_of,
+                    lambda swap, swaps=swaps: queries.add_swap(swaps, swap),
+                )
+            )
+        pairs_daily.append((gross, counts, swaps))
+
+    n_documents = run_batched(
+        queries.http,
+        sub_queries,
+        batch_size=batch_size,
+        max_concurrency=max_concurrency,
+    )
+    print_info_log(
+        f"Fetched {len(pair_ids)} pairs in {n_documents} batched queries",
+        queries.label,
+    )
+
+    return [
+        {
+            "gross": gross.result,
+            "mints": counts["mints"],
+            "burns": counts["burns"],
+            "swaps": (
+                queries.aggregate_swaps(
+                    concat_swap_arrays(swaps, queries.swap_amount_fields)
+                )
+                if vectorized
+                else tuple(swaps)
+            ),
+        }
+        for gross, counts, swaps in pairs_daily
+    ]
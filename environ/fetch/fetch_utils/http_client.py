@@ -0,0 +1,423 @@
+"""
+Shared HTTP client layer of the fetchers: per-endpoint token-bucket rate
+limiting, exponential backoff with jitter honouring Retry-After, a circuit
+breaker and request metrics.
+"""
+
+import asyncio
+import bisect
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+
+from environ.utils.info_logger import print_info_log
+
+# Status codes worth retrying: throttling and server-side failures
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a request is refused because the endpoint circuit is open
+    """
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, capped by max_delay
+    """
+
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def backoff_delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Delay before the retry following the given (0-based) failed attempt.
+        A Retry-After sent by the server takes precedence.
+        """
+
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second, holding at
+    most `capacity` tokens. Tokens are reserved ahead, so the waiters of both
+    threads and event loops are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token and return the time to wait until it is available
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self) -> None:
+        """
+        Block until a token is available
+        """
+
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """
+        Wait asynchronously until a token is available
+        """
+
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Open the circuit after `failure_threshold` consecutive failures, refusing
+    requests for `reset_timeout` seconds, then let one trial request through
+    (or another one if the trial got no answer within `reset_timeout`)
+    """
+
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 60.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_started: float | None = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        One of 'closed', 'open' and 'half_open'
+        """
+
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_request(self) -> None:
+        """
+        Raise CircuitOpenError unless the request may go through
+        """
+
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return
+            now = time.monotonic()
+            if state == "half_open" and (
+                self.trial_started is None
+                or now - self.trial_started >= self.reset_timeout
+            ):
+                self.trial_started = now
+                return
+        raise CircuitOpenError("Circuit open, request refused")
+
+    def record_success(self) -> None:
+        """
+        Close the circuit
+        """
+
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started = None
+
+    def record_failure(self) -> None:
+        """
+        Count a failure, opening the circuit once the threshold is reached or
+        the trial request failed
+        """
+
+        with self.lock:
+            self.failures += 1
+            if self.trial_started is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_started = None
+
+
+@dataclass
+class EndpointMetrics:
+    """
+    Request counters and latency histogram of one endpoint
+    """
+
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    throttled: int = 0
+    latency_counts: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    latency_total: float = 0.0
+
+    def observe(self, latency: float) -> None:
+        """
+        Record the latency of one request
+        """
+
+        self.requests += 1
+        self.latency_total += latency
+        self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def summary(self) -> dict:
+        """
+        Summarize the metrics as a dictionary
+        """
+
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [
+            f">{LATENCY_BUCKETS[-1]}s"
+        ]
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "mean_latency": self.latency_total / self.requests if self.requests else None,
+            "latency_histogram": dict(zip(labels, self.latency_counts)),
+        }
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date
+    """
+
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class EndpointClient:
+    """
+    Rate limited, retrying and circuit-broken access to one endpoint, shared
+    by the synchronous and asynchronous fetchers of a process
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 10.0,
+        burst: float = 20.0,
+        policy: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = EndpointMetrics()
+        self.lock = threading.Lock()
+
+    def _on_response(self, status: int, latency: float) -> bool:
+        """
+        Record a response and return whether it should be retried
+        """
+
+        with self.lock:
+            self.metrics.observe(latency)
+            if status == 429:
+                self.metrics.throttled += 1
+        if status in RETRY_STATUS:
+            self.breaker.record_failure()
+            return True
+        self.breaker.record_success()
+        return False
+
+    def _on_error(self, attempt: int) -> bool:
+        """
+        Record a connection error and return whether it should be retried
+        """
+
+        self.breaker.record_failure()
+        with self.lock:
+            if attempt < self.policy.max_retries:
+                self.metrics.retries += 1
+                return True
+            self.metrics.failures += 1
+            return False
+
+    def _on_exhausted(self) -> None:
+        """
+        Record a request given up after its last retry
+        """
+
+        with self.lock:
+            self.metrics.failures += 1
+
+    def _retry_delay(self, attempt: int, retry_after: str | None) -> float:
+        """
+        Count a retry and return the delay before it
+        """
+
+        with self.lock:
+            self.metrics.retries += 1
+        return self.policy.backoff_delay(attempt, parse_retry_after(retry_after))
+
+    def request(
+        self, method: str, url: str, session: requests.Session | None = None, **kwargs
+    ) -> requests.Response:
+        """
+        Send a request through `session` (or a one-off connection). The last
+        response is returned once the retries are exhausted.
+        """
+
+        sender = session or requests
+        for attempt in range(self.policy.max_retries + 1):
+            self.breaker.before_request()
+            self.bucket.acquire()
+            start = time.monotonic()
+            try:
+                response = sender.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not self._on_error(attempt):
+                    raise
+                delay = self.policy.backoff_delay(attempt)
+                print_info_log(f"{self.name}: {e}, retrying in {delay:.1f}s", "warning")
+                time.sleep(delay)
+                continue
+
+            retry = self._on_response(response.status_code, time.monotonic() - start)
+            if not retry or attempt == self.policy.max_retries:
+                if retry:
+                    self._on_exhausted()
+                return response
+            time.sleep(self._retry_delay(attempt, response.headers.get("Retry-After")))
+
+        raise AssertionError("unreachable")
+
+    async def request_async(
+        self, session: aiohttp.ClientSession, method: str, url: str, **kwargs
+    ) -> tuple[int, dict | list | None]:
+        """
+        Send a request on an aiohttp session and return its status and JSON
+        body. The last status is returned once the retries are exhausted.
+        """
+
+        for attempt in range(self.policy.max_retries + 1):
+            self.breaker.before_request()
+            await self.bucket.acquire_async()
+            start = time.monotonic()
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+                    body = (
+                        await response.json(content_type=None)
+                        if status == 200
+                        else None
+                    )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not self._on_error(attempt):
+                    raise
+                delay = self.policy.backoff_delay(attempt)
+                print_info_log(f"{self.name}: {e!r}, retrying in {delay:.1f}s", "warning")
+                await asyncio.sleep(delay)
+                continue
+
+            retry = self._on_response(status, time.monotonic() - start)
+            if not retry or attempt == self.policy.max_retries:
+                if retry:
+                    self._on_exhausted()
+                return status, body
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+
+        raise AssertionError("unreachable")
+
+
+# Endpoint clients of the process, keyed by host
+_CLIENTS: dict[str, EndpointClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+# Sustained request rate (per second) and burst of known hosts
+ENDPOINT_LIMITS = {
+    "gateway.thegraph.com": (20.0, 40.0),
+    "api.thegraph.com": (10.0, 20.0),
+    "api.compound.finance": (2.0, 5.0),
+}
+
+
+def get_client(url: str) -> EndpointClient:
+    """
+    Return the shared client of the host of `url`
+    """
+
+    host = urlsplit(url).netloc
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(host)
+        if client is None:
+            rate, burst = ENDPOINT_LIMITS.get(host, (10.0, 20.0))
+            client = _CLIENTS[host] = EndpointClient(host, rate=rate, burst=burst)
+        return client
+
+
+def configure_endpoint(url: str, rate: float, burst: float | None = None) -> None:
+    """
+    Set the sustained rate and burst of the host of `url`
+    """
+
+    client = get_client(url)
+    client.bucket = TokenBucket(rate, burst if burst is not None else rate)
+
+
+def get_metrics() -> dict[str, dict]:
+    """
+    Return the metrics of all endpoints used by the process
+    """
+
+    with _CLIENTS_LOCK:
+        return {host: client.metrics.summary() for host, client in _CLIENTS.items()}
+
+
+def log_metrics() -> None:
+    """
+    Print a one-line summary of the metrics of each endpoint
+    """
+
+    for host, summary in get_metrics().items():
+        mean_latency = summary["mean_latency"]
+        print_info_log(
+            f"{host}: {summary['requests']} requests, {summary['retries']} retries, "
+            f"{summary['failures']} failures, {summary['throttled']} throttled, "
+            "mean latency "
+            + ("n/a" if mean_latency is None else f"{mean_latency:.3f}s"),
+            "metrics",
+        )
@@ -2,18 +2,101 @@
 Query structure from the API.
 """
 
+import asyncio
+import threading
+
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+
+from environ.fetch.fetch_utils.http_client import get_client
 
 HTTP_V2 = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v2"
 HTTP_V3 = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3"
 
+# Number of keep-alive connections kept per host
+POOL_SIZE = 16
+
+# Compressed responses, decompressed transparently by requests and aiohttp
+SESSION_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_async_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def configure_pool(pool_size: int) -> None:
+    """
+    Set the number of pooled connections per host, closing the current
+    synchronous session so that the next query opens a resized one
+    """
+
+    global POOL_SIZE, _session  # pylint: disable=global-statement
+    with _session_lock:
+        POOL_SIZE = pool_size
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session() -> requests.Session:
+    """
+    Return the pooled keep-alive session shared by the synchronous queries
+    """
+
+    global _session  # pylint: disable=global-statement
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(SESSION_HEADERS)
+            _session = session
+        return _session
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """
+    Return the pooled keep-alive session of the running event loop, shared by
+    the asynchronous queries
+    """
+
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        # sessions of finished event loops cannot be reused
+        for other_loop in [other for other in _async_sessions if other.is_closed()]:
+            del _async_sessions[other_loop]
+        session = _async_sessions[loop] = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=POOL_SIZE),
+            headers=SESSION_HEADERS,
+        )
+    return session
+
+
+async def close_async_session() -> None:
+    """
+    Close the session of the running event loop
+    """
+
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
 
 def run_query(http: str, query_scripts: str) -> None:
     """
     execute query without variable parameters
     """
     # endpoint where you are making the request
-    request = requests.post(http, "", json={"query": query_scripts}, timeout=120)
+    request = get_client(http).request(
+        "POST",
+        http,
+        session=get_session(),
+        json={"query": query_scripts},
+        timeout=120,
+    )
     if request.status_code == 200:
         return request.json()
 
@@ -27,8 +110,12 @@ def run_query_var(http: str, query_scripts: str, var: dict[str, str]) -> None:
     execute query with variable paramters
     """
     # endpoint where you are making the request
-    request = requests.post(
-        http, "", json={"query": query_scripts, "variables": var}, timeout=120
+    request = get_client(http).request(
+        "POST",
+        http,
+        session=get_session(),
+        json={"query": query_scripts, "variables": var},
+        timeout=120,
     )
     if request.status_code == 200:
         return request.json()
@@ -36,3 +123,39 @@ def run_query_var(http: str, query_scripts: str, var: dict[str, str]) -> None:
     raise Exception(
         f"Query failed. return code is{request.status_code}.      {query_scripts}"
     )
+
+
+async def run_query_async(http: str, query_scripts: str) -> dict:
+    """
+    execute query without variable parameters, asynchronously
+    """
+    status, body = await get_client(http).request_async(
+        get_async_session(),
+        "POST",
+        http,
+        json={"query": query_scripts},
+        timeout=aiohttp.ClientTimeout(total=120),
+    )
+    if status == 200:
+        return body
+
+    raise Exception(f"Query failed. return code is{status}.      {query_scripts}")
+
+
+async def run_query_var_async(
+    http: str, query_scripts: str, var: dict[str, str]
+) -> dict:
+    """
+    execute query with variable paramters, asynchronously
+    """
+    status, body = await get_client(http).request_async(
+        get_async_session(),
+        "POST",
+        http,
+        json={"query": query_scripts, "variables": var},
+        timeout=aiohttp.ClientTimeout(total=120),
+    )
+    if status == 200:
+        return body
+
+    raise Exception(f"Query failed. return code is{status}.      {query_scripts}")
@@ -0,0 +1,120 @@
+"""
+Streaming collector of paginated subgraph swaps: raw batches are buffered
+and flattened once per chunk into string columns, then written to csv.
+"""
+
+import contextlib
+
+import pandas as pd
+
+from environ.utils.atomic_io import atomic_write
+
+
+class SwapCollector:
+    """
+    Collect raw swap batches, keeping at most `chunk_size` swaps as Python
+    dicts. ``fields`` maps each output column to its path in the nested swap.
+    Swaps with a timestamp at or after ``end_timestamp`` are dropped.
+
+    With a ``file_name`` the chunks are written to csv as they fill up,
+    otherwise they are kept as dataframes and concatenated by ``to_frame``.
+    """
+
+    def __init__(
+        self,
+        fields: dict[str, tuple[str, ...]],
+        end_timestamp: int,
+        file_name: str | None = None,
+        chunk_size: int = 100_000,
+    ) -> None:
+        self.fields = fields
+        self.end_timestamp = str(end_timestamp)
+        self.chunk_size = chunk_size
+        self.buffer: list[dict] = []
+        self.frames: list[pd.DataFrame] = []
+        self.n_fetched = 0
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.file_name = file_name
+        self.file = None
+        self.stack = contextlib.ExitStack()
+
+    def __enter__(self) -> "SwapCollector":
+        if self.file_name is not None:
+            self.file = self.stack.enter_context(
+                atomic_write(self.file_name, "w", encoding="utf-8", newline="")
+            )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool | None:
+        if exc_type is None:
+            self.flush(final=True)
+        return self.stack.__exit__(exc_type, exc_value, traceback)
+
+    def add(self, swaps: list[dict]) -> None:
+        """
+        Buffer one batch of raw swaps, flushing full chunks
+        """
+
+        self.buffer.extend(swaps)
+        self.n_fetched += len(swaps)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flatten(self, swaps: list[dict]) -> pd.DataFrame:
+        """
+        Flatten raw swaps into one column per field, in a single pass per field
+        """
+
+        columns = {}
+        for column, keys in self.fields.items():
+            if len(keys) == 1:
+                (key,) = keys
+                columns[column] = [swap[key] for swap in swaps]
+            else:
+                columns[column] = [_get_path(swap, keys) for swap in swaps]
+
+        df_chunk = pd.DataFrame(
+            columns,
+            columns=list(self.fields),
+            index=pd.RangeIndex(self.n_rows, self.n_rows + len(swaps)),
+        )
+        return df_chunk[df_chunk["timestamp"] < self.end_timestamp]
+
+    def flush(self, final: bool = False) -> None:
+        """
+        Flatten the buffered swaps and write or keep them
+        """
+
+        # an empty result still gets its header
+        if not self.buffer and not (final and self.n_chunks == 0):
+            return
+
+        df_chunk = self.flatten(self.buffer)
+        self.buffer = []
+        if self.file is not None:
+            df_chunk.to_csv(self.file, header=self.n_chunks == 0)
+        else:
+            self.frames.append(df_chunk)
+        self.n_rows += len(df_chunk)
+        self.n_chunks += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Return all collected swaps as one dataframe
+        """
+
+        self.flush(final=True)
+        return pd.concat(self.frames) if len(self.frames) > 1 else self.frames[0]
+
+
+def _get_path(swap: dict, keys: tuple[str, ...]):
+    """
+    Return the value at a nested path of a swap
+    """
+
+    value = swap
+    for key in keys:
+        value = value[key]
+    return value
+
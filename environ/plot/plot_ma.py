@@ -17,7 +17,7 @@ from environ.constants import (
     KEY_TOKEN_LIST,
     SAMPLE_PERIOD,
 )
-from environ.process.market.boom_bust import BOOM_BUST
+from environ.process.market.boom_bust import load_boom_bust
 from environ.utils.variable_constructer import ma_variable_columns, name_ma_variable
 
 
@@ -66,12 +66,15 @@ def preprocess_ma(
 
 def plot_boom_bust(
     ax_plot,
-    boom_bust: list[dict] = BOOM_BUST,
+    boom_bust: list[dict] | None = None,
 ) -> None:
     """
-    Function to plot the boom bust period
+    Function to plot the boom bust period, by default of the S&P cycles
     """
 
+    if boom_bust is None:
+        boom_bust = load_boom_bust()
+
     # plot boom bust cycles
     for cycle in boom_bust:
         ax_plot.axvspan(
@@ -85,7 +88,7 @@ def plot_boom_bust(
 def plot_time_series(
     df: pd.DataFrame,
     file_name: str,
-    boom_bust: list[dict] = BOOM_BUST,
+    boom_bust: list[dict] | None = None,
     x_limit: list[str] = SAMPLE_PERIOD,
     token_col_name: str = "token",
     value_colume: str = "value",
@@ -147,7 +150,7 @@ def plot_ma_time_series(
     ma_window: int = 30,
     value_colume: str = "value",
     token_col_name: str = "token",
-    boom_bust: list[dict] = BOOM_BUST,
+    boom_bust: list[dict] | None = None,
     x_limit: list[str] = SAMPLE_PERIOD,
     file_name: str = "volume_ma",
     event_date_list: list[str] = ["2020-03-12"],
@@ -175,7 +178,7 @@ def plot_ma_time_series_panel(
     ma_window: int = 30,
     value_colume: str = "value",
     token_col_name: str = "token",
-    boom_bust: list[dict] = BOOM_BUST,
+    boom_bust: list[dict] | None = None,
     x_limit: list[str] = SAMPLE_PERIOD,
     file_name: str = "volume_ma",
     event_date_list: list[str] = ["2020-03-12"],
@@ -227,7 +230,7 @@ if __name__ == "__main__":
         ma_window=30,
         value_colume="vol_undirected_full_len_share",
         token_col_name="Token",
-        boom_bust=BOOM_BUST,
+        boom_bust=load_boom_bust(),
         x_limit=SAMPLE_PERIOD,
         file_name="vol_undirected_full_len_share",
         event_date_list=EVENT_DATE_LIST,
@@ -8,67 +8,179 @@ from os import path
 import sys
 import pandas as pd
 import numpy as np
+from scipy import sparse
 import yaml
 from environ.utils.config_parser import Config
+from environ.utils.atomic_io import atomic_to_csv
+from environ.utils import swap_store
+from environ.process.betweeness_centrality.subgraph_swaps import read_subgraph_swaps
 import warnings
 from collections import Counter, deque
 
 warnings.simplefilter("ignore", category=FutureWarning)
 # warnings.filterwarnings("ignore")
 
+ROUTE_COLUMNS = [
+    "id",
+    "route",
+    "ultimate_source",
+    "ultimate_target",
+    "intermediary",
+    "pair",
+    "pair_str",
+    "volume_usd",
+    "chain_length",
+]
 
-def manipulate_data(
+
+def add_trading_direction(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the "Source", "Pool_Out_Volume", "Target" and "Pool_In_Volume"
+    attributes for the trading direction of each swap in one columnar pass
+    """
+
+    token0_symbol = data["token0_symbol"].to_numpy()
+    token1_symbol = data["token1_symbol"].to_numpy()
+    amount0 = data["amount0"].to_numpy()
+    amount1 = data["amount1"].to_numpy()
+
+    # the token with a positive amount flows into the pool, i.e. is sold
+    sell_token0 = data["amount0"].astype(float).to_numpy() > 0
+
+    data["Source"] = np.where(sell_token0, token0_symbol, token1_symbol)
+    data["Pool_Out_Volume"] = np.where(
+        data["Source"] == data["token0_symbol"], amount0, amount1
+    )
+    data["Target"] = np.where(sell_token0, token1_symbol, token0_symbol)
+    data["Pool_In_Volume"] = np.where(
+        data["Target"] == data["token0_symbol"], amount0, amount1
+    )
+
+    return data
+
+
+def get_input_files(
     date_label: str, top_list_label: str, uniswap_version: str
-) -> pd.DataFrame:
+) -> dict[str, str]:
     """
-    Read and load the raw data and return the merged (if exists)
-    dataset after filtering txs out of top 50 pools
+    Return the raw swap and top 50 pool files read for one day and version
     """
 
     # Initialize configuration
     config = Config()
+    data_config = config["dev"]["config"]["data"]
 
-    # Step 1: Read File
+    input_files = {}
     if uniswap_version == "v2" or uniswap_version == "v2v3":
-        # Path
-        # data_file_v2 = path.join(
-        #     UNISWAP_V2_DATA_PATH, str("swap/uniswap_v2_swaps_" + date_label + ".csv")
-        # )
-        data_file_v2 = path.join(
-            config["dev"]["config"]["data"]["UNISWAP_V2_DATA_PATH"],
+        input_files["swap_v2"] = path.join(
+            data_config["UNISWAP_V2_DATA_PATH"],
             str("swap/" + top_list_label + "/uniswap_v2_swaps_" + date_label + ".csv"),
         )
-        pool_file_v2 = path.join(
-            config["dev"]["config"]["data"]["UNISWAP_V2_DATA_PATH"],
+        input_files["pool_v2"] = path.join(
+            data_config["UNISWAP_V2_DATA_PATH"],
             str("pool_list/top50_pairs_list_v2_" + top_list_label + ".csv"),
         )
-        # Load
-        data_v2 = pd.read_csv(data_file_v2, index_col=0)
-        top_pools_v2 = pd.read_csv(pool_file_v2, index_col=0)
 
-        # Add attribute as "Source" and "Target" for the trading direction
-        data_v2["amount0"] = data_v2.apply(
-            lambda x: float(x.amount0In) - float(x.amount0Out), axis=1
-        )
-        data_v2["amount1"] = data_v2.apply(
-            lambda x: float(x.amount1In) - float(x.amount1Out), axis=1
-        )
-        data_v2["Source"] = data_v2.apply(
-            lambda x: x.token0_symbol if float(x.amount0) > 0 else x.token1_symbol,
-            axis=1,
-        )
-        data_v2["Pool_Out_Volume"] = data_v2.apply(
-            lambda x: x.amount0 if x.Source == x.token0_symbol else x.amount1, axis=1
+    if uniswap_version == "v3" or uniswap_version == "v2v3":
+        input_files["swap_v3"] = path.join(
+            data_config["UNISWAP_V3_DATA_PATH"],
+            str("swap/" + top_list_label + "/uniswap_v3_swaps_" + date_label + ".csv"),
         )
-        data_v2["Target"] = data_v2.apply(
-            lambda x: x.token1_symbol if float(x.amount0) > 0 else x.token0_symbol,
-            axis=1,
+        input_files["pool_v3"] = path.join(
+            data_config["UNISWAP_V3_DATA_PATH"],
+            str("pool_list/top50_pairs_list_v3_" + top_list_label + ".csv"),
         )
-        data_v2["Pool_In_Volume"] = data_v2.apply(
-            lambda x: x.amount0 if x.Target == x.token0_symbol else x.amount1, axis=1
+
+    if uniswap_version == "subgraph_v3":
+        input_files["subgraph_swap_v3"] = data_config["UNISWAP_V3_DATA_PATH"] + str(
+            "/subgraph_swap/uniswap_v3_swaps_" + date_label + ".json"
         )
+
+    # Prefer the columnar swap store over the raw archive when it holds the day
+    # and is at least as new, as the archive may have been fetched again since
+    for swap_key, store_version, store_top_list in [
+        ("swap_v2", "v2", top_list_label),
+        ("swap_v3", "v3", top_list_label),
+        ("subgraph_swap_v3", "subgraph_v3", None),
+    ]:
+        if swap_key in input_files and swap_store.has_swaps(
+            store_version, date_label, store_top_list, input_files[swap_key]
+        ):
+            input_files[swap_key] = str(
+                swap_store.get_swap_path(store_version, date_label, store_top_list)
+            )
+
+    return input_files
+
+
+def load_swaps(file_name: str, drop_columns: list[str]) -> pd.DataFrame:
+    """
+    Load the swaps of one day from the swap store, a csv or a subgraph json
+    file, without the columns not needed downstream
+    """
+
+    if file_name.endswith(".parquet"):
+        return swap_store.read_swap_file(file_name, drop_columns=drop_columns)
+    if file_name.endswith(".json"):
+        # Stream the records straight into flattened, typed columns
+        return read_subgraph_swaps(file_name, drop_columns=drop_columns)
+    return pd.read_csv(file_name, index_col=0).drop(columns=drop_columns)
+
+
+def get_output_files(date_label: str, uniswap_version: str) -> dict[str, str]:
+    """
+    Return the route and betweenness files written for one day and version
+    """
+
+    # Initialize configuration
+    config = Config()
+
+    return {
+        "swap_route": path.join(
+            config["dev"]["config"]["data"]["BETWEENNESS_DATA_PATH"],
+            "swap_route/DAG_swaps_tx_route_"
+            + uniswap_version
+            + "_"
+            + date_label
+            + ".csv",
+        ),
+        "betweenness": path.join(
+            config["dev"]["config"]["data"]["BETWEENNESS_DATA_PATH"],
+            "betweenness/betweenness_centrality_"
+            + uniswap_version
+            + "_"
+            + date_label
+            + ".csv",
+        ),
+    }
+
+
+def manipulate_data(
+    date_label: str, top_list_label: str, uniswap_version: str
+) -> pd.DataFrame:
+    """
+    Read and load the raw data and return the merged (if exists)
+    dataset after filtering txs out of top 50 pools
+    """
+
+    input_files = get_input_files(date_label, top_list_label, uniswap_version)
+
+    # Step 1: Read File
+    if uniswap_version == "v2" or uniswap_version == "v2v3":
+        # Load
+        data_v2 = load_swaps(input_files["swap_v2"], ["sender", "to"])
+        top_pools_v2 = pd.read_csv(input_files["pool_v2"], index_col=0)
+
+        # Add attribute as "Source" and "Target" for the trading direction
+        data_v2["amount0"] = data_v2["amount0In"].astype(float) - data_v2[
+            "amount0Out"
+        ].astype(float)
+        data_v2["amount1"] = data_v2["amount1In"].astype(float) - data_v2[
+            "amount1Out"
+        ].astype(float)
+        add_trading_direction(data_v2)
         data_v2 = data_v2.drop(
-            ["amount0In", "amount0Out", "amount1In", "amount1Out", "sender", "to"],
+            ["amount0In", "amount0Out", "amount1In", "amount1Out"],
             axis=1,
         )
         data_v2["Version"] = "V2"
@@ -81,38 +193,12 @@ def manipulate_data(
         drop_tx_id_list_v2 = drop_tx_id_list_v2.unique()
 
     if uniswap_version == "v3" or uniswap_version == "v2v3":
-        # Path
-        # data_file_v3 = path.join(
-        #     UNISWAP_V3_DATA_PATH, str("swap/uniswap_v3_swaps_" + date_label + ".csv")
-        # )
-        data_file_v3 = path.join(
-            config["dev"]["config"]["data"]["UNISWAP_V3_DATA_PATH"],
-            str("swap/" + top_list_label + "/uniswap_v3_swaps_" + date_label + ".csv"),
-        )
-        pool_file_v3 = path.join(
-            config["dev"]["config"]["data"]["UNISWAP_V3_DATA_PATH"],
-            str("pool_list/top50_pairs_list_v3_" + top_list_label + ".csv"),
-        )
         # Load
-        data_v3 = pd.read_csv(data_file_v3, index_col=0)
-        top_pools_v3 = pd.read_csv(pool_file_v3, index_col=0)
+        data_v3 = load_swaps(input_files["swap_v3"], ["sender", "recipient", "origin"])
+        top_pools_v3 = pd.read_csv(input_files["pool_v3"], index_col=0)
 
         # Add attribute as "Source" and "Target" for the trading direction
-        data_v3["Source"] = data_v3.apply(
-            lambda x: x.token0_symbol if float(x.amount0) > 0 else x.token1_symbol,
-            axis=1,
-        )
-        data_v3["Pool_Out_Volume"] = data_v3.apply(
-            lambda x: x.amount0 if x.Source == x.token0_symbol else x.amount1, axis=1
-        )
-        data_v3["Target"] = data_v3.apply(
-            lambda x: x.token1_symbol if float(x.amount0) > 0 else x.token0_symbol,
-            axis=1,
-        )
-        data_v3["Pool_In_Volume"] = data_v3.apply(
-            lambda x: x.amount0 if x.Target == x.token0_symbol else x.amount1, axis=1
-        )
-        data_v3 = data_v3.drop(["sender", "recipient", "origin"], axis=1)
+        add_trading_direction(data_v3)
         data_v3["Version"] = "V3"
 
         # drop transactions which sub-transactions out of top pools
@@ -130,86 +216,10 @@ def manipulate_data(
         # # Load
         # data_v3 = pd.read_csv(data_file_v3, index_col=0)
 
-        json_file_path = config["dev"]["config"]["data"]["UNISWAP_V3_DATA_PATH"] + str("/subgraph_swap/uniswap_v3_swaps_" + date_label + ".json")
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            json_data = json.load(f)
-
-
-        # Notice we are NOT including the top-level 'token0' and 'token1'.
-        data_v3= pd.json_normalize(
-            json_data,
-            sep='_', # Use our preferred separator
-            meta=[
-                'amount0',
-                'amount1',
-                'amountUSD',
-                'id',
-                'logIndex',
-                'origin',
-                'recipient',
-                'sender',
-                'sqrtPriceX96',
-                'tick',
-                # Keep the detailed token info from the 'pool' object
-                ['pool', 'id'],
-                ['pool', 'token0', 'decimals'],
-                ['pool', 'token0', 'id'],
-                ['pool', 'token0', 'name'],
-                ['pool', 'token0', 'symbol'],
-                ['pool', 'token1', 'decimals'],
-                ['pool', 'token1', 'id'],
-                ['pool', 'token1', 'name'],
-                ['pool', 'token1', 'symbol'],
-                # Keep the transaction info
-                ['transaction', 'blockNumber'],
-                ['transaction', 'id'],
-                ['transaction', 'timestamp']
-            ]
-        )
-        columns_to_drop = ['token0_id', 'token0_symbol', 'token1_id', 'token1_symbol']
-        data_v3 = data_v3.drop(columns=columns_to_drop)
-        data_v3 = data_v3.rename(columns={
-            'pool_id': 'pool',
-            'pool_token0_decimals': 'token0_decimals',
-            'pool_token1_decimals': 'token1_decimals',
-            'pool_token0_name': 'token0_name',
-            'pool_token1_name': 'token1_name',
-            'pool_token0_id': 'token0_id',
-            'pool_token1_id': 'token1_id',
-            'pool_token0_symbol': 'token0_symbol',
-            'pool_token1_symbol': 'token1_symbol',
-            'transaction_timestamp': 'timestamp',
-            'transaction_id': 'transaction',
-            'transaction_blockNumber': 'blockNumber',
-        })
-        types_to_change = {
-            'amount0': 'float',
-            'amount1': 'float',
-            'amountUSD': 'float',
-            'logIndex': 'Int64',
-            'tick': 'Int64',
-            'blockNumber': 'Int64',
-            'timestamp': 'Int64',
-        }
-        data_v3 = data_v3.astype(types_to_change)
-
-        # Add attribute as "Source" and "Target" for the trading direction
-        data_v3["Source"] = data_v3.apply(
-            lambda x: x.token0_symbol if float(x.amount0) > 0 else x.token1_symbol,
-            axis=1,
-        )
-        data_v3["Pool_Out_Volume"] = data_v3.apply(
-            lambda x: x.amount0 if x.Source == x.token0_symbol else x.amount1, axis=1
-        )
-        data_v3["Target"] = data_v3.apply(
-            lambda x: x.token1_symbol if float(x.amount0) > 0 else x.token0_symbol,
-            axis=1,
-        )
-        data_v3["Pool_In_Volume"] = data_v3.apply(
-            lambda x: x.amount0 if x.Target == x.token0_symbol else x.amount1, axis=1
-        )
-        data_v3 = data_v3.drop(
-            [
+        # The attributes not needed downstream are never materialized
+        data_v3 = load_swaps(
+            input_files["subgraph_swap_v3"],
+            drop_columns=[
                 "sender",
                 "recipient",
                 "origin",
@@ -217,8 +227,10 @@ def manipulate_data(
                 "tick",
                 "sqrtPriceX96",
             ],
-            axis=1,
         )
+
+        # Add attribute as "Source" and "Target" for the trading direction
+        add_trading_direction(data_v3)
         data_v3["Version"] = "V3"
         drop_tx_id_list_v3 = []
     # Step 2: Merge data file
@@ -439,454 +451,515 @@ def make_routes(swaps_merge: pd.DataFrame) -> pd.DataFrame:
     return swaps_tx_route
 
 
-def make_routes_DAG(swaps_merge: pd.DataFrame) -> pd.DataFrame:
+def _error_route(p_tx_index) -> dict:
     """
-    Computes transaction routes efficiently using a graph-based approach.
-    Nodes in the graph are individual swaps.
+    Return the route record for a parent transaction that can not be sorted
     """
 
-    processed_routes = []
-    unique_parent_tx_ids = swaps_merge.index.get_level_values(0).unique()
+    return {
+        "id": p_tx_index,
+        "route": "Error",
+        "ultimate_source": "Error",
+        "ultimate_target": "Error",
+        "intermediary": "Error",
+        "pair": "Error",
+        "pair_str": "Error",
+        "volume_usd": 0,
+        "chain_length": 0,
+    }
 
-    for p_tx_index in unique_parent_tx_ids:
-        parent_tx_df = swaps_merge.loc[p_tx_index]
 
-        # If only one sub-transaction, it's a direct swap (or part of a larger tx if index is just pool)
-        # To be consistent with multi-hop, we'll process it to get the route list
-        # If parent_tx_df is a Series (single row), convert to DataFrame
-        if isinstance(parent_tx_df, pd.Series):
-            parent_tx_df = parent_tx_df.to_frame().T
-            # Need to restore the original index name if it was lost
-            parent_tx_df.index.name = (
-                swaps_merge.index.names[1] if len(swaps_merge.index.names) > 1 else None
-            )
-
-        # Convert sub-swaps to list of dicts for easier processing
-        # Add an original_id to map back if needed, or use list index
-        sub_swaps_records = []
-        for i, (idx, row) in enumerate(parent_tx_df.iterrows()):
-            record = row.to_dict()
-            record["original_swap_id"] = i  # Using list index as id
-            sub_swaps_records.append(record)
-
-        num_swaps = len(sub_swaps_records)
-
-        if num_swaps == 0:
-            processed_routes.append(
-                {
-                    "id": p_tx_index,
-                    "route": "Error",
-                    "ultimate_source": "Error",
-                    "ultimate_target": "Error",
-                    "intermediary": "Error",
-                    "pair": "Error",
-                    "pair_str": "Error",
-                    "volume_usd": 0,
-                    "chain_length": 0,
-                    "label": "Error",
-                    "new_list": "Error",
-                }
-            )
-            continue
+def _route_from_swap_graph(p_tx_index, sub_swaps_records: list[dict]) -> dict:
+    """
+    Reconstruct the route of one multi-hop parent transaction by walking the
+    graph whose nodes are its individual swaps
+    """
 
-        # --- Handle single swap transaction ---
-        if num_swaps == 1:
-            s = sub_swaps_records[0]
-            route_list = [s["Source"], s["Target"]]
-            avg_volume = s["amountUSD"]
-            processed_routes.append(
-                {
-                    "id": p_tx_index,
-                    "route": route_list,
-                    "ultimate_source": route_list[0],
-                    "ultimate_target": route_list[-1],
-                    "intermediary": [],
-                    "pair": [route_list[0], route_list[-1]],
-                    "pair_str": str([route_list[0], route_list[-1]]),
-                    "volume_usd": avg_volume,
-                    "chain_length": len(route_list),
-                }
-            )
-            continue
+    num_swaps = len(sub_swaps_records)
 
-        # --- Graph-based approach for multi-swap transactions ---
-        adj = [[] for _ in range(num_swaps)]
-        in_degree = [0] * num_swaps
-        tolerance = 1e-9  # For float comparisons of volumes
-
-        # 1. Build the Swap Graph
-        for i in range(num_swaps):
-            for j in range(num_swaps):
-                if i == j:
-                    continue
-
-                s_i = sub_swaps_records[i]
-                s_j = sub_swaps_records[j]
-
-                # Check for connection: s_i -> s_j
-                # Target of s_i must be Source of s_j
-                # Pool_In_Volume of s_i (what s_i outputs to user/next step)
-                # must match Pool_Out_Volume of s_j (what s_j takes as input from user/previous step)
-                # The definition of Pool_In_Volume and Pool_Out_Volume implies one is positive and one negative for a link.
-                if (
-                    str(s_i["Target"]) == str(s_j["Source"])
-                    and abs(
-                        float(s_i["Pool_In_Volume"]) + float(s_j["Pool_Out_Volume"])
-                    )
-                    < tolerance
-                ):
-                    adj[i].append(j)
-                    in_degree[j] += 1
+    adj = [[] for _ in range(num_swaps)]
+    in_degree = [0] * num_swaps
+    tolerance = 1e-9  # For float comparisons of volumes
 
-        # 2. Find the Start of the Route(s)
-        start_nodes_indices = [i for i, degree in enumerate(in_degree) if degree == 0]
+    # 1. Build the Swap Graph
+    for i in range(num_swaps):
+        for j in range(num_swaps):
+            if i == j:
+                continue
 
-        route_indices = []
-        error_occurred = False
+            s_i = sub_swaps_records[i]
+            s_j = sub_swaps_records[j]
 
-        if not start_nodes_indices:
-            # print(f"Error: No start node (cycle or disjoint) for transaction {p_tx_index}")
+            # Check for connection: s_i -> s_j
+            # Target of s_i must be Source of s_j
+            # Pool_In_Volume of s_i (what s_i outputs to user/next step)
+            # must match Pool_Out_Volume of s_j (what s_j takes as input from user/previous step)
+            # The definition of Pool_In_Volume and Pool_Out_Volume implies one is positive and one negative for a link.
+            if (
+                str(s_i["Target"]) == str(s_j["Source"])
+                and abs(float(s_i["Pool_In_Volume"]) + float(s_j["Pool_Out_Volume"]))
+                < tolerance
+            ):
+                adj[i].append(j)
+                in_degree[j] += 1
+
+    # 2. Find the Start of the Route(s)
+    start_nodes_indices = [i for i, degree in enumerate(in_degree) if degree == 0]
+
+    route_indices = []
+    error_occurred = False
+
+    if not start_nodes_indices:
+        # print(f"Error: No start node (cycle or disjoint) for transaction {p_tx_index}")
+        error_occurred = True
+    elif len(start_nodes_indices) > 1:
+        # This implies multiple independent chains or a complex structure not forming a single path.
+        # The original code implicitly tries to form one chain.
+        # For simplicity, we can try to process the first one, or mark as error/complex.
+        # print(f"Warning: Multiple start nodes for transaction {p_tx_index}. Attempting to find longest chain or first valid.")
+
+        # Attempt to find the longest valid chain starting from any of the start nodes
+        best_route_indices = []
+        for start_node_idx_candidate in start_nodes_indices:
+            q = deque(
+                [(start_node_idx_candidate, [start_node_idx_candidate])]
+            )  # (current_node, path_so_far)
+
+            temp_longest_path = [start_node_idx_candidate]
+
+            while q:
+                curr, path = q.popleft()
+
+                if len(path) > len(temp_longest_path):
+                    temp_longest_path = list(path)
+
+                for neighbor_idx in adj[curr]:
+                    if neighbor_idx not in path:  # Avoid simple cycles in path
+                        new_path = list(path)  # Make a copy
+                        new_path.append(neighbor_idx)
+                        q.append((neighbor_idx, new_path))
+
+            if len(temp_longest_path) > len(best_route_indices):
+                best_route_indices = temp_longest_path
+
+        if len(best_route_indices) == num_swaps:  # Found a path covering all swaps
+            route_indices = best_route_indices
+        elif best_route_indices:  # Partial path, might be an error or complex structure
+            # print(f"Warning: Could only form partial chain of length {len(best_route_indices)} for {p_tx_index}")
+            route_indices = best_route_indices  # Or mark as error
+            if (
+                len(route_indices) != num_swaps
+            ):  # If not all swaps are covered, it's an error for simple chain assumption
+                error_occurred = True
+        else:  # No valid chain found
             error_occurred = True
-        elif len(start_nodes_indices) > 1:
-            # This implies multiple independent chains or a complex structure not forming a single path.
-            # The original code implicitly tries to form one chain.
-            # For simplicity, we can try to process the first one, or mark as error/complex.
-            # print(f"Warning: Multiple start nodes for transaction {p_tx_index}. Attempting to find longest chain or first valid.")
-
-            # Attempt to find the longest valid chain starting from any of the start nodes
-            best_route_indices = []
-            for start_node_idx_candidate in start_nodes_indices:
-                current_path = []
-                q = deque(
-                    [(start_node_idx_candidate, [start_node_idx_candidate])]
-                )  # (current_node, path_so_far)
-
-                temp_longest_path = [start_node_idx_candidate]
-
-                while q:
-                    curr, path = q.popleft()
-
-                    if len(path) > len(temp_longest_path):
-                        temp_longest_path = list(path)
-
-                    found_next = False
-                    for neighbor_idx in adj[curr]:
-                        if neighbor_idx not in path:  # Avoid simple cycles in path
-                            new_path = list(path)  # Make a copy
-                            new_path.append(neighbor_idx)
-                            q.append((neighbor_idx, new_path))
-                            found_next = True
-
-                if len(temp_longest_path) > len(best_route_indices):
-                    best_route_indices = temp_longest_path
-
-            if len(best_route_indices) == num_swaps:  # Found a path covering all swaps
-                route_indices = best_route_indices
-            elif (
-                best_route_indices
-            ):  # Partial path, might be an error or complex structure
-                # print(f"Warning: Could only form partial chain of length {len(best_route_indices)} for {p_tx_index}")
-                route_indices = best_route_indices  # Or mark as error
-                if (
-                    len(route_indices) != num_swaps
-                ):  # If not all swaps are covered, it's an error for simple chain assumption
-                    error_occurred = True
-            else:  # No valid chain found
+
+    else:  # Exactly one start node
+        start_node_idx = start_nodes_indices[0]
+
+        # 3. Reconstruct the Route (Path Traversal)
+        # We expect a simple path covering all N nodes for a typical multi-hop.
+        # This traversal assumes a mostly linear chain from the single start_node.
+        current_swap_idx = start_node_idx
+        route_indices.append(current_swap_idx)
+
+        visited_in_current_path = {current_swap_idx}
+
+        while len(route_indices) < num_swaps:
+            possible_next_swaps = [
+                n for n in adj[current_swap_idx] if n not in visited_in_current_path
+            ]
+
+            if not possible_next_swaps:
+                # print(f"Error: Path broken at swap {current_swap_idx} for transaction {p_tx_index}")
                 error_occurred = True
+                break
 
-        else:  # Exactly one start node
-            start_node_idx = start_nodes_indices[0]
+            if len(possible_next_swaps) > 1:
+                # Branching path. The original algorithm implicitly picked one.
+                # For now, let's consider this an error if we expect a single chain covering all swaps
+                error_occurred = True
+                break
 
-            # 3. Reconstruct the Route (Path Traversal)
-            # We expect a simple path covering all N nodes for a typical multi-hop.
-            # This traversal assumes a mostly linear chain from the single start_node.
-            current_swap_idx = start_node_idx
-            route_indices.append(current_swap_idx)
+            next_swap_idx = possible_next_swaps[0]
 
-            visited_in_current_path = {current_swap_idx}
+            route_indices.append(next_swap_idx)
+            visited_in_current_path.add(next_swap_idx)
+            current_swap_idx = next_swap_idx
 
-            while len(route_indices) < num_swaps:
-                possible_next_swaps = [
-                    n for n in adj[current_swap_idx] if n not in visited_in_current_path
-                ]
+        if (
+            len(route_indices) != num_swaps and not error_occurred
+        ):  # Path didn't cover all swaps
+            error_occurred = True
 
-                if not possible_next_swaps:
-                    # print(f"Error: Path broken at swap {current_swap_idx} for transaction {p_tx_index}")
-                    error_occurred = True
-                    break
+    # 4. Format Output
+    if error_occurred or len(route_indices) != num_swaps:
+        return _error_route(p_tx_index)
 
-                if len(possible_next_swaps) > 1:
-                    # Branching path. The original algorithm implicitly picked one.
-                    # Here, we can pick the first, or implement more complex logic if needed.
-                    # print(f"Warning: Branching path at swap {current_swap_idx} for transaction {p_tx_index}. Taking first branch.")
-                    # For now, let's consider this an error if we expect a single chain covering all swaps
-                    error_occurred = True
-                    break
+    final_ordered_swaps = [sub_swaps_records[i] for i in route_indices]
 
-                next_swap_idx = possible_next_swaps[0]
+    route_list_tokens = [s["Source"] for s in final_ordered_swaps] + [
+        final_ordered_swaps[-1]["Target"]
+    ]
+    sum_volume_usd = sum(s["amountUSD"] for s in final_ordered_swaps)
+    avg_volume_usd = sum_volume_usd / num_swaps if num_swaps > 0 else 0
 
-                route_indices.append(next_swap_idx)
-                visited_in_current_path.add(next_swap_idx)
-                current_swap_idx = next_swap_idx
+    intermediary_tokens = route_list_tokens[1:-1] if len(route_list_tokens) > 2 else []
 
-            if (
-                len(route_indices) != num_swaps and not error_occurred
-            ):  # Path didn't cover all swaps
-                # print(f"Error: Reconstructed path length {len(route_indices)} does not match num_swaps {num_swaps} for {p_tx_index}")
-                error_occurred = True
+    return {
+        "id": p_tx_index,
+        "route": route_list_tokens,
+        "ultimate_source": route_list_tokens[0],
+        "ultimate_target": route_list_tokens[-1],
+        "intermediary": intermediary_tokens,
+        "pair": [route_list_tokens[0], route_list_tokens[-1]],
+        "pair_str": str([route_list_tokens[0], route_list_tokens[-1]]),
+        "volume_usd": avg_volume_usd,
+        "chain_length": len(route_list_tokens),
+    }
 
-        # 4. Format Output
-        if not error_occurred and len(route_indices) == num_swaps:
-            final_ordered_swaps = [sub_swaps_records[i] for i in route_indices]
 
-            route_list_tokens = [s["Source"] for s in final_ordered_swaps] + [
-                final_ordered_swaps[-1]["Target"]
-            ]
-            sum_volume_usd = sum(s["amountUSD"] for s in final_ordered_swaps)
-            avg_volume_usd = sum_volume_usd / num_swaps if num_swaps > 0 else 0
+def _label_route(route_data: list) -> tuple:
+    """
+    Label a route containing duplicate tokens as "loop" or "spoon" and return
+    the label together with its segmented route
+    """
 
-            intermediary_tokens = (
-                route_list_tokens[1:-1] if len(route_list_tokens) > 2 else []
-            )
+    # Label the loop transactions
+    label = "loop"
 
-            processed_routes.append(
-                {
-                    "id": p_tx_index,
-                    "route": route_list_tokens,
-                    "ultimate_source": route_list_tokens[0],
-                    "ultimate_target": route_list_tokens[-1],
-                    "intermediary": intermediary_tokens,
-                    "pair": [route_list_tokens[0], route_list_tokens[-1]],
-                    "pair_str": str([route_list_tokens[0], route_list_tokens[-1]]),
-                    "volume_usd": avg_volume_usd,
-                    "chain_length": len(route_list_tokens),
-                }
-            )
-        else:
-            # Error occurred or path is incomplete
-            processed_routes.append(
-                {
-                    "id": p_tx_index,
-                    "route": "Error",
-                    "ultimate_source": "Error",
-                    "ultimate_target": "Error",
-                    "intermediary": "Error",
-                    "pair": "Error",
-                    "pair_str": "Error",
-                    "volume_usd": 0,
-                    "chain_length": 0,
-                }
+    # Identify "SPOON"
+    duplicate_counter = Counter(route_data)
+    # Elements that appear more than once and could form the core of a loop
+    loop_core_candidates = {k: v for k, v in duplicate_counter.items() if v > 1}
+
+    parsed_spoon_list = []
+    temp_route = list(route_data)  # Make a mutable copy
+
+    # This logic tries to find the first occurring loop and segment it.
+    # More complex overlapping loops might need more sophisticated parsing.
+    processed_loop_segment = False
+    for loop_node_candidate in route_data:  # Iterate in order of appearance
+        if loop_node_candidate not in loop_core_candidates:
+            continue
+
+        if (
+            loop_core_candidates[loop_node_candidate] < 2
+        ):  # Already processed enough instances
+            continue
+
+        try:
+            first_occurrence = temp_route.index(loop_node_candidate)
+            # Find the next occurrence of this node to form the loop
+            second_occurrence = temp_route.index(
+                loop_node_candidate, first_occurrence + 1
             )
 
-    # Convert list of dicts to DataFrame
-    swaps_tx_route_df = pd.DataFrame(processed_routes)
+            # We found a loop segment
+            # Part before loop
+            if first_occurrence > 0:
+                parsed_spoon_list.append(temp_route[:first_occurrence])
 
-    if swaps_tx_route_df.empty:
-        # Ensure columns exist even if no routes were processed, matching original structure
-        return pd.DataFrame(
-            columns=[
-                "id",
-                "route",
-                "ultimate_source",
-                "ultimate_target",
-                "intermediary",
-                "pair",
-                "pair_str",
-                "volume_usd",
-                "chain_length",
-                "label",
-                "new_list",
-            ]
-        )
+            # The loop itself
+            loop_segment = temp_route[first_occurrence : second_occurrence + 1]
+            parsed_spoon_list.append(loop_segment)
 
-    # Step: make label (loop, spoon, error)
-    swaps_tx_route_df["label"] = 0  # Default label
-    swaps_tx_route_df["new_list"] = ""  # Default
+            # Part after loop
+            remaining_after_loop = temp_route[second_occurrence + 1 :]
+            if remaining_after_loop:
+                parsed_spoon_list.append(remaining_after_loop)
 
-    for index, tx_info in swaps_tx_route_df.iterrows():
-        route_data = tx_info["route"]
+            processed_loop_segment = True
+            break  # Processed the first significant loop for spoon structure
 
-        if route_data == "Error":
-            swaps_tx_route_df.loc[index, "label"] = "Error"
-            swaps_tx_route_df.loc[index, "new_list"] = "Error"
+        except ValueError:  # Node not found again, shouldn't happen if count > 1
             continue
 
-        # Label the loop transactions
-        if len(route_data) - len(set(route_data)) != 0:  # Duplicate element exists
-            swaps_tx_route_df.loc[index, "label"] = "loop"
-
-            # Identify "SPOON"
-            duplicate_counter = Counter(route_data)
-            # Elements that appear more than once and could form the core of a loop
-            loop_core_candidates = {k: v for k, v in duplicate_counter.items() if v > 1}
-
-            parsed_spoon_list = []
-            temp_route = list(route_data)  # Make a mutable copy
-
-            # This logic tries to find the first occurring loop and segment it.
-            # More complex overlapping loops might need more sophisticated parsing.
-            processed_loop_segment = False
-            for loop_node_candidate in route_data:  # Iterate in order of appearance
-                if loop_node_candidate not in loop_core_candidates:
-                    continue
-
-                if (
-                    loop_core_candidates[loop_node_candidate] < 2
-                ):  # Already processed enough instances
-                    continue
-
-                try:
-                    first_occurrence = temp_route.index(loop_node_candidate)
-                    # Find the next occurrence of this node to form the loop
-                    second_occurrence = temp_route.index(
-                        loop_node_candidate, first_occurrence + 1
-                    )
-
-                    # We found a loop segment
-                    # Part before loop
-                    if first_occurrence > 0:
-                        parsed_spoon_list.append(temp_route[:first_occurrence])
-
-                    # The loop itself
-                    loop_segment = temp_route[first_occurrence : second_occurrence + 1]
-                    parsed_spoon_list.append(loop_segment)
-
-                    # Part after loop
-                    remaining_after_loop = temp_route[second_occurrence + 1 :]
-                    if remaining_after_loop:
-                        parsed_spoon_list.append(remaining_after_loop)
-
-                    processed_loop_segment = True
-                    break  # Processed the first significant loop for spoon structure
-
-                except (
-                    ValueError
-                ):  # Node not found again, shouldn't happen if count > 1
-                    continue
-
-            if processed_loop_segment and len(parsed_spoon_list) > 1:
-                # Check if there's content before or after the identified primary loop segment
-                is_spoon = False
-                if len(parsed_spoon_list[0]) > 0 and isinstance(
-                    parsed_spoon_list[0][0], str
-                ):  # Content before loop
-                    is_spoon = True
-                if (
-                    len(parsed_spoon_list) > 1
-                    and isinstance(parsed_spoon_list[-1], list)
-                    and len(parsed_spoon_list[-1]) > 0
-                ):  # Content after loop
-                    is_spoon = True
-
-                # A simple check: if the parsed list has more than one segment (the loop itself, and something before/after)
-                if len(parsed_spoon_list) > 1 and any(
-                    isinstance(seg, list) and len(seg) > 0
-                    for seg_idx, seg in enumerate(parsed_spoon_list)
-                    if seg != loop_segment
-                ):
-                    is_spoon = True
+    if processed_loop_segment and len(parsed_spoon_list) > 1:
+        # Check if there's content before or after the identified primary loop segment
+        is_spoon = False
+        if len(parsed_spoon_list[0]) > 0 and isinstance(
+            parsed_spoon_list[0][0], str
+        ):  # Content before loop
+            is_spoon = True
+        if (
+            len(parsed_spoon_list) > 1
+            and isinstance(parsed_spoon_list[-1], list)
+            and len(parsed_spoon_list[-1]) > 0
+        ):  # Content after loop
+            is_spoon = True
 
-                if is_spoon:
-                    swaps_tx_route_df.loc[index, "label"] = "spoon"
-                    swaps_tx_route_df.loc[index, "new_list"] = str(parsed_spoon_list)
-                else:  # It's a loop, but not clearly a spoon by this logic
-                    swaps_tx_route_df.loc[index, "new_list"] = str(
-                        [route_data]
-                    )  # Store original loop
+        # A simple check: if the parsed list has more than one segment (the loop itself, and something before/after)
+        if len(parsed_spoon_list) > 1 and any(
+            isinstance(seg, list) and len(seg) > 0
+            for seg in parsed_spoon_list
+            if seg != loop_segment
+        ):
+            is_spoon = True
 
-            elif (
-                swaps_tx_route_df.loc[index, "label"] == "loop"
-            ):  # It's a loop, but not parsed as spoon
-                swaps_tx_route_df.loc[index, "new_list"] = str([route_data])
+        if is_spoon:
+            return "spoon", str(parsed_spoon_list)
 
-    return swaps_tx_route_df
+    # It's a loop, but not parsed as spoon: store original loop
+    return label, str([route_data])
 
 
-def compute_betweenness_count(swaps_tx_route: pd.DataFrame) -> pd.DataFrame:
+def _make_route_frame(
+    tx_codes: np.ndarray, tx_ids: np.ndarray, routes: list, volume_usd: np.ndarray
+) -> pd.DataFrame:
     """
-    Compute the betweenness centrality (count based) and return the results as dataframe
+    Assemble the route records of sorted parent transactions into a dataframe
+    indexed by the parent transaction position
     """
 
-    # Exclude "LOOP" AND "SPOON"
-    count_based_set = swaps_tx_route[swaps_tx_route["label"] == 0].copy()
+    return pd.DataFrame(
+        {
+            "id": list(tx_ids),
+            "route": routes,
+            "ultimate_source": [route[0] for route in routes],
+            "ultimate_target": [route[-1] for route in routes],
+            "intermediary": [route[1:-1] for route in routes],
+            "pair": [[route[0], route[-1]] for route in routes],
+            "pair_str": [str([route[0], route[-1]]) for route in routes],
+            "volume_usd": list(volume_usd),
+            "chain_length": [len(route) for route in routes],
+        },
+        index=tx_codes,
+        columns=ROUTE_COLUMNS,
+    )
 
-    # Exclude Error
-    count_based_set = count_based_set[count_based_set["intermediary"] != "Error"]
 
-    node_set_count = pd.concat(
-        [count_based_set["ultimate_source"], count_based_set["ultimate_target"]],
-        ignore_index=True,
-    ).unique()
+def make_routes_DAG(swaps_merge: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes transaction routes efficiently using a graph-based approach.
+    Nodes in the graph are individual swaps.
 
-    # Initialize the betweenness centrality dataframe
-    betweenness_score_count = pd.DataFrame(
-        {"node": node_set_count, "betweenness_centrality_count": 0}
+    All swaps are grouped by parent transaction once, keeping the order of the
+    sub-transactions. Single swaps and two-hop chains are linked with array
+    operations; longer chains fall back to the per-transaction graph walk.
+    """
+
+    if swaps_merge.empty:
+        # Ensure columns exist even if no routes were processed, matching original structure
+        return pd.DataFrame(columns=ROUTE_COLUMNS + ["label", "new_list"])
+
+    # Step 1: Sort the swaps by parent transaction (stable within each parent)
+    tx_codes, tx_ids = pd.factorize(
+        swaps_merge.index.get_level_values(0), use_na_sentinel=False
+    )
+    order = np.argsort(tx_codes, kind="stable")
+
+    source = swaps_merge["Source"].to_numpy()[order]
+    target = swaps_merge["Target"].to_numpy()[order]
+    source_str = swaps_merge["Source"].astype(str).to_numpy()[order]
+    target_str = swaps_merge["Target"].astype(str).to_numpy()[order]
+    pool_in = swaps_merge["Pool_In_Volume"].astype(float).to_numpy()[order]
+    pool_out = swaps_merge["Pool_Out_Volume"].astype(float).to_numpy()[order]
+    volume = swaps_merge["amountUSD"].to_numpy()[order]
+
+    sizes = np.bincount(tx_codes, minlength=len(tx_ids))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    tx_ids = np.asarray(tx_ids, dtype=object)
+
+    route_parts = []
+
+    # Step 2: single swap transactions
+    single_tx = np.flatnonzero(sizes == 1)
+    first = starts[single_tx]
+    route_parts.append(
+        _make_route_frame(
+            single_tx,
+            tx_ids[single_tx],
+            [[s, t] for s, t in zip(source[first], target[first])],
+            volume[first],
+        )
     )
 
-    # Calculate the betweenness centrality
-    for node in node_set_count:
-        # Calculate the betweenness centrality
-        denominator_df = count_based_set.loc[
-            (count_based_set["ultimate_source"] != node)
-            & (count_based_set["ultimate_target"] != node)
+    # Step 3: two-hop transactions, linked in either direction
+    double_tx = np.flatnonzero(sizes == 2)
+    first = starts[double_tx]
+    second = first + 1
+    tolerance = 1e-9  # For float comparisons of volumes
+    forward = (target_str[first] == source_str[second]) & (
+        np.abs(pool_in[first] + pool_out[second]) < tolerance
+    )
+    backward = (target_str[second] == source_str[first]) & (
+        np.abs(pool_in[second] + pool_out[first]) < tolerance
+    )
+    # A chain needs exactly one link; none or both can not be sorted
+    linked = forward ^ backward
+    head = np.where(forward, first, second)[linked]
+    tail = np.where(forward, second, first)[linked]
+    route_parts.append(
+        _make_route_frame(
+            double_tx[linked],
+            tx_ids[double_tx[linked]],
+            [
+                [s, m, t]
+                for s, m, t in zip(source[head], source[tail], target[tail])
+            ],
+            (0 + volume[head] + volume[tail]) / 2,
+        )
+    )
+
+    # Step 4: multi-hop outliers via the graph walk
+    multi_tx = np.flatnonzero(sizes > 2)
+    multi_routes = []
+    for tx_code in multi_tx:
+        rows = range(starts[tx_code], starts[tx_code] + sizes[tx_code])
+        sub_swaps_records = [
+            {
+                "Source": source[i],
+                "Target": target[i],
+                "Pool_In_Volume": pool_in[i],
+                "Pool_Out_Volume": pool_out[i],
+                "amountUSD": volume[i],
+            }
+            for i in rows
         ]
+        multi_routes.append(_route_from_swap_graph(tx_ids[tx_code], sub_swaps_records))
+    route_parts.append(pd.DataFrame(multi_routes, index=multi_tx))
 
-        denominator = denominator_df.shape[0]
-        numerator = denominator_df.loc[
-            [node in inter_list for inter_list in denominator_df["intermediary"]]
-        ].shape[0]
+    error_tx = double_tx[~linked]
+    route_parts.append(
+        pd.DataFrame([_error_route(tx_ids[i]) for i in error_tx], index=error_tx)
+    )
 
-        betweenness_score_count.loc[
-            betweenness_score_count["node"] == node, "betweenness_centrality_count"
-        ] = (numerator / denominator)
+    swaps_tx_route_df = (
+        pd.concat([part for part in route_parts if not part.empty])
+        .sort_index()
+        .reset_index(drop=True)
+    )
 
-    return betweenness_score_count
+    # Step 5: make label (loop, spoon, error)
+    labels = [0] * len(swaps_tx_route_df)
+    new_lists = [""] * len(swaps_tx_route_df)
+    for index, route_data in enumerate(swaps_tx_route_df["route"]):
+        if route_data == "Error":
+            labels[index] = "Error"
+            new_lists[index] = "Error"
+        elif len(route_data) - len(set(route_data)) != 0:  # Duplicate element exists
+            labels[index], new_lists[index] = _label_route(route_data)
 
+    swaps_tx_route_df["label"] = labels
+    swaps_tx_route_df["new_list"] = new_lists
 
-def compute_betweenness_volume(swaps_tx_route: pd.DataFrame) -> pd.DataFrame:
+    return swaps_tx_route_df
+
+
+def compute_betweenness(swaps_tx_route: pd.DataFrame) -> pd.DataFrame:
     """
-    Compute the betweenness centrality (volume weighted) and return the results as dataframe
+    Compute the count based and volume weighted betweenness centrality of all
+    nodes in one pass and return the results as dataframe. Both are NaN for a
+    node that starts or ends every route.
     """
+
     # Exclude "LOOP" AND "SPOON"
-    volume_based_set = swaps_tx_route[swaps_tx_route["label"] == 0].copy()
+    route_set = swaps_tx_route[swaps_tx_route["label"] == 0]
 
     # Exclude Error
-    volume_based_set = volume_based_set[volume_based_set["intermediary"] != "Error"]
+    route_set = route_set[route_set["intermediary"] != "Error"]
 
-    node_set_count = pd.concat(
-        [volume_based_set["ultimate_source"], volume_based_set["ultimate_target"]],
+    node_set = pd.concat(
+        [route_set["ultimate_source"], route_set["ultimate_target"]],
         ignore_index=True,
     ).unique()
+    node_index = pd.Index(node_set)
+    n_routes, n_nodes = len(route_set), len(node_set)
+    route_rows = np.arange(n_routes)
+
+    # Incidence matrix (routes x nodes) of the intermediaries in each route
+    intermediary_count = [len(inter_list) for inter_list in route_set["intermediary"]]
+    intermediary_codes = node_index.get_indexer(
+        [node for inter_list in route_set["intermediary"] for node in inter_list]
+    )
+    intermediary_rows = np.repeat(route_rows, intermediary_count)
+    in_node_set = intermediary_codes >= 0
+    intermediary_incidence = sparse.csr_matrix(
+        (
+            np.ones(in_node_set.sum()),
+            (intermediary_rows[in_node_set], intermediary_codes[in_node_set]),
+        ),
+        shape=(n_routes, n_nodes),
+    )
 
-    # Initialize the betweenness centrality dataframe
-    betweenness_score_volume = pd.DataFrame(
-        {"node": node_set_count, "betweenness_centrality_volume": 0}
+    # Mask (routes x nodes) of the ultimate source or target of each route
+    endpoint_mask = sparse.csr_matrix(
+        (
+            np.ones(2 * n_routes),
+            (
+                np.concatenate([route_rows, route_rows]),
+                np.concatenate(
+                    [
+                        node_index.get_indexer(route_set["ultimate_source"]),
+                        node_index.get_indexer(route_set["ultimate_target"]),
+                    ]
+                ),
+            ),
+        ),
+        shape=(n_routes, n_nodes),
     )
 
-    # Calculate the betweenness centrality
-    for node in node_set_count:
-        # Calculate the betweenness centrality
-        denominator_df = volume_based_set.loc[
-            (volume_based_set["ultimate_source"] != node)
-            & (volume_based_set["ultimate_target"] != node)
+    # Duplicate entries are summed up on construction, so binarize both
+    intermediary_incidence.data[:] = 1
+    endpoint_mask.data[:] = 1
+
+    # One weight column per variant: count and volume
+    weights = np.column_stack(
+        [
+            np.ones(n_routes),
+            np.nan_to_num(route_set["volume_usd"].astype(float).to_numpy()),
         ]
+    )
 
-        denominator = denominator_df["volume_usd"].apply(float).sum()
+    # Only routes neither starting nor ending at the node are considered
+    total = weights.sum(axis=0)
+    denominator = total - endpoint_mask.T @ weights
+    numerator = (
+        intermediary_incidence.T @ weights
+        - intermediary_incidence.multiply(endpoint_mask).T @ weights
+    )
 
-        numerator = (
-            denominator_df.loc[
-                [node in inter_list for inter_list in denominator_df["intermediary"]],
-                "volume_usd",
-            ]
-            .apply(float)
-            .sum()
-        )
+    # For a node on (almost) every route, the differences are left at the
+    # rounding error of the total, so sum its other routes directly instead
+    close_to_total = denominator <= n_routes * np.finfo(float).eps * total
+    endpoint_columns = endpoint_mask.tocsc()
+    intermediary_columns = intermediary_incidence.tocsc()
+    for node in np.flatnonzero(close_to_total.any(axis=1)):
+        other_routes = endpoint_columns[:, node].toarray().ravel() == 0
+        denominator[node] = weights[other_routes].sum(axis=0)
+        numerator[node] = weights[
+            other_routes & (intermediary_columns[:, node].toarray().ravel() != 0)
+        ].sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        betweenness = numerator / denominator
+
+    return pd.DataFrame(
+        {
+            "node": node_set,
+            "betweenness_centrality_count": betweenness[:, 0],
+            "betweenness_centrality_volume": betweenness[:, 1],
+        }
+    )
+
+
+def compute_betweenness_count(swaps_tx_route: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the betweenness centrality (count based) and return the results as dataframe
+    """
 
-        betweenness_score_volume.loc[
-            betweenness_score_volume["node"] == node, "betweenness_centrality_volume"
-        ] = (numerator / denominator)
+    return compute_betweenness(swaps_tx_route)[["node", "betweenness_centrality_count"]]
 
-    return betweenness_score_volume
+
+def compute_betweenness_volume(swaps_tx_route: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the betweenness centrality (volume weighted) and return the results as dataframe
+    """
+
+    return compute_betweenness(swaps_tx_route)[
+        ["node", "betweenness_centrality_volume"]
+    ]
 
 
 def get_betweenness_centrality(
@@ -896,45 +969,21 @@ def get_betweenness_centrality(
     Merge data, make routes, and compute betweenness centrality
     """
 
-    # Initialize configuration
-    config = Config()
+    output_files = get_output_files(date_label, uniswap_version)
 
     swaps_merge = manipulate_data(date_label, top_list_label, uniswap_version)
     swaps_tx_route = make_routes_DAG(swaps_merge)
 
     # Store to file
-    tx_route_file_name = path.join(
-        config["dev"]["config"]["data"]["BETWEENNESS_DATA_PATH"],
-        "swap_route/DAG_swaps_tx_route_" + uniswap_version + "_" + date_label + ".csv",
-    )
-    # Write dataframe to csv
-    swaps_tx_route.to_csv(tx_route_file_name)
-
-    betweenness_score_count = compute_betweenness_count(swaps_tx_route)
-    betweenness_score_volume = compute_betweenness_volume(swaps_tx_route)
+    atomic_to_csv(swaps_tx_route, output_files["swap_route"])
 
-    # compare_table = betweenness_score_count.sort_values(
-    #     by="betweenness_centrality_count", ascending=False
-    # ).join(betweenness_score_volume)
-
-    compare_table = betweenness_score_count.merge(
-        betweenness_score_volume, on="node", how="left", validate="1:1"
-    )
+    compare_table = compute_betweenness(swaps_tx_route)
     compare_table.sort_values(
         by="betweenness_centrality_count", ascending=False, inplace=True
     )
 
     # Store to file
-    betweenness_file_name = path.join(
-        config["dev"]["config"]["data"]["BETWEENNESS_DATA_PATH"],
-        "betweenness/betweenness_centrality_"
-        + uniswap_version
-        + "_"
-        + date_label
-        + ".csv",
-    )
-    # Write dataframe to csv
-    compare_table.to_csv(betweenness_file_name)
+    atomic_to_csv(compare_table, output_files["betweenness"])
 
 
 # if __name__ == "__main__":
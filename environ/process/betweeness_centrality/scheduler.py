@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Resumable, incremental day-level scheduler for the betweenness centrality
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import cpu_count
+from os import path
+from typing import Iterator
+
+from tqdm import tqdm
+
+from environ.process.betweeness_centrality.betweeness_scripts import (
+    get_betweenness_centrality,
+    get_input_files,
+    get_output_files,
+)
+from environ.utils.atomic_io import atomic_write
+from environ.utils.config_parser import Config
+from environ.utils.info_logger import print_info_log
+
+# Peak memory of one day relative to the size of its input files
+MEMORY_PER_INPUT_BYTE = 8
+MIN_MEMORY_PER_WORKER = 512 * 1024**2
+
+# Seconds between two saves of the run manifest while days finish
+MANIFEST_SAVE_INTERVAL = 30
+
+
+def fingerprint_day(date_label: str, top_list_label: str, uniswap_version: str) -> str:
+    """
+    Fingerprint the input swap files and the top 50 list of one day by their
+    path, size and modification time
+    """
+
+    md5sum = hashlib.md5()
+    md5sum.update(f"{uniswap_version}|{top_list_label}|{date_label}".encode())
+    for file_name in sorted(
+        get_input_files(date_label, top_list_label, uniswap_version).values()
+    ):
+        try:
+            stats = os.stat(file_name)
+            md5sum.update(f"|{file_name}|{stats.st_size}|{stats.st_mtime_ns}".encode())
+        except FileNotFoundError:
+            md5sum.update(f"|{file_name}|missing".encode())
+    return md5sum.hexdigest()
+
+
+def get_manifest_file(uniswap_version: str) -> str:
+    """
+    Return the path of the run manifest of a uniswap version
+    """
+
+    # Initialize configuration
+    config = Config()
+
+    return path.join(
+        config["dev"]["config"]["data"]["BETWEENNESS_DATA_PATH"],
+        "run_manifest_" + uniswap_version + ".json",
+    )
+
+
+def load_manifest(uniswap_version: str) -> dict:
+    """
+    Load the run manifest, keyed by date label
+    """
+
+    try:
+        with open(get_manifest_file(uniswap_version), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest: dict, uniswap_version: str) -> None:
+    """
+    Save the run manifest atomically
+    """
+
+    with atomic_write(get_manifest_file(uniswap_version), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def is_day_current(entry: dict | None, fingerprint: str, output_files: dict) -> bool:
+    """
+    Check whether the outputs of a day were produced from its current inputs
+    """
+
+    return (
+        entry is not None
+        and entry.get("status") == "done"
+        and entry.get("fingerprint") == fingerprint
+        and all(path.exists(file_name) for file_name in output_files.values())
+    )
+
+
+def get_pool_size(input_bytes: int, processes: int | None = None) -> int:
+    """
+    Size the worker pool by the available cores and memory
+    """
+
+    if processes is not None:
+        return max(1, processes)
+
+    memory_per_worker = max(MEMORY_PER_INPUT_BYTE * input_bytes, MIN_MEMORY_PER_WORKER)
+    available_memory = _get_available_memory()
+    if available_memory is None:
+        return cpu_count()
+    return max(1, min(cpu_count(), available_memory // memory_per_worker))
+
+
+def _get_available_memory() -> int | None:
+    """
+    Return the available physical memory in bytes, if it can be determined
+    """
+
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (FileNotFoundError, ValueError):
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _run_day(task: tuple[str, str, str]) -> dict:
+    """
+    Compute one day in a worker, isolating its failure from the other days
+    """
+
+    date_label, top_list_label, uniswap_version = task
+    start = time.time()
+    try:
+        get_betweenness_centrality(date_label, top_list_label, uniswap_version)
+        status, error = "done", None
+    except Exception:  # pylint: disable=broad-except
+        status, error = "failed", traceback.format_exc()
+
+    return {
+        "date_label": date_label,
+        "status": status,
+        "error": error,
+        "elapsed": round(time.time() - start, 3),
+    }
+
+
+def _run_days(tasks: list[tuple[str, str, str]], processes: int) -> Iterator[dict]:
+    """
+    Compute days in a process pool and yield their results as they finish.
+    When a worker dies, e.g. killed out of memory, the pool breaks and its
+    unfinished days are yielded as crashed.
+    """
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {executor.submit(_run_day, task): task for task in tasks}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                yield {
+                    "date_label": futures[future][0],
+                    "status": "crashed",
+                    "error": traceback.format_exc(),
+                    "elapsed": None,
+                }
+
+
+def schedule_betweenness_centrality(
+    days: list[tuple[str, str]],
+    uniswap_version: str,
+    max_retries: int = 2,
+    processes: int | None = None,
+    force: bool = False,
+) -> dict:
+    """
+    Compute the betweenness centrality of the given (date label, top 50 list
+    label) days, skipping the days whose outputs are current, retrying the
+    failed days, including the days of workers that died, and recording a
+    run manifest
+
+    Returns the manifest entries of the scheduled days.
+    """
+
+    manifest = load_manifest(uniswap_version)
+
+    pending = {}
+    input_bytes = 0
+    for date_label, top_list_label in days:
+        fingerprint = fingerprint_day(date_label, top_list_label, uniswap_version)
+        output_files = get_output_files(date_label, uniswap_version)
+        if not force and is_day_current(
+            manifest.get(date_label), fingerprint, output_files
+        ):
+            continue
+
+        pending[date_label] = (top_list_label, fingerprint)
+        for file_name in get_input_files(
+            date_label, top_list_label, uniswap_version
+        ).values():
+            if path.exists(file_name):
+                input_bytes = max(input_bytes, os.path.getsize(file_name))
+
+    print_info_log(
+        f"Betweenness {uniswap_version}: {len(days) - len(pending)} days current, "
+        f"{len(pending)} days to compute",
+        "progress",
+    )
+
+    if pending:
+        n_processes = min(get_pool_size(input_bytes, processes), len(pending))
+        isolate = False
+        saved_at = time.time()
+        try:
+            for attempt in range(1, max_retries + 2):
+                tasks = [
+                    (date_label, top_list_label, uniswap_version)
+                    for date_label, (top_list_label, _) in pending.items()
+                ]
+                # After a worker died, run each day in its own pool, so that
+                # the day killing its worker does not fail the others
+                results = (
+                    (result for task in tasks for result in _run_days([task], 1))
+                    if isolate
+                    else _run_days(tasks, n_processes)
+                )
+                isolate = False
+                for result in tqdm(
+                    results,
+                    total=len(tasks),
+                    desc=f"betweenness {uniswap_version} (attempt {attempt})",
+                ):
+                    date_label = result["date_label"]
+                    top_list_label, fingerprint = pending[date_label]
+                    manifest[date_label] = {
+                        "top_list_label": top_list_label,
+                        "fingerprint": fingerprint,
+                        "status": result["status"],
+                        "error": result["error"],
+                        "attempts": attempt,
+                        "elapsed": result["elapsed"],
+                        "finished_at": datetime.datetime.now().isoformat(
+                            timespec="seconds"
+                        ),
+                    }
+                    if result["status"] == "done":
+                        del pending[date_label]
+                    isolate = isolate or result["status"] == "crashed"
+                    if time.time() - saved_at >= MANIFEST_SAVE_INTERVAL:
+                        save_manifest(manifest, uniswap_version)
+                        saved_at = time.time()
+
+                if not pending:
+                    break
+        finally:
+            save_manifest(manifest, uniswap_version)
+
+    for date_label in pending:
+        print_info_log(
+            f"Betweenness {uniswap_version} failed on {date_label}: "
+            + manifest[date_label]["error"].strip().splitlines()[-1],
+            "error",
+        )
+
+    return {
+        date_label: manifest[date_label]
+        for date_label, _ in days
+        if date_label in manifest
+    }
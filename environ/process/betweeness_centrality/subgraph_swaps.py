@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming reader for the daily Uniswap V3 subgraph swap JSON files
+"""
+
+import json
+from array import array
+from typing import IO, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+# Flattened attributes of the top-level 'token0' and 'token1', which are
+# not kept: the detailed token info comes from the 'pool' object
+SUBGRAPH_SWAP_SKIP = ["token0_id", "token0_symbol", "token1_id", "token1_symbol"]
+
+SUBGRAPH_SWAP_RENAME = {
+    "pool_id": "pool",
+    "pool_token0_decimals": "token0_decimals",
+    "pool_token1_decimals": "token1_decimals",
+    "pool_token0_name": "token0_name",
+    "pool_token1_name": "token1_name",
+    "pool_token0_id": "token0_id",
+    "pool_token1_id": "token1_id",
+    "pool_token0_symbol": "token0_symbol",
+    "pool_token1_symbol": "token1_symbol",
+    "transaction_timestamp": "timestamp",
+    "transaction_id": "transaction",
+    "transaction_blockNumber": "blockNumber",
+}
+
+# Nested objects with a child renamed to the object's own name. A null object
+# stands for missing children rather than a column of its own
+SUBGRAPH_SWAP_NESTED = ["pool", "transaction"]
+
+SUBGRAPH_SWAP_TYPES = {
+    "amount0": "float",
+    "amount1": "float",
+    "amountUSD": "float",
+    "logIndex": "Int64",
+    "tick": "Int64",
+    "blockNumber": "Int64",
+    "timestamp": "Int64",
+}
+
+
+def iter_json_array(f: IO[str], chunk_size: int = 1 << 20) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array one by one, holding at most
+    one chunk of the file and one element in memory
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> None:
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_token() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            fill()
+
+    if next_token() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if next_token() == "]":
+        return
+
+    while True:
+        next_token()
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+            # an element ending at the buffer end may be truncated
+            if end == len(buffer) and not eof:
+                raise json.JSONDecodeError("Truncated element", buffer, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+
+        yield element
+        pos = end
+
+        separator = next_token()
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Unexpected '{separator}' in JSON array")
+
+
+def flatten_record(record: dict, sep: str = "_") -> Iterator[tuple[str, object]]:
+    """
+    Flatten a nested record into (key, value) pairs, in the same key order as
+    ``pd.json_normalize``: nested objects of the top level come last
+    """
+
+    nested = []
+    for key, value in record.items():
+        if isinstance(value, dict):
+            nested.append((str(key), value))
+        else:
+            yield str(key), value
+
+    for prefix, value in nested:
+        yield from _flatten_nested(value, prefix, sep)
+
+
+def _flatten_nested(
+    record: dict, prefix: str, sep: str
+) -> Iterator[tuple[str, object]]:
+    """
+    Flatten a nested object below the top level, keeping its key order
+    """
+
+    for key, value in record.items():
+        new_key = prefix + sep + str(key)
+        if isinstance(value, dict):
+            yield from _flatten_nested(value, new_key, sep)
+        else:
+            yield new_key, value
+
+
+class _ObjectColumn:
+    """
+    Column of untyped values, inferred by pandas as ``pd.json_normalize`` does
+    """
+
+    def __init__(self, n_missing: int) -> None:
+        self.values = [np.nan] * n_missing
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value) -> None:
+        self.values.append(value)
+
+    def append_missing(self) -> None:
+        self.values.append(np.nan)
+
+    def to_series(self) -> pd.Series:
+        return pd.Series(self.values)
+
+
+class _FloatColumn:
+    """
+    Column parsed straight into float64
+    """
+
+    def __init__(self, n_missing: int) -> None:
+        self.values = array("d", [np.nan] * n_missing)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value) -> None:
+        self.values.append(np.nan if value is None else float(value))
+
+    def append_missing(self) -> None:
+        self.values.append(np.nan)
+
+    def to_series(self) -> pd.Series:
+        return pd.Series(np.frombuffer(self.values, dtype=np.float64))
+
+
+class _IntColumn:
+    """
+    Column parsed straight into nullable Int64
+    """
+
+    def __init__(self, n_missing: int) -> None:
+        self.values = array("q", [0] * n_missing)
+        self.mask = bytearray(b"\x01" * n_missing)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value) -> None:
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            self.append_missing()
+        else:
+            self.values.append(int(value))
+            self.mask.append(0)
+
+    def append_missing(self) -> None:
+        self.values.append(0)
+        self.mask.append(1)
+
+    def to_series(self) -> pd.Series:
+        return pd.Series(
+            pd.arrays.IntegerArray(
+                np.frombuffer(self.values, dtype=np.int64),
+                np.frombuffer(self.mask, dtype=np.bool_),
+            )
+        )
+
+
+_COLUMN_TYPES = {"float": _FloatColumn, "Int64": _IntColumn}
+
+
+def read_subgraph_swaps(
+    json_file_path: str, drop_columns: list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Read a daily subgraph swap file record by record into flattened, renamed
+    and typed columns. ``drop_columns`` (names after renaming) are never
+    materialized.
+
+    The result matches ``pd.json_normalize`` on the full file followed by
+    dropping the top-level token attributes, renaming and type casting. A
+    null ``pool`` or ``transaction`` leaves its renamed children missing,
+    where ``pd.json_normalize`` would make a column clashing with them.
+    """
+
+    with open(json_file_path, "r", encoding="utf-8") as f:
+        return subgraph_swaps_to_frame(iter_json_array(f), drop_columns)
+
+
+def subgraph_swaps_to_frame(
+    records: Iterable[dict], drop_columns: list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Flatten, rename and type subgraph swap records one by one into a dataframe
+    """
+
+    skip = set(SUBGRAPH_SWAP_SKIP)
+    nested = set(SUBGRAPH_SWAP_NESTED)
+    drop_columns = set(drop_columns or [])
+    # Flattened key -> column, in order of first appearance
+    columns = {}
+    # Renamed column -> flattened key
+    names = {}
+    n_records = 0
+
+    for record in records:
+        for key, value in flatten_record(record):
+            if key in nested:
+                if value is not None:
+                    raise ValueError(f"Expected an object or null for {key!r}")
+                # The children of a null object are left missing
+                continue
+            column = columns.get(key)
+            if column is None:
+                if key in skip:
+                    continue
+                name = SUBGRAPH_SWAP_RENAME.get(key, key)
+                if name in drop_columns:
+                    skip.add(key)
+                    continue
+                if name in names:
+                    raise ValueError(
+                        f"{key!r} and {names[name]!r} are both renamed to {name!r}"
+                    )
+                names[name] = key
+                column_type = _COLUMN_TYPES.get(
+                    SUBGRAPH_SWAP_TYPES.get(name), _ObjectColumn
+                )
+                # earlier records without this key are missing values
+                column = columns[key] = column_type(n_records)
+            column.append(value)
+
+        n_records += 1
+        for key, column in columns.items():
+            if len(column) < n_records:
+                column.append_missing()
+            elif len(column) > n_records:
+                raise ValueError(f"{key!r} appears twice in record {n_records - 1}")
+
+    return pd.DataFrame(
+        {
+            SUBGRAPH_SWAP_RENAME.get(key, key): column.to_series()
+            for key, column in columns.items()
+        }
+    )
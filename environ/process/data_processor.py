@@ -6,19 +6,16 @@ Aggregate function to process defi data.
 import os
 import datetime
 from dateutil import relativedelta
-from tqdm import tqdm
 import pandas as pd
-from multiprocessing import Pool, cpu_count
-from functools import partial
 
 # Import internal modules
 from environ.utils.args_parser import arg_parse_cmd
 from environ.utils.info_logger import print_info_log
-from environ.process.network.prepare_network_data import prepare_network_data
-from environ.process.network.network_graph import prepare_volume
-from environ.process.network.network_graph import prepare_network_graph
-from environ.process.betweeness_centrality.betweeness_scripts import (
-    get_betweenness_centrality,
+from environ.process.network.prepare_network_data import prepare_network_data_range
+from environ.process.network.network_graph import prepare_volume_store
+from environ.process.network.network_graph import prepare_network_graph_range
+from environ.process.betweeness_centrality.scheduler import (
+    schedule_betweenness_centrality,
 )
 
 
@@ -96,9 +93,8 @@ def process_data(uni_version="v2"):
         "progress",
     )
 
-    for date in tqdm(date_list, total=len(date_list)):
-        prepare_network_data(date, uni_version)
-        # prepare_network_data(date, "v3")
+    prepare_network_data_range(date_list, uni_version)
+    # prepare_network_data_range(date_list, "v3")
 
     # Prepare eigenvector centrality data
     print_info_log(
@@ -106,10 +102,9 @@ def process_data(uni_version="v2"):
         "progress",
     )
 
-    for date in tqdm(date_list, total=len(date_list)):
-        prepare_network_graph(date, uni_version, directed=True)
-        # prepare_network_graph(date, "v3", directed=True)
-        # prepare_network_graph(date, "merged", directed=True)
+    prepare_network_graph_range(date_list, uni_version)
+    # prepare_network_graph_range(date_list, "v3")
+    # prepare_network_graph_range(date_list, "merged")
 
     # Prepare betweenness centrality data
     print_info_log(
@@ -120,7 +115,8 @@ def process_data(uni_version="v2"):
     start_date_input = parsed_args.start
     end_date_input = parsed_args.end
     # Split into months then compute betweenness centrality for all days in the month
-    for month in tqdm(pd.date_range(start_date_input, end_date_input, freq="MS")):
+    betweenness_days = []
+    for month in pd.date_range(start_date_input, end_date_input, freq="MS"):
         start_date = datetime.datetime.strptime(month.strftime("%Y-%m-%d"), "%Y-%m-%d")
         end_date = datetime.datetime.strptime(
             (month + relativedelta.relativedelta(months=1)).strftime("%Y-%m-%d"),
@@ -132,21 +128,13 @@ def process_data(uni_version="v2"):
         label = label_year + label_month
 
         # list for multiple dates
-        date_list_betweenness = []
         for i in range((end_date - start_date).days):
             date = start_date + datetime.timedelta(i)
             date_str = date.strftime("%Y%m%d")
-            date_list_betweenness.append(date_str)
-        # Multiprocess
-        p = Pool(processes=cpu_count() // 2)
-        p.map(
-            partial(
-                get_betweenness_centrality,
-                top_list_label=label,
-                uniswap_version=uni_version,
-            ),
-            date_list_betweenness,
-        )
+            betweenness_days.append((date_str, label))
+
+    # One long-lived pool over the whole range, skipping days already current
+    schedule_betweenness_centrality(betweenness_days, uni_version)
 
     # Process volume data
     print_info_log(
@@ -154,5 +142,5 @@ def process_data(uni_version="v2"):
         "progress",
     )
 
-    for date in tqdm(date_list, total=len(date_list)):
-        prepare_volume(date, uni_version)
+    # The panel still reads the legacy csv files
+    prepare_volume_store(date_list, uni_version, export_csv=True)
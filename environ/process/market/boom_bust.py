@@ -2,13 +2,35 @@
 plot market with boom bust cycles
 """
 
-from environ.process.market.sp import sp_df
+import functools
+
+import pandas as pd
+
+from environ.process.market.market_cache import cached_frame, lazy_attributes
+from environ.process.market.sp import load_sp
 from environ.utils.boom_calculator import boom_bust_periods
 
 
-sp_df["time"] = sp_df["Date"]
+@cached_frame(depends_on=(load_sp,))
+def load_sp_price() -> pd.DataFrame:
+    """
+    Load the S&P index as the time and price columns of the boom bust cycles
+    """
+
+    sp_df = load_sp().copy()
+    sp_df["time"] = sp_df["Date"]
+
+    # replace s&p colume with price
+    return sp_df.rename(columns={"S&P": "price"})
+
+
+@functools.lru_cache(maxsize=None)
+def load_boom_bust() -> list[dict]:
+    """
+    Load the boom bust cycles of the S&P index
+    """
+
+    return boom_bust_periods(load_sp_price())
 
-# replace s&p colume with price
-sp_df = sp_df.rename(columns={"S&P": "price"})
 
-BOOM_BUST = boom_bust_periods(sp_df)
+__getattr__ = lazy_attributes(sp_df=load_sp_price, BOOM_BUST=load_boom_bust)
@@ -5,9 +5,24 @@ Script to calculate the clique of a market.
 import pandas as pd
 
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# Read in the data
-df_clique = pd.read_csv(GLOBAL_DATA_PATH / "token_market" / "clique.csv")
+CLIQUE_PATH = GLOBAL_DATA_PATH / "token_market" / "clique.csv"
 
-# convert the date column to datetime
-df_clique["Date"] = pd.to_datetime(df_clique["Date"])
+
+@cached_frame(CLIQUE_PATH)
+def load_clique() -> pd.DataFrame:
+    """
+    Load the clique of the market
+    """
+
+    # Read in the data
+    df_clique = pd.read_csv(CLIQUE_PATH)
+
+    # convert the date column to datetime
+    df_clique["Date"] = pd.to_datetime(df_clique["Date"])
+
+    return df_clique
+
+
+__getattr__ = lazy_attributes(df_clique=load_clique)
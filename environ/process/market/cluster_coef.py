@@ -5,11 +5,24 @@ Script to get the average clustering coefficient
 import pandas as pd
 
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# load the dataframe with the average clustering coefficient
-avg_cluster_df = pd.read_csv(
-    str(GLOBAL_DATA_PATH / "token_market" / "cluster_coef.csv")
-)
+CLUSTER_COEF_PATH = GLOBAL_DATA_PATH / "token_market" / "cluster_coef.csv"
 
-# convert the date to datetime
-avg_cluster_df["Date"] = pd.to_datetime(avg_cluster_df["Date"])
+
+@cached_frame(CLUSTER_COEF_PATH)
+def load_cluster_coef() -> pd.DataFrame:
+    """
+    Load the average clustering coefficient
+    """
+
+    # load the dataframe with the average clustering coefficient
+    avg_cluster_df = pd.read_csv(str(CLUSTER_COEF_PATH))
+
+    # convert the date to datetime
+    avg_cluster_df["Date"] = pd.to_datetime(avg_cluster_df["Date"])
+
+    return avg_cluster_df
+
+
+__getattr__ = lazy_attributes(avg_cluster_df=load_cluster_coef)
@@ -8,28 +8,41 @@ import numpy as np
 import pandas as pd
 
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# read the data
-dollar_df = pd.read_csv(
-    Path(GLOBAL_DATA_PATH) / "token_market" / "primary_token_price_2.csv",
-    index_col=0,
-    header=0,
-)
-
-# convert the date to datetime
-dollar_df["Date"] = pd.to_datetime(
-    dollar_df["Date"], format="%Y-%m-%d"
-) + pd.DateOffset(days=-1)
-
-# sort the time series
-dollar_df = dollar_df.sort_values(by="Date", ascending=True).set_index("Date")
-
-# convert the dataframe to panel
-dollar_df = (
-    dollar_df.stack()
-    .reset_index()
-    .rename(columns={"level_1": "Token", 0: "dollar_exchange_rate"})
-)
-
-# remove inf and -inf
-dollar_df = dollar_df.replace([np.inf, -np.inf], np.nan).dropna()
+PRICE_PATH = Path(GLOBAL_DATA_PATH) / "token_market" / "primary_token_price_2.csv"
+
+
+@cached_frame(PRICE_PATH)
+def load_dollar_exchange_rate() -> pd.DataFrame:
+    """
+    Load the dollar exchange rate of each token as a panel
+    """
+
+    # read the data
+    dollar_df = pd.read_csv(
+        PRICE_PATH,
+        index_col=0,
+        header=0,
+    )
+
+    # convert the date to datetime
+    dollar_df["Date"] = pd.to_datetime(
+        dollar_df["Date"], format="%Y-%m-%d"
+    ) + pd.DateOffset(days=-1)
+
+    # sort the time series
+    dollar_df = dollar_df.sort_values(by="Date", ascending=True).set_index("Date")
+
+    # convert the dataframe to panel
+    dollar_df = (
+        dollar_df.stack()
+        .reset_index()
+        .rename(columns={"level_1": "Token", 0: "dollar_exchange_rate"})
+    )
+
+    # remove inf and -inf
+    return dollar_df.replace([np.inf, -np.inf], np.nan).dropna()
+
+
+__getattr__ = lazy_attributes(dollar_df=load_dollar_exchange_rate)
@@ -0,0 +1,142 @@
+"""
+Lazy, memoized loaders of the processed market frames.
+
+A loader runs on its first call only. Its frame is then kept in memory and
+in ``<MARKET_CACHE_PATH>/<loader>.parquet``, which later processes read as
+long as the source files, the code of the loader module and of the package
+modules it imports, directly or not, and the upstream loaders are unchanged.
+The key of the frame is kept in the metadata of its file, so that both are
+replaced by one atomic write.
+"""
+
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from environ.constants import CACHE_PATH
+from environ.utils.atomic_io import atomic_write
+from environ.utils.info_logger import print_info_log
+from environ.utils.pipeline import code_digest
+
+MARKET_CACHE_PATH: Path = CACHE_PATH / "market"
+
+# Key of the cache key in the metadata of a cached frame file
+CACHE_KEY_METADATA = b"market_cache_key"
+
+
+def _source_stats(sources: tuple[Path, ...]) -> list:
+    """
+    Return the path, mtime and size of each source file
+    """
+
+    stats = []
+    for source in sources:
+        stat = os.stat(source)
+        stats.append([str(source), stat.st_mtime_ns, stat.st_size])
+    return stats
+
+
+def _read_cached_frame(data_file: Path, key: str) -> pd.DataFrame | None:
+    """
+    Read a cached frame file if the key in its metadata matches
+    """
+
+    # Import pyarrow lazily: it is only required once the cache is used
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    try:
+        with open(data_file, "rb") as f:
+            parquet_file = pq.ParquetFile(f)
+            metadata = parquet_file.schema_arrow.metadata or {}
+            if metadata.get(CACHE_KEY_METADATA) != key.encode("utf-8"):
+                return None
+            return parquet_file.read().to_pandas()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached_frame(data_file: Path, frame: pd.DataFrame, key: str) -> None:
+    """
+    Write a frame file with its key in the metadata, in one atomic write
+    """
+
+    # Import pyarrow lazily: it is only required once the cache is used
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    table = pa.Table.from_pandas(frame)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), CACHE_KEY_METADATA: key.encode("utf-8")}
+    )
+    os.makedirs(data_file.parent, exist_ok=True)
+    with atomic_write(data_file, "wb") as f:
+        pq.write_table(table, f, compression="zstd")
+
+
+def cached_frame(
+    *sources: str | Path,
+    depends_on: tuple[Callable, ...] = (),
+    cache_path: Path = MARKET_CACHE_PATH,
+) -> Callable[[Callable[[], pd.DataFrame]], Callable[[], pd.DataFrame]]:
+    """
+    Decorator memoizing a loader of a processed frame in memory and on disk,
+    keyed by its source files, the code of its module and of the package
+    modules it imports, and the upstream loaders it calls. Callers share the
+    returned frame and must not modify it.
+    """
+
+    def decorator(loader: Callable[[], pd.DataFrame]) -> Callable[[], pd.DataFrame]:
+        name = f"{loader.__module__}.{loader.__qualname__}"
+        data_file = Path(cache_path) / f"{name}.parquet"
+
+        def cache_key() -> str:
+            key = json.dumps(
+                [
+                    name,
+                    # The loader module and the package modules it imports
+                    code_digest(loader.__module__),
+                    _source_stats(tuple(Path(source) for source in sources)),
+                    [upstream.cache_key() for upstream in depends_on],
+                ]
+            )
+            return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+        @functools.lru_cache(maxsize=None)
+        def wrapper() -> pd.DataFrame:
+            key = cache_key()
+            frame = _read_cached_frame(data_file, key)
+            if frame is not None:
+                return frame
+
+            frame = loader()
+            try:
+                _write_cached_frame(data_file, frame, key)
+            except (ImportError, NotImplementedError, TypeError, ValueError) as e:
+                # Columns of mixed types cannot be stored in parquet
+                print_info_log(f"{name} not cached: {e}", "warning")
+            return frame
+
+        wrapper.cache_key = cache_key
+        return functools.update_wrapper(wrapper, loader)
+
+    return decorator
+
+
+def lazy_attributes(**loaders: Callable[[], object]) -> Callable[[str], object]:
+    """
+    Return a module ``__getattr__`` loading the frames formerly computed at
+    import time on their first access, e.g.
+    ``__getattr__ = lazy_attributes(sp_df=load_sp)``
+    """
+
+    def __getattr__(name: str) -> object:
+        if name in loaders:
+            return loaders[name]()
+        raise AttributeError(f"module has no attribute {name!r}")
+
+    return __getattr__
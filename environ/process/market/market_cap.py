@@ -5,63 +5,77 @@ import numpy as np
 import pandas as pd
 
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# read in the csv file
-mcap = pd.read_csv(
-    rf"{GLOBAL_DATA_PATH}/token_market/primary_token_marketcap_2.csv",
-    index_col=None,
-    header=0,
-)
+MARKETCAP_PATH = GLOBAL_DATA_PATH / "token_market" / "primary_token_marketcap_2.csv"
+ETHEREUM_PATH = GLOBAL_DATA_PATH / "coingecko" / "token_data" / "ethereum.csv"
 
-# convert date in "YYYY-MM-DD" to datetime
-mcap["Date"] = pd.to_datetime(mcap["Date"], format="%Y-%m-%d")
 
-# drop the column "Unnamed: 0"
-mcap = mcap.drop(columns=["Unnamed: 0"])
+@cached_frame(MARKETCAP_PATH, ETHEREUM_PATH)
+def load_mcap() -> pd.DataFrame:
+    """
+    Load the market cap of each token as a panel
+    """
 
-# sort the time series
-mcap = mcap.sort_values(by="Date", ascending=True)
+    # read in the csv file
+    mcap = pd.read_csv(
+        MARKETCAP_PATH,
+        index_col=None,
+        header=0,
+    )
 
-# drop the WETH column
-mcap = mcap.drop(columns=["WETH"])
+    # convert date in "YYYY-MM-DD" to datetime
+    mcap["Date"] = pd.to_datetime(mcap["Date"], format="%Y-%m-%d")
 
-# load in the ethereum.csv from data/data_global/coingecko/token_data
-ethereum = pd.read_csv(rf"{GLOBAL_DATA_PATH}/coingecko/token_data/ethereum.csv")
+    # drop the column "Unnamed: 0"
+    mcap = mcap.drop(columns=["Unnamed: 0"])
 
-# only keep the time and market_caps columns
-ethereum = ethereum[["time", "market_caps"]]
+    # sort the time series
+    mcap = mcap.sort_values(by="Date", ascending=True)
 
-# rename the columns
-ethereum.columns = ["Date", "WETH"]
+    # drop the WETH column
+    mcap = mcap.drop(columns=["WETH"])
 
-# convert date in "YYYY-MM-DD" to datetime
-ethereum["Date"] = pd.to_datetime(ethereum["Date"], format="%Y-%m-%d")
+    # load in the ethereum.csv from data/data_global/coingecko/token_data
+    ethereum = pd.read_csv(ETHEREUM_PATH)
 
-# only keep the rows with Date >= 2019-01-01 <= 2023-02-01
-ethereum = ethereum[
-    (ethereum["Date"] >= "2019-01-01") & (ethereum["Date"] <= "2023-02-01")
-]
+    # only keep the time and market_caps columns
+    ethereum = ethereum[["time", "market_caps"]]
 
-# merge the ethereum dataframe with the mcap dataframe
-mcap = pd.merge(mcap, ethereum, on="Date", how="left")
+    # rename the columns
+    ethereum.columns = ["Date", "WETH"]
 
-# set the index to be the Date column
-mcap = mcap.set_index("Date")
+    # convert date in "YYYY-MM-DD" to datetime
+    ethereum["Date"] = pd.to_datetime(ethereum["Date"], format="%Y-%m-%d")
 
-# convert the dataframe to panel
-mcap = mcap.stack().reset_index()
+    # only keep the rows with Date >= 2019-01-01 <= 2023-02-01
+    ethereum = ethereum[
+        (ethereum["Date"] >= "2019-01-01") & (ethereum["Date"] <= "2023-02-01")
+    ]
 
-# rename the column "level_1" to "Token"
-mcap = mcap.rename(columns={"level_1": "Token"})
+    # merge the ethereum dataframe with the mcap dataframe
+    mcap = pd.merge(mcap, ethereum, on="Date", how="left")
 
-# rename the column "0" to "mcap"
-mcap = mcap.rename(columns={0: "mcap"})
+    # set the index to be the Date column
+    mcap = mcap.set_index("Date")
 
-# # take the log of mcap
-# mcap["log_mcap"] = mcap["mcap"].apply(lambda x: np.log(x))
+    # convert the dataframe to panel
+    mcap = mcap.stack().reset_index()
 
-# remove inf and -inf
-mcap = mcap.replace([np.inf, -np.inf], np.nan)
+    # rename the column "level_1" to "Token"
+    mcap = mcap.rename(columns={"level_1": "Token"})
 
-# drop the rows with NaN
-mcap = mcap.dropna()
+    # rename the column "0" to "mcap"
+    mcap = mcap.rename(columns={0: "mcap"})
+
+    # # take the log of mcap
+    # mcap["log_mcap"] = mcap["mcap"].apply(lambda x: np.log(x))
+
+    # remove inf and -inf
+    mcap = mcap.replace([np.inf, -np.inf], np.nan)
+
+    # drop the rows with NaN
+    return mcap.dropna()
+
+
+__getattr__ = lazy_attributes(mcap=load_mcap)
@@ -2,16 +2,32 @@
 Script to preprocess the market data
 """
 
-from environ.process.market.eth_gas import gas_eth_df
-from environ.process.market.sp import sp_df
+import pandas as pd
+
+from environ.process.market.eth_gas import load_gas_eth
+from environ.process.market.market_cache import cached_frame, lazy_attributes
+from environ.process.market.sp import load_sp
 from environ.utils.variable_constructer import log_return, return_vol
 
-# join two dataframes
 
-market_data = sp_df.merge(gas_eth_df, on="Date", how="outer")
+@cached_frame(depends_on=(load_sp, load_gas_eth))
+def load_market_data() -> pd.DataFrame:
+    """
+    Load the S&P, ether price and gas price with their log returns and
+    volatilities
+    """
+
+    # join two dataframes
+
+    market_data = load_sp().merge(load_gas_eth(), on="Date", how="outer")
+
+    for v in ["S&P", "ether_price_usd", "gas_price_usd"]:
+        market_data = log_return(market_data, v, rolling_window_return=1)
+        market_data = return_vol(
+            market_data, v, rolling_window_return=1, rolling_window_vol=30
+        )
+
+    return market_data
+
 
-for v in ["S&P", "ether_price_usd", "gas_price_usd"]:
-    market_data = log_return(market_data, v, rolling_window_return=1)
-    market_data = return_vol(
-        market_data, v, rolling_window_return=1, rolling_window_vol=30
-    )
+__getattr__ = lazy_attributes(market_data=load_market_data)
@@ -6,15 +6,30 @@ import pandas as pd
 from environ.constants import (
     GLOBAL_DATA_PATH,
 )
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# load the risk free rate
-df_rf = pd.read_csv(
-    GLOBAL_DATA_PATH / "risk_free_rate/risk_free_rate.csv",
-    parse_dates=["Date"],
-)
+RISK_FREE_RATE_PATH = GLOBAL_DATA_PATH / "risk_free_rate/risk_free_rate.csv"
+
+
+@cached_frame(RISK_FREE_RATE_PATH)
+def load_risk_free_rate() -> pd.DataFrame:
+    """
+    Load the daily risk-free rate
+    """
+
+    # load the risk free rate
+    df_rf = pd.read_csv(
+        RISK_FREE_RATE_PATH,
+        parse_dates=["Date"],
+    )
+
+    # divide the risk free rate by 100
+    df_rf["RF"] = df_rf["RF"] / 100
+
+    # convert the date to datetime
+    df_rf["Date"] = pd.to_datetime(df_rf["Date"], format="%Y%m%d")
+
+    return df_rf
 
-# divide the risk free rate by 100
-df_rf["RF"] = df_rf["RF"] / 100
 
-# convert the date to datetime
-df_rf["Date"] = pd.to_datetime(df_rf["Date"], format="%Y%m%d")
+__getattr__ = lazy_attributes(df_rf=load_risk_free_rate)
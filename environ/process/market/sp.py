@@ -4,16 +4,27 @@ process s&p data
 
 import pandas as pd
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
+SP_PATH = GLOBAL_DATA_PATH / "token_market" / "PerformanceGraphExport.xls"
 
-sp_df = pd.read_excel(
-    GLOBAL_DATA_PATH / "token_market" / "PerformanceGraphExport.xls",
-    index_col=None,
-    skiprows=6,
-    skipfooter=4,
-    # usecols="A:B:C",
-)
 
+@cached_frame(SP_PATH)
+def load_sp() -> pd.DataFrame:
+    """
+    Load the S&P index
+    """
 
-# sort the dataframe by date
-sp_df = sp_df.sort_values(by="Date", ascending=True)
+    sp_df = pd.read_excel(
+        SP_PATH,
+        index_col=None,
+        skiprows=6,
+        skipfooter=4,
+        # usecols="A:B:C",
+    )
+
+    # sort the dataframe by date
+    return sp_df.sort_values(by="Date", ascending=True)
+
+
+__getattr__ = lazy_attributes(sp_df=load_sp)
@@ -5,11 +5,26 @@ Script to get the stable share of a given dataset.
 import pandas as pd
 
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# read the stablecoin share data
-stable_share_df = pd.read_csv(
-    GLOBAL_DATA_PATH / "stablecoin" / "stablecoin_share.csv",
-)
+STABLE_SHARE_PATH = GLOBAL_DATA_PATH / "stablecoin" / "stablecoin_share.csv"
 
-# convert the date to datetime
-stable_share_df["Date"] = pd.to_datetime(stable_share_df["Date"])
+
+@cached_frame(STABLE_SHARE_PATH)
+def load_stable_share() -> pd.DataFrame:
+    """
+    Load the stablecoin share
+    """
+
+    # read the stablecoin share data
+    stable_share_df = pd.read_csv(
+        STABLE_SHARE_PATH,
+    )
+
+    # convert the date to datetime
+    stable_share_df["Date"] = pd.to_datetime(stable_share_df["Date"])
+
+    return stable_share_df
+
+
+__getattr__ = lazy_attributes(stable_share_df=load_stable_share)
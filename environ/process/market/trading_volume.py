@@ -4,10 +4,25 @@ Script to preprocess the market volume data
 
 import pandas as pd
 from environ.constants import GLOBAL_DATA_PATH
+from environ.process.market.market_cache import cached_frame, lazy_attributes
 
-# load the dataframe with the market volume
-df_volume = pd.read_csv(
-    rf"{GLOBAL_DATA_PATH}/token_market/total_market_trading_volume.csv",
+TRADING_VOLUME_PATH = (
+    GLOBAL_DATA_PATH / "token_market" / "total_market_trading_volume.csv"
 )
 
-df_volume["Date"] = pd.to_datetime(df_volume["Date"], format="%Y-%m-%d")
+
+@cached_frame(TRADING_VOLUME_PATH)
+def load_trading_volume() -> pd.DataFrame:
+    """
+    Load the total market trading volume
+    """
+
+    # load the dataframe with the market volume
+    df_volume = pd.read_csv(TRADING_VOLUME_PATH)
+
+    df_volume["Date"] = pd.to_datetime(df_volume["Date"], format="%Y-%m-%d")
+
+    return df_volume
+
+
+__getattr__ = lazy_attributes(df_volume=load_trading_volume)
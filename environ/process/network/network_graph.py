@@ -6,24 +6,34 @@ Plot the network graph based on processed network dataset
 from os import path
 import os
 import datetime
+from pathlib import Path
 import networkx as nx
 import pandas as pd
 import numpy as np
+import scipy as sp
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
 import matplotlib.pyplot as plt
+from tqdm import tqdm
+from environ.constants import VOLUME_STORE_PATH
 from environ.utils.config_parser import Config
+from environ.utils.volume_store import (
+    VOLUME_COLUMNS,
+    VOLUME_MEASURES,
+    read_volume,
+    volume_frame_to_measures,
+    write_volume,
+)
 
 # Initialize configuration
 config = Config()
 
 
-def prepare_volume(date: datetime.datetime, data_source: str) -> None:
+def load_edge_data(date_str: str, data_source: str) -> pd.DataFrame:
     """
-    Function to calculate volume-related independent variables
+    Load the inflow and outflow edges of one date
     """
 
-    # Convert the datetime to the string
-    date_str = date.strftime("%Y%m%d")
-
     # Edge data
     edge_data = []
 
@@ -79,145 +89,151 @@ def prepare_volume(date: datetime.datetime, data_source: str) -> None:
             )
             edge_data.append(edge_data_v3)
 
-    edge_data = pd.concat(edge_data)
-    edge_data = edge_data.groupby(["Source", "Target"])["Volume"].sum().reset_index()
+    return pd.concat(edge_data)
 
-    # Save the volume data
-    edge_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source + "/volume/volume_" + data_source + "_" + date_str + ".csv",
-        )
-    )
 
-    # Calculate and save the volume_in data
-    volume_in_data = edge_data.copy()
+def compute_volume_table(edge_table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the volume-related independent variables of all the dates of a
+    long edge table at once, grouping by date and token, as one long table of
+    the measures keyed by date
+    """
+
+    # Calculate the volume_in and volume_out data
     volume_in_data = (
-        volume_in_data.groupby(["Target"])["Volume"]
+        edge_table.groupby(["date", "Target"])["Volume"]
         .sum()
-        .reset_index()
-        .rename(columns={"Target": "Token"})
-    )
-    volume_in_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source
-            + "/volume_in/volume_in_"
-            + data_source
-            + "_"
-            + date_str
-            + ".csv",
-        )
-    )
-
-    # Calculate and save the volume_in_share data
-    volume_in_share_data = volume_in_data.copy()
-    volume_in_share_data["Volume"] = (
-        volume_in_share_data["Volume"] / volume_in_share_data["Volume"].sum()
-    )
-    volume_in_share_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source
-            + "/volume_in_share/volume_in_share_"
-            + data_source
-            + "_"
-            + date_str
-            + ".csv",
-        )
+        .rename_axis(["date", "Token"])
     )
-
-    # Calculate and save the volume_out data
-    volume_out_data = edge_data.copy()
     volume_out_data = (
-        volume_out_data.groupby(["Source"])["Volume"]
+        edge_table.groupby(["date", "Source"])["Volume"]
         .sum()
-        .reset_index()
-        .rename(columns={"Source": "Token"})
-    )
-    volume_out_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source
-            + "/volume_out/volume_out_"
-            + data_source
-            + "_"
-            + date_str
-            + ".csv",
-        )
+        .rename_axis(["date", "Token"])
     )
 
-    # Calculate and save the volume_out_share data
-    volume_out_share_data = volume_out_data.copy()
-    volume_out_share_data["Volume"] = (
-        volume_out_share_data["Volume"] / volume_out_share_data["Volume"].sum()
-    )
-    volume_out_share_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source
-            + "/volume_out_share/volume_out_share_"
-            + data_source
-            + "_"
-            + date_str
-            + ".csv",
-        )
-    )
-
-    # Calculate and save the volume_total data
-    volume_total_data = []
-    volume_total_data.append(volume_in_data)
-    volume_total_data.append(volume_out_data)
-    volume_total_data = pd.concat(volume_total_data)
+    # Calculate the volume_total data
     volume_total_data = (
-        volume_total_data.groupby(["Token"])["Volume"].sum().reset_index()
-    )
-    volume_total_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source
-            + "/volume_total/volume_total_"
-            + data_source
-            + "_"
-            + date_str
-            + ".csv",
-        )
+        pd.concat([volume_in_data, volume_out_data])
+        .groupby(level=["date", "Token"])
+        .sum()
     )
 
-    # Calculate and save the volume_share data
-    volume_share_data = volume_total_data.copy()
-    volume_share_data["Volume"] = (
-        volume_share_data["Volume"] / volume_share_data["Volume"].sum()
-    )
-    volume_share_data.to_csv(
-        path.join(
-            config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-            data_source
-            + "/volume_share/volume_share_"
-            + data_source
-            + "_"
-            + date_str
-            + ".csv",
+    # Calculate the share data from the sums of each date
+    measures = {
+        "volume": edge_table,
+        "volume_in": volume_in_data.reset_index(),
+        "volume_out": volume_out_data.reset_index(),
+        "volume_total": volume_total_data.reset_index(),
+    }
+    for measure, share_measure in [
+        ("volume_in", "volume_in_share"),
+        ("volume_out", "volume_out_share"),
+        ("volume_total", "volume_share"),
+    ]:
+        volume = measures[measure]["Volume"]
+        measures[share_measure] = measures[measure].assign(
+            Volume=volume / volume.groupby(measures[measure]["date"]).transform("sum")
         )
-    )
 
+    return pd.concat(
+        [measures[measure].assign(measure=measure) for measure in VOLUME_MEASURES],
+        ignore_index=True,
+    ).reindex(columns=["date"] + VOLUME_COLUMNS)
 
-# def plot_network(date: datetime.datetime, uniswap_version: str) -> None:
-def prepare_network_graph(
-    date: datetime.datetime, data_source: str, directed: bool
+
+def compute_volume_measures(edge_data: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    Compute the volume-related independent variables of one day from its
+    edges summed per directed token pair
+    """
+
+    return volume_frame_to_measures(compute_volume_table(edge_data.assign(date="")))
+
+
+def export_volume_csv(
+    measures: dict[str, pd.DataFrame], date_str: str, data_source: str
 ) -> None:
     """
-    Plot the network by networkx
+    Save the volume measures of one day in the legacy layout, one csv file
+    per measure and day
+    """
+
+    for measure in VOLUME_MEASURES:
+        measures[measure].to_csv(
+            path.join(
+                config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
+                data_source
+                + "/"
+                + measure
+                + "/"
+                + measure
+                + "_"
+                + data_source
+                + "_"
+                + date_str
+                + ".csv",
+            )
+        )
+
+
+def prepare_volume(date: datetime.datetime, data_source: str) -> None:
+    """
+    Function to calculate volume-related independent variables
     """
 
     # Convert the datetime to the string
     date_str = date.strftime("%Y%m%d")
 
-    # Define the graph
-    if directed:
-        G = nx.MultiDiGraph()
-    else:
-        G = nx.MultiGraph()
+    edge_data = load_edge_data(date_str, data_source)
+    edge_data = edge_data.groupby(["Source", "Target"])["Volume"].sum().reset_index()
+
+    export_volume_csv(compute_volume_measures(edge_data), date_str, data_source)
+
+
+def prepare_volume_store(
+    date_list: list[datetime.datetime],
+    data_source: str,
+    export_csv: bool = False,
+    store_path: Path = VOLUME_STORE_PATH,
+) -> None:
+    """
+    Calculate the volume-related independent variables of a whole date range
+    from one long edge table in one pass and write them to the volume store,
+    and with ``export_csv`` to the legacy csv files as well
+    """
+
+    volume_table = compute_volume_table(load_edge_table(date_list, data_source))
+    write_volume(volume_table, data_source, store_path)
+
+    if export_csv:
+        for date_str, day_table in tqdm(
+            volume_table.groupby("date", sort=False), total=len(date_list)
+        ):
+            export_volume_csv(
+                volume_frame_to_measures(day_table), date_str, data_source
+            )
+
+
+def export_volume_store_csv(
+    date_list: list[datetime.datetime],
+    data_source: str,
+    store_path: Path = VOLUME_STORE_PATH,
+) -> None:
+    """
+    Export the stored volume measures of a date range to the legacy csv files
+    """
+
+    for date in tqdm(date_list, total=len(date_list)):
+        date_str = date.strftime("%Y%m%d")
+        export_volume_csv(
+            read_volume(data_source, date_str, store_path), date_str, data_source
+        )
+
+
+def load_token_data(date_str: str, data_source: str) -> pd.DataFrame:
+    """
+    Load the primary tokens of one date
+    """
 
     # token data
     token_data = []
@@ -269,8 +285,18 @@ def prepare_network_graph(
             )
             token_data.append(token_data_v3)
 
+    return pd.concat(token_data)
+
+
+def prepare_node_data(
+    token_data: pd.DataFrame, date_str: str, data_source: str
+) -> pd.DataFrame:
+    """
+    Save the tvl and tvl share of the tokens and order them as the nodes of the
+    network graph
+    """
+
     # Generate token data
-    token_data = pd.concat(token_data)
     token_data = token_data.groupby(["token"])["total_tvl"].sum().reset_index()
 
     token_data.to_csv(
@@ -366,67 +392,37 @@ def prepare_network_graph(
             node_data = node_data.drop(labels=current_index, axis=0)
             node_data = node_data.sort_index().reset_index(drop=True)
 
-    for _, row in node_data.iterrows():
-        token = row["token"]
-        # total_tvl = row["total_tvl"]
-        # stable = row["stable"]
-        G.add_node(token, tvl=row["total_tvl"], stable=row["stable"])
+    return node_data
 
-    # Edge data
-    edge_data = []
 
-    if (data_source == "v2") | (data_source == "merged"):
-        edge_data_v2 = pd.read_csv(
-            path.join(
-                config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-                "v2"
-                + "/inout_flow/inout_flow_tokens_"
-                + "v2"
-                + "_"
-                + date_str
-                + ".csv",
-            ),
-            index_col=0,
-        )
+# def plot_network(date: datetime.datetime, uniswap_version: str) -> None:
+def prepare_network_graph(
+    date: datetime.datetime, data_source: str, directed: bool
+) -> None:
+    """
+    Plot the network by networkx
+    """
 
-        # Change data format at the presentation layer
-        edge_data_v2["Source_symbol"] = [i[12:-2] for i in edge_data_v2["Source"]]
-        edge_data_v2 = edge_data_v2.drop(columns=["Source"]).rename(
-            columns={"Source_symbol": "Source"}
-        )
-        edge_data_v2["Target_symbol"] = [i[12:-2] for i in edge_data_v2["Target"]]
-        edge_data_v2 = edge_data_v2.drop(columns=["Target"]).rename(
-            columns={"Target_symbol": "Target"}
-        )
-        edge_data_v2 = edge_data_v2[["Source", "Target", "Volume"]]
+    # Convert the datetime to the string
+    date_str = date.strftime("%Y%m%d")
 
-        edge_data.append(edge_data_v2)
-    if (data_source == "v3") | (data_source == "merged"):
-        # List for the token data of v3
-        edge_data_v3_path = os.listdir(
-            path.join(
-                config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-                "v3" + "/inout_flow/",
-            )
-        )
+    # Define the graph
+    if directed:
+        G = nx.MultiDiGraph()
+    else:
+        G = nx.MultiGraph()
 
-        # Check whether the uniswap v3 have data, and decide whether to merge
-        if "inout_flow_tokens_" + "v3" + "_" + date_str + ".csv" in edge_data_v3_path:
-            edge_data_v3 = pd.read_csv(
-                path.join(
-                    config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
-                    "v3"
-                    + "/inout_flow/inout_flow_tokens_"
-                    + "v3"
-                    + "_"
-                    + date_str
-                    + ".csv",
-                ),
-                index_col=0,
-            )
-            edge_data.append(edge_data_v3)
+    node_data = prepare_node_data(
+        load_token_data(date_str, data_source), date_str, data_source
+    )
 
-    edge_data = pd.concat(edge_data)
+    for _, row in node_data.iterrows():
+        token = row["token"]
+        # total_tvl = row["total_tvl"]
+        # stable = row["stable"]
+        G.add_node(token, tvl=row["total_tvl"], stable=row["stable"])
+
+    edge_data = load_edge_data(date_str, data_source)
     edge_data = edge_data.groupby(["Source", "Target"])["Volume"].sum().reset_index()
 
     # If the graph is undirected, we need to sum the volume of the two directions
@@ -509,3 +505,227 @@ def prepare_network_graph(
             + ".csv",
         )
     )
+
+
+def load_edge_table(
+    date_list: list[datetime.datetime], data_source: str
+) -> pd.DataFrame:
+    """
+    Load the edges of several dates as one long table, summed per directed
+    token pair and keyed by the date string column
+    """
+
+    edge_table = pd.concat(
+        [
+            load_edge_data(date.strftime("%Y%m%d"), data_source).assign(
+                date=date.strftime("%Y%m%d")
+            )
+            for date in date_list
+        ],
+        ignore_index=True,
+    )
+    return (
+        edge_table.groupby(["date", "Source", "Target"])["Volume"].sum().reset_index()
+    )
+
+
+def eigenvector_centrality_sparse(
+    matrix: sp.sparse.sparray,
+    start: np.ndarray | None = None,
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+) -> np.ndarray:
+    """
+    Eigenvector centrality x = M x by power iteration on a sparse matrix,
+    normalized as nx.eigenvector_centrality_numpy, whose in-centrality uses
+    the transposed adjacency as M. The matrix is scaled and shifted by the
+    identity so that periodic graphs converge too. Iterations that do not
+    converge are finished by ARPACK from the last iterate.
+    """
+
+    n_nodes = matrix.shape[0]
+    x = np.ones(n_nodes) if start is None else np.asarray(start, dtype=float)
+    x = x / np.linalg.norm(x)
+
+    scale = abs(matrix).sum(axis=1).max()
+    if scale == 0:
+        return x
+    shifted = matrix / scale + sp.sparse.identity(n_nodes, format="csr")
+
+    for _ in range(max_iter):
+        x_next = shifted @ x
+        x_next /= np.linalg.norm(x_next)
+        if np.abs(x_next - x).max() < tol:
+            return x_next
+        x = x_next
+
+    if n_nodes > 2:
+        _, eigenvector = sp.sparse.linalg.eigs(matrix, k=1, which="LR", v0=x)
+    else:
+        eigenvalues, eigenvectors = np.linalg.eig(matrix.toarray())
+        eigenvector = eigenvectors[:, [np.argmax(eigenvalues.real)]]
+    largest = eigenvector.flatten().real
+    return largest / (np.sign(largest.sum()) * np.linalg.norm(largest))
+
+
+def betweenness_centrality_levels(
+    source: np.ndarray, target: np.ndarray, n_nodes: int
+) -> np.ndarray:
+    """
+    Normalized betweenness centrality of the unweighted directed graph with
+    the given edges, as nx.betweenness_centrality(weight=None): Brandes'
+    path counting and dependency accumulation run level by level for all
+    sources at once with dense matrix products
+    """
+
+    adjacency = np.zeros((n_nodes, n_nodes))
+    adjacency[source, target] = 1.0
+    np.fill_diagonal(adjacency, 0.0)
+
+    # Number of shortest paths from each source (row) to the nodes at each
+    # distance
+    frontier = np.eye(n_nodes)
+    reached = frontier > 0
+    sigma = frontier.copy()
+    levels = [reached]
+    while True:
+        frontier = frontier @ adjacency
+        frontier[reached] = 0.0
+        level = frontier > 0
+        if not level.any():
+            break
+        reached |= level
+        sigma += frontier
+        levels.append(level)
+
+    # Dependency of each source on the nodes, from the farthest level back
+    delta = np.zeros((n_nodes, n_nodes))
+    for level, previous_level in zip(levels[:0:-1], levels[-2:0:-1]):
+        coefficient = np.where(level, (1.0 + delta) / np.where(level, sigma, 1.0), 0.0)
+        delta += np.where(previous_level, sigma * (coefficient @ adjacency.T), 0.0)
+
+    betweenness = delta.sum(axis=0)
+    if n_nodes > 2:
+        betweenness *= 1 / ((n_nodes - 1) * (n_nodes - 2))
+    return betweenness
+
+
+def _warm_start(previous: pd.Series | None, tokens: pd.Index) -> np.ndarray | None:
+    """
+    Start vector from the centrality of the previous day. Every node keeps a
+    floor so that components without previous centrality are reached.
+    """
+
+    if previous is None:
+        return None
+    return previous.reindex(tokens).fillna(0).to_numpy() + 1 / len(tokens)
+
+
+def prepare_network_graph_range(
+    date_list: list[datetime.datetime],
+    data_source: str,
+    tol: float = 1e-10,
+    max_iter: int = 1000,
+) -> None:
+    """
+    Compute the directed network centrality of a whole date range: the daily
+    graphs are sparse weighted adjacency matrices built from one long edge
+    table, the in and out eigenvector centralities are computed by sparse
+    power iteration warm-started from the previous day, the degrees by array
+    reductions and the betweenness by level-wise matrix products. The files
+    match prepare_network_graph(directed=True) up to the tolerance of the
+    centrality.
+    """
+
+    edge_table = load_edge_table(date_list, data_source)
+    edge_groups = dict(iter(edge_table.groupby("date", sort=False)))
+
+    previous_in = previous_out = None
+    for date in tqdm(date_list, total=len(date_list)):
+        date_str = date.strftime("%Y%m%d")
+
+        node_data = prepare_node_data(
+            load_token_data(date_str, data_source), date_str, data_source
+        )
+        tokens = pd.Index(node_data["token"])
+        edge_data = edge_groups[date_str]
+
+        # Sparse weighted adjacency, source in rows and target in columns
+        source = tokens.get_indexer(edge_data["Source"])
+        target = tokens.get_indexer(edge_data["Target"])
+        if (source < 0).any() or (target < 0).any():
+            raise ValueError(f"Edges of {date_str} with tokens outside the nodes")
+        weight = edge_data["Volume"].to_numpy(dtype=float)
+        n_nodes = len(tokens)
+        adjacency = sp.sparse.csr_array(
+            (weight, (source, target)), shape=(n_nodes, n_nodes)
+        )
+
+        # Graphs not strongly connected have no unique centrality, as in networkx
+        if (
+            sp.sparse.csgraph.connected_components(adjacency, connection="strong")[0]
+            > 1
+        ):
+            raise nx.AmbiguousSolution(
+                "Eigenvector centrality of the graph of "
+                f"{date_str}, which is not strongly connected"
+            )
+
+        in_centrality = eigenvector_centrality_sparse(
+            adjacency.T.tocsr(), _warm_start(previous_in, tokens), tol, max_iter
+        )
+        out_centrality = eigenvector_centrality_sparse(
+            adjacency, _warm_start(previous_out, tokens), tol, max_iter
+        )
+        previous_in = pd.Series(in_centrality, index=tokens)
+        previous_out = pd.Series(out_centrality, index=tokens)
+
+        # Degrees, a self-loop counting as one in and one out edge
+        in_degree = np.bincount(target, minlength=n_nodes)
+        out_degree = np.bincount(source, minlength=n_nodes)
+        weighted_in_degree = np.bincount(target, weights=weight, minlength=n_nodes)
+        weighted_out_degree = np.bincount(source, weights=weight, minlength=n_nodes)
+
+        # Compute degree and centrality
+        df_centrality = node_data.copy()
+        df_centrality["eigenvector_centrality"] = in_centrality
+        df_centrality["betweenness_centrality"] = betweenness_centrality_levels(
+            source, target, n_nodes
+        )
+        df_centrality["degree"] = in_degree + out_degree
+        df_centrality["in_degree"] = in_degree
+        df_centrality["out_degree"] = out_degree
+        df_centrality["weighted_degree"] = weighted_in_degree + weighted_out_degree
+        df_centrality["weighted_in_degree"] = weighted_in_degree
+        df_centrality["weighted_out_degree"] = weighted_out_degree
+
+        df_centrality.to_csv(
+            path.join(
+                config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
+                data_source
+                + "/inflow_centrality/centrality_"
+                + data_source
+                + "_"
+                + date_str
+                + ".csv",
+            )
+        )
+
+        # Compute out degree and centrality, the in and out of the reversed graph
+        df_centrality_out = node_data.copy()
+        df_centrality_out["eigenvector_centrality"] = out_centrality
+        df_centrality_out["weighted_degree"] = weighted_in_degree + weighted_out_degree
+        df_centrality_out["weighted_in_degree"] = weighted_out_degree
+        df_centrality_out["weighted_out_degree"] = weighted_in_degree
+
+        df_centrality_out.to_csv(
+            path.join(
+                config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
+                data_source
+                + "/outflow_centrality/centrality_"
+                + data_source
+                + "_"
+                + date_str
+                + ".csv",
+            )
+        )
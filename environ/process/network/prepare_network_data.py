@@ -5,6 +5,7 @@ Prepare the dataset for the network graph
 import os
 from os import path
 import datetime
+import numpy as np
 import pandas as pd
 from environ.utils.config_parser import Config
 
@@ -37,92 +38,129 @@ def load_volume_dataset(date: datetime.datetime, uni_version: str) -> pd.DataFra
     return df_top50_pairs_dir_volume
 
 
-def get_primary_token_list(date: datetime.datetime, uni_version: str) -> pd.DataFrame:
+TVL_SYMBOLS = {"v2": "reserveUSD", "v3": "tvlUSD"}
+
+
+def load_volume_dataset_range(
+    date_list: list[datetime.datetime], uni_version: str
+) -> pd.DataFrame:
     """
-    Get the primary token list as the nodes of network from the volume dataset.
+    Load the volume dataset files of several dates as one long dataframe,
+    keyed by the date column
     """
 
-    df_top50_pairs_dir_volume = load_volume_dataset(date, uni_version)
-
-    # Select the distinct token symbol
-    df_primary_token = pd.concat(
+    return pd.concat(
         [
-            df_top50_pairs_dir_volume[["token0"]].rename(columns={"token0": "token"}),
-            df_top50_pairs_dir_volume[["token1"]].rename(columns={"token1": "token"}),
+            load_volume_dataset(date, uni_version).assign(date=date)
+            for date in date_list
         ],
         ignore_index=True,
     )
-    df_primary_token = df_primary_token.drop_duplicates(["token"]).reset_index(
-        drop=True
-    )
 
-    if uni_version == "v2":
-        tvl_symbol = "reserveUSD"
-    elif uni_version == "v3":
-        tvl_symbol = "tvlUSD"
 
-    # Calculate total tvl
-    for index_token, row_token in df_primary_token.iterrows():
+def build_primary_token_list(
+    df_dir_volume: pd.DataFrame, uni_version: str
+) -> pd.DataFrame:
+    """
+    Build the primary token list with the total tvl of the pools involving
+    each token from a long volume dataset keyed by the date column. Tokens
+    are listed per date in order of first appearance as token0, then token1.
+    """
 
-        # Get the symbol of this token from the primary token list
-        token = row_token["token"]
+    tvl_symbol = TVL_SYMBOLS[uni_version]
 
-        # Global variable for this token
-        total_tvl = 0
+    # One row per (pool, side), ordered by side then pool within each date
+    df_token = df_dir_volume.reset_index(drop=True).melt(
+        id_vars=["date", tvl_symbol],
+        value_vars=["token0", "token1"],
+        value_name="token",
+        ignore_index=False,
+    )
+    df_token = df_token.rename_axis("pool").reset_index()
 
-        # Get the pools involving this token as token0 or token1
-        # TODO: potentially need to divide by 2 for V2
-        # definitely for V3 need to also check the calculation altogether
-        for _, row_pool in df_top50_pairs_dir_volume.iterrows():
-            if token in {row_pool["token0"], row_pool["token1"]}:
-                total_tvl = total_tvl + row_pool[tvl_symbol]
+    # Select the distinct token symbol
+    df_primary_token = (
+        df_token.sort_values(["date", "variable", "pool"], kind="stable")
+        .drop_duplicates(["date", "token"])[["date", "token"]]
+        .reset_index(drop=True)
+    )
 
-        df_primary_token.loc[index_token, "total_tvl"] = total_tvl
+    # Sum the tvl of the pools involving this token as token0 or token1, in
+    # pool order and once per pool
+    # TODO: potentially need to divide by 2 for V2
+    # definitely for V3 need to also check the calculation altogether
+    df_token = df_token.sort_values(["pool", "variable"], kind="stable")
+    df_token = df_token.drop_duplicates(["pool", "token"])
+    token_index = pd.MultiIndex.from_frame(df_primary_token[["date", "token"]])
+    codes = token_index.get_indexer(
+        pd.MultiIndex.from_frame(df_token[["date", "token"]])
+    )
+    df_primary_token["total_tvl"] = np.bincount(
+        codes, weights=df_token[tvl_symbol].to_numpy(float), minlength=len(token_index)
+    )
 
     return df_primary_token
 
 
-def get_node_flow(date, uni_version) -> pd.DataFrame:
+def build_node_flow(df_dir_volume: pd.DataFrame) -> pd.DataFrame:
     """
-    Get the inflow and outflow trading volume as the edges of the network from the volume dataset.
+    Build the inflow and outflow trading volume edges, token0 to token1 then
+    token1 to token0 for each pool, from a long volume dataset keyed by the
+    date column
     """
 
-    df_top50_pairs_dir_volume = load_volume_dataset(date, uni_version)
+    token0 = df_dir_volume["token0"].to_numpy()
+    token1 = df_dir_volume["token1"].to_numpy()
+
+    return pd.DataFrame(
+        {
+            "date": np.repeat(df_dir_volume["date"].to_numpy(), 2),
+            "Source": np.column_stack([token0, token1]).ravel(),
+            "Target": np.column_stack([token1, token0]).ravel(),
+            "Volume": np.column_stack(
+                [
+                    df_dir_volume["token0To1VolumeUSD"].to_numpy(),
+                    df_dir_volume["token1To0VolumeUSD"].to_numpy(),
+                ]
+            ).ravel(),
+        }
+    )
 
-    df_edge = pd.DataFrame()
 
-    for _, row_pool in df_top50_pairs_dir_volume.iterrows():
-        row_0to1 = pd.DataFrame(
-            {
-                "Source": [row_pool["token0"]],
-                "Target": [row_pool["token1"]],
-                "Volume": [row_pool["token0To1VolumeUSD"]],
-            }
-        )
+def get_primary_token_list(date: datetime.datetime, uni_version: str) -> pd.DataFrame:
+    """
+    Get the primary token list as the nodes of network from the volume dataset.
+    """
 
-        row_1to0 = pd.DataFrame(
-            {
-                "Source": [row_pool["token1"]],
-                "Target": [row_pool["token0"]],
-                "Volume": [row_pool["token1To0VolumeUSD"]],
-            }
-        )
+    df_top50_pairs_dir_volume = load_volume_dataset(date, uni_version).assign(date=date)
 
-        # Add a new row to the dataframe
-        df_edge = pd.concat([df_edge, row_0to1], ignore_index=True, axis=0)
-        df_edge = pd.concat([df_edge, row_1to0], ignore_index=True, axis=0)
+    return build_primary_token_list(df_top50_pairs_dir_volume, uni_version).drop(
+        columns="date"
+    )
 
-    return df_edge
 
+def get_node_flow(date, uni_version) -> pd.DataFrame:
+    """
+    Get the inflow and outflow trading volume as the edges of the network from the volume dataset.
+    """
 
-def prepare_network_data(target_date: datetime.datetime, uniswap_version: str) -> None:
+    df_top50_pairs_dir_volume = load_volume_dataset(date, uni_version).assign(date=date)
+
+    return build_node_flow(df_top50_pairs_dir_volume).drop(columns="date")
+
+
+def _save_network_data(
+    df_node_list: pd.DataFrame,
+    df_edge_list: pd.DataFrame,
+    target_date: datetime.datetime,
+    uniswap_version: str,
+) -> None:
     """
-    Prepare the network data and save to file
+    Save the node and edge lists of one date to file
     """
     # Initialize configuration
     config = Config()
 
-    df_node_list = get_primary_token_list(target_date, uniswap_version)
     # Write dataframe to csv
     target_date_str = target_date.strftime("%Y%m%d")
     node_file_name = path.join(
@@ -137,7 +175,6 @@ def prepare_network_data(target_date: datetime.datetime, uniswap_version: str) -
 
     df_node_list.to_csv(node_file_name)
 
-    df_edge_list = get_node_flow(target_date, uniswap_version)
     # Write dataframe to csv
     edge_file_name = path.join(
         config["dev"]["config"]["data"]["NETWORK_DATA_PATH"],
@@ -150,3 +187,53 @@ def prepare_network_data(target_date: datetime.datetime, uniswap_version: str) -
     )
 
     df_edge_list.to_csv(edge_file_name)
+
+
+def prepare_network_data(target_date: datetime.datetime, uniswap_version: str) -> None:
+    """
+    Prepare the network data and save to file
+    """
+
+    prepare_network_data_range([target_date], uniswap_version)
+
+
+def prepare_network_data_range(
+    date_list: list[datetime.datetime],
+    uniswap_version: str,
+    save: bool = True,
+    combined: bool = False,
+) -> (
+    dict[datetime.datetime, tuple[pd.DataFrame, pd.DataFrame]]
+    | tuple[pd.DataFrame, pd.DataFrame]
+):
+    """
+    Prepare the network data of a whole date range in one call, reading each
+    volume dataset once, and optionally save the daily files.
+
+    Returns the node and edge lists either per date, or with ``combined`` as
+    two long tables keyed by the date column.
+    """
+
+    df_dir_volume = load_volume_dataset_range(date_list, uniswap_version)
+    df_nodes = build_primary_token_list(df_dir_volume, uniswap_version)
+    df_edges = build_node_flow(df_dir_volume)
+
+    node_groups = dict(iter(df_nodes.groupby("date", sort=False)))
+    edge_groups = dict(iter(df_edges.groupby("date", sort=False)))
+    network_data = {}
+    for date in date_list:
+        df_node_list = (
+            node_groups[date].drop(columns="date").reset_index(drop=True)
+            if date in node_groups
+            else df_nodes.iloc[:0].drop(columns="date")
+        )
+        df_edge_list = (
+            edge_groups[date].drop(columns="date").reset_index(drop=True)
+            if date in edge_groups
+            else df_edges.iloc[:0].drop(columns="date")
+        )
+        if save:
+            _save_network_data(df_node_list, df_edge_list, date, uniswap_version)
+        network_data[date] = (df_node_list, df_edge_list)
+
+    return (df_nodes, df_edges) if combined else network_data
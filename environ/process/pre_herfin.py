@@ -5,10 +5,10 @@ Functions to prepare the herfin date series.
 import pandas as pd
 
 from environ.constants import HERFIN_VAR_INFO, PROCESSED_DATA_PATH, SAMPLE_PERIOD
-from environ.process.market.clique import df_clique
-from environ.process.market.cluster_coef import avg_cluster_df
-from environ.process.market.prepare_market_data import market_data
-from environ.process.market.trading_volume import df_volume
+from environ.process.market.clique import load_clique
+from environ.process.market.cluster_coef import load_cluster_coef
+from environ.process.market.prepare_market_data import load_market_data
+from environ.process.market.trading_volume import load_trading_volume
 from environ.tabulate.panel.panel_generator import _merge_boom_bust
 
 
@@ -35,7 +35,12 @@ def construct_herfin(
     herfin_panel = _merge_boom_bust(herfin_panel)
 
     # merge other time series
-    for market_df in [market_data, df_volume, avg_cluster_df, df_clique]:
+    for market_df in [
+        load_market_data(),
+        load_trading_volume(),
+        load_cluster_coef(),
+        load_clique(),
+    ]:
         herfin_panel = herfin_panel.merge(
             market_df,
             how="left",
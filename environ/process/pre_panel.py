@@ -12,12 +12,13 @@ from environ.constants import (
     PROCESSED_DATA_PATH,
     SAMPLE_PERIOD,
 )
-from environ.process.market.dollar_exchange_rate import dollar_df
-from environ.process.market.market_cap import mcap
-from environ.process.market.prepare_market_data import market_data
-from environ.process.market.stable_share import stable_share_df
+from environ.process.market.dollar_exchange_rate import load_dollar_exchange_rate
+from environ.process.market.market_cap import load_mcap
+from environ.process.market.prepare_market_data import load_market_data
+from environ.process.market.stable_share import load_stable_share
 from environ.tabulate.panel.panel_generator import _merge_boom_bust
 from environ.utils.data_loader import load_data
+from environ.utils.rolling_moments import rolling_corr
 from environ.utils.variable_constructer import (
     name_log_return_variable,
     return_vol,
@@ -63,7 +64,7 @@ def construct_panel(merge_on: list[str]) -> pd.DataFrame:
     ]
 
     # merge the other data such as dollar exchange rate
-    for df_name in [dollar_df, stable_share_df, mcap]:
+    for df_name in [load_dollar_exchange_rate(), load_stable_share(), load_mcap()]:
         panel_main = panel_main.merge(
             df_name,
             how="left",
@@ -72,7 +73,7 @@ def construct_panel(merge_on: list[str]) -> pd.DataFrame:
 
     # merge the market data
     panel_main = panel_main.merge(
-        market_data,
+        load_market_data(),
         how="left",
         on=["Date"],
     )
@@ -127,27 +128,23 @@ def construct_panel(merge_on: list[str]) -> pd.DataFrame:
         rolling_window_vol=rolling_window_std,
     )
 
-    grouped_reg_panel = panel_main.groupby("Token")
-
-    for k, w in {
+    # rolling correlation of the log return with each market log return,
+    # computed for all tokens at once
+    corr_var = {
         "corr_gas": "gas_price_usd",
         "corr_eth": "ether_price_usd",
         "corr_sp": "S&P",
-    }.items():
-        for group in grouped_reg_panel:
-            _, group_data = group
-
-            price_log_return = name_log_return_variable(w, rolling_window_return)
-
-            corr_gas = (
-                group_data[price_log_return]
-                .rolling(rolling_window_std)
-                .corr(group_data[variable_log_return])
-            )
-
-            # Set the 'corr_gas' values in the 'reg_panel' DataFrame
-            # using the indices of the 'group_data' DataFrame
-            panel_main.loc[corr_gas.index, k] = corr_gas
+    }
+    price_log_return = [
+        name_log_return_variable(w, rolling_window_return) for w in corr_var.values()
+    ]
+    corr = rolling_corr(
+        panel_main[price_log_return].to_numpy(dtype=float),
+        panel_main[[variable_log_return]].to_numpy(dtype=float),
+        rolling_window_std,
+        groups=panel_main["Token"].to_numpy(),
+    )
+    panel_main[list(corr_var)] = corr[:, :, 0]
 
     # merge boom bust cycles
     panel_main = _merge_boom_bust(panel_main)
@@ -0,0 +1,173 @@
+"""
+Module-level cache of the fitted regression models.
+
+A fit is keyed by a fingerprint of the panel columns it uses and by its
+specification: the dependent variable, the independent variables, the fixed
+effects and the robust standard errors. Only a compact summary of the fit is
+kept, in memory for the process and in ``<MODEL_CACHE_PATH>/<key>.json`` for
+later runs, which read it for ``MODEL_CACHE_TTL`` seconds.
+"""
+
+import hashlib
+import json
+import os
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+
+import linearmodels
+import pandas as pd
+import statsmodels
+
+from environ.constants import CACHE_PATH
+from environ.utils.atomic_io import atomic_write
+
+MODEL_CACHE_PATH: Path = CACHE_PATH / "regression"
+MODEL_CACHE_TTL = 60 * 60 * 24 * 7
+
+# Hashes of the values of the live indexes by id, dropped with their index.
+# The values of an index are immutable, so their hash holds for its lifetime,
+# but its names can be set in place and are hashed at each call
+_index_hashes: dict[int, str] = {}
+
+_model_cache: dict[str, "RegressionSummary"] = {}
+
+
+@dataclass
+class RegressionSummary:
+    """
+    Compact summary of a fitted model, as used by the regression tables
+    """
+
+    params: pd.Series
+    bse: pd.Series
+    pvalues: pd.Series
+    nobs: float
+    r2: float
+
+    @classmethod
+    def from_fit(cls, model_fit) -> "RegressionSummary":
+        """
+        Summarize a statsmodels or linearmodels fit
+        """
+
+        return cls(
+            params=model_fit.params,
+            bse=(
+                model_fit.std_errors
+                if hasattr(model_fit, "std_errors")
+                else model_fit.bse
+            ),
+            pvalues=model_fit.pvalues,
+            nobs=float(model_fit.nobs),
+            r2=float(model_fit.rsquared),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Return the summary as a JSON-serializable dict
+        """
+
+        return {
+            "names": list(self.params.index),
+            "params": self.params.tolist(),
+            "bse": self.bse.reindex(self.params.index).tolist(),
+            "pvalues": self.pvalues.reindex(self.params.index).tolist(),
+            "nobs": self.nobs,
+            "r2": self.r2,
+        }
+
+    @classmethod
+    def from_dict(cls, summary: dict) -> "RegressionSummary":
+        """
+        Rebuild a summary from its dict
+        """
+
+        index = pd.Index(summary["names"])
+        return cls(
+            params=pd.Series(summary["params"], index=index, dtype=float),
+            bse=pd.Series(summary["bse"], index=index, dtype=float),
+            pvalues=pd.Series(summary["pvalues"], index=index, dtype=float),
+            nobs=summary["nobs"],
+            r2=summary["r2"],
+        )
+
+
+def _index_hash(index: pd.Index) -> str:
+    """
+    Hash an index by its names and dtypes, and by its values hashed once for
+    its lifetime
+    """
+
+    key = id(index)
+    if key not in _index_hashes:
+        values_hash = pd.util.hash_pandas_object(index).to_numpy().tobytes()
+        _index_hashes[key] = hashlib.md5(values_hash).hexdigest()
+        weakref.finalize(index, _index_hashes.pop, key, None)
+
+    dtypes = index.dtypes if isinstance(index, pd.MultiIndex) else [index.dtype]
+    md5sum = hashlib.md5(repr(list(index.names)).encode("utf-8"))
+    md5sum.update(repr([str(dtype) for dtype in dtypes]).encode("utf-8"))
+    md5sum.update(_index_hashes[key].encode("utf-8"))
+    return md5sum.hexdigest()
+
+
+def panel_fingerprint(data: pd.DataFrame, columns: list[str]) -> str:
+    """
+    Fingerprint the index and the given columns of a panel, without hashing
+    the columns a regression does not use
+    """
+
+    md5sum = hashlib.md5(_index_hash(data.index).encode("utf-8"))
+    for column in dict.fromkeys(columns):
+        md5sum.update(repr((column, str(data[column].dtype))).encode("utf-8"))
+        md5sum.update(
+            pd.util.hash_pandas_object(data[column], index=False).to_numpy().tobytes()
+        )
+    return md5sum.hexdigest()
+
+
+def model_key(fingerprint: str, *spec) -> str:
+    """
+    Key a fit by the panel fingerprint, its specification and the versions of
+    the regression libraries
+    """
+
+    key = json.dumps(
+        [fingerprint, linearmodels.__version__, statsmodels.__version__, *spec]
+    )
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def get_model(key: str, cache_path: Path | None = None) -> RegressionSummary | None:
+    """
+    Return the cached summary of a fit, from memory or else from disk if
+    written less than ``MODEL_CACHE_TTL`` seconds ago
+    """
+
+    if key not in _model_cache:
+        summary_file = Path(cache_path or MODEL_CACHE_PATH) / f"{key}.json"
+        try:
+            if time.time() - os.path.getmtime(summary_file) >= MODEL_CACHE_TTL:
+                os.unlink(summary_file)
+                return None
+            with open(summary_file, "r", encoding="utf-8") as f:
+                _model_cache[key] = RegressionSummary.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+    return _model_cache[key]
+
+
+def put_model(
+    key: str, summary: RegressionSummary, cache_path: Path | None = None
+) -> None:
+    """
+    Cache the summary of a fit in memory and on disk
+    """
+
+    _model_cache[key] = summary
+    cache_path = Path(cache_path or MODEL_CACHE_PATH)
+    os.makedirs(cache_path, exist_ok=True)
+    with atomic_write(Path(cache_path) / f"{key}.json", "w", encoding="utf-8") as f:
+        json.dump(summary.to_dict(), f)
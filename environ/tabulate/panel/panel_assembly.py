@@ -0,0 +1,178 @@
+"""
+Declarative assembly of the regression panel from its daily data sources.
+
+Each source is a dict with the fields:
+    name: label of the source in the timing report
+    data_path: folder of the csv files
+    pattern: glob of the csv files, "*.csv" by default
+    name_column: column parsed from the file names, "Date" by default
+    name_parser: function parsing name_column from the file names
+    columns: columns read from the files, None for all of them
+    transform: function applied to the loaded frame, optional
+    rename_dict: columns renamed after the transform
+    data_col: columns kept besides Date and Token, None for all of them
+
+Sources sharing a folder, glob and file name column are read once. All
+sources are loaded concurrently, aligned on a shared (Date, Token) index and
+joined in one pass.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from environ.utils.data_loader import date_from_file_names, load_folder
+from environ.utils.info_logger import print_info_log
+
+PANEL_KEYS = ["Date", "Token"]
+
+
+def _read_key(source: dict) -> tuple[str, str, str]:
+    """
+    Return the files read by a source and the column named after them
+    """
+
+    return (
+        str(source["data_path"]),
+        source.get("pattern", "*.csv"),
+        source.get("name_column", "Date"),
+    )
+
+
+def _read_group(group: list[dict]) -> tuple[pd.DataFrame, float]:
+    """
+    Read the files shared by a group of sources, with the union of their
+    columns, and return the frame with the time taken
+    """
+
+    start = time.perf_counter()
+    data_path, pattern, name_column = _read_key(group[0])
+    columns = None
+    if all(source.get("columns") is not None for source in group):
+        columns = sorted({column for source in group for column in source["columns"]})
+    frame = load_folder(
+        data_path,
+        columns=columns,
+        pattern=pattern,
+        name_column=name_column,
+        name_parser=group[0].get("name_parser", date_from_file_names),
+    )
+    return frame, time.perf_counter() - start
+
+
+def load_sources(
+    sources: list[dict], max_workers: int | None = None
+) -> tuple[dict[str, pd.DataFrame], dict[str, float]]:
+    """
+    Load the sources concurrently as frames with the Date and Token columns
+    and their data columns.
+
+    Returns the frames and the load times, by source name.
+    """
+
+    groups = {}
+    for source in sources:
+        groups.setdefault(_read_key(source), []).append(source)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_read_group, groups.values()))
+
+    frames, load_times = {}, {}
+    for group, (frame, read_time) in zip(groups.values(), results):
+        for source in group:
+            start = time.perf_counter()
+            df_source = frame
+            if source.get("transform") is not None:
+                df_source = source["transform"](df_source)
+            df_source = df_source.rename(columns=source.get("rename_dict", {}))
+            data_col = source.get("data_col")
+            frames[source["name"]] = df_source[
+                [
+                    column
+                    for column in df_source.columns
+                    if column in PANEL_KEYS
+                    or (column in data_col if data_col is not None else True)
+                ]
+            ]
+            load_times[source["name"]] = read_time + time.perf_counter() - start
+
+    return frames, load_times
+
+
+def join_sources(
+    frames: dict[str, pd.DataFrame]
+) -> tuple[pd.DataFrame, dict[str, float]]:
+    """
+    Outer join the source frames on Date and Token in one pass. The keys of
+    all sources are coded against shared sorted Date and Token categories,
+    and the columns of each source are placed at the positions of its codes
+    in the union of the codes. The rows are sorted by Date and Token.
+
+    Returns the panel and the join times, by source name.
+    """
+
+    dates = pd.Index(
+        np.concatenate([frame["Date"].to_numpy() for frame in frames.values()])
+    ).unique().sort_values()
+    tokens = pd.Index(
+        np.concatenate(
+            [frame["Token"].to_numpy(dtype=object) for frame in frames.values()]
+        )
+    ).unique().sort_values()
+
+    codes = {}
+    for name, frame in frames.items():
+        codes[name] = dates.get_indexer(frame["Date"]).astype("int64") * len(
+            tokens
+        ) + tokens.get_indexer(frame["Token"])
+        if pd.Series(codes[name]).duplicated().any():
+            raise ValueError(f"{name} has several rows for one Date and Token")
+    union = np.unique(np.concatenate(list(codes.values())))
+
+    key_values = {
+        "Date": dates.take(union // len(tokens)),
+        "Token": tokens.take(union % len(tokens)),
+    }
+    columns, join_times = {}, {}
+    for i, (name, frame) in enumerate(frames.items()):
+        start = time.perf_counter()
+        values = frame.drop(columns=PANEL_KEYS).reset_index(drop=True)
+        if len(values) < len(union):
+            # Label -1 is missing from the values, leaving the row empty
+            indexer = np.full(len(union), -1, dtype="int64")
+            indexer[np.searchsorted(union, codes[name])] = np.arange(len(values))
+            values = values.reindex(indexer)
+        else:
+            values = values.take(np.argsort(codes[name]))
+        for column in frame.columns:
+            if column in PANEL_KEYS:
+                # The first source sets the position of the keys
+                if i == 0:
+                    columns[column] = key_values[column]
+            else:
+                columns[column] = values[column].to_numpy()
+        join_times[name] = time.perf_counter() - start
+
+    return pd.DataFrame(columns), join_times
+
+
+def assemble_panel(sources: list[dict], max_workers: int | None = None) -> pd.DataFrame:
+    """
+    Load the panel sources concurrently, join them on Date and Token in one
+    pass and report the load and join time of each source
+    """
+
+    frames, load_times = load_sources(sources, max_workers)
+    panel, join_times = join_sources(frames)
+
+    for name, frame in frames.items():
+        print_info_log(
+            f"{name}: {len(frame)} rows, load {load_times[name]:.2f}s, "
+            f"join {join_times[name]:.3f}s",
+            "panel",
+        )
+    print_info_log(f"Panel of {len(panel)} rows from {len(frames)} sources", "panel")
+
+    return panel
@@ -9,13 +9,15 @@ Desc    : Generate the panel for regression.
 
 """
 
-import glob
+from typing import Callable
+
 import pandas as pd
 import numpy as np
-from environ.process.market.boom_bust import BOOM_BUST
+from environ.process.market.boom_bust import load_boom_bust
+from environ.tabulate.panel.panel_assembly import assemble_panel
 from environ.utils.config_parser import Config
 from environ.utils.boom_calculator import is_boom
-import matplotlib.dates as md
+from environ.utils.rolling_moments import rolling_corr, rolling_std
 
 # Initialize config
 config = Config()
@@ -31,434 +33,134 @@ TOKEN_LIB_V3_TOKEN = config["dev"]["config"]["token_library"]["v3"]["token"]
 TOKEN_LIB_V3_STABLE = config["dev"]["config"]["token_library"]["v3"]["stable"]
 
 
-def _merge_volume_share() -> pd.DataFrame:
+def _compound_token(file_names: pd.Series) -> pd.Series:
     """
-    Merge volume share data.
+    Parse the token of the compound files, as in ``compound_ETH_processed.csv``,
+    naming ETH as WETH
     """
-    reg_panel = []
-
-    # combine all csv files in data/data_network/merged/volume_share.
-    # each csv file's title contains the date, and has columes: Token, Volume, and has row number
-    # the new combined dataframe has colume: Date, Token, Volume
-
-    # get all csv files in data/data_network/merged/volume_share
-    path = rf"{NETWORK_DATA_PATH}/merged/volume_share"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        df_vol_share = pd.read_csv(filename, index_col=None, header=0)
-        date = filename.split("_")[-1].split(".")[0]
-        df_vol_share["Date"] = date
-        list_df.append(df_vol_share)
-
-    # combine all csv files into one dataframe
-    reg_panel = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date to datetime
-    reg_panel["Date"] = pd.to_datetime(reg_panel["Date"], format="%Y%m%d")
-
-    # drop the column "Unnamed: 0"
-    reg_panel = reg_panel.drop(columns=["Unnamed: 0"])
-
-    # rename the Volume column to Volume_share
-    reg_panel = reg_panel.rename(columns={"Volume": "Volume_share"})
-
-    return reg_panel
-
-
-def _merge_volume_in_share(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge volume in share data.
-    """
-
-    # combine all csv files in data/data_network/merged/volume_in_share.
-    # each csv file's title contains the date, and has columes: Token, Volume, and has row number
-    # the new combined dataframe has colume: Date, Token, Volume
-
-    # get all csv files in data/data_network/merged/volume_in_share
-    path = rf"{NETWORK_DATA_PATH}/merged/volume_in_share"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        df_vol_in_share = pd.read_csv(filename, index_col=None, header=0)
-        date = filename.split("_")[-1].split(".")[0]
-        df_vol_in_share["Date"] = date
-        list_df.append(df_vol_in_share)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date to datetime
-    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y%m%d")
-
-    # drop the column "Unnamed: 0"
-    frame = frame.drop(columns=["Unnamed: 0"])
-
-    # rename the Volume column to volume_in_share
-    frame = frame.rename(columns={"Volume": "volume_in_share"})
 
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(
-        reg_panel, frame, how="outer", on=["Date", "Token"], sort=False
-    )
+    return file_names.str.split("_").str[-2].replace("ETH", "WETH")
 
-    return reg_panel
 
-
-def _merge_volume_out_share(reg_panel: pd.DataFrame) -> pd.DataFrame:
+def _prepare_compound(frame: pd.DataFrame) -> pd.DataFrame:
     """
-    Merge volume out share data.
+    Skip the token WBTC2 and convert the compound dates in "YYYY-MM-DD"
     """
 
-    # combine all csv files in data/data_network/merged/volume_out_share.
-    # each csv file's title contains the date, and has columes: Token, Volume, and has row number
-    # the new combined dataframe has colume: Date, Token, Volume
-
-    # get all csv files in data/data_network/merged/volume_out_share
-    path = rf"{NETWORK_DATA_PATH}/merged/volume_out_share"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        df_vol_out_share = pd.read_csv(filename, index_col=None, header=0)
-        date = filename.split("_")[-1].split(".")[0]
-        df_vol_out_share["Date"] = date
-        list_df.append(df_vol_out_share)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date to datetime
-    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y%m%d")
-
-    # drop the column "Unnamed: 0"
-    frame = frame.drop(columns=["Unnamed: 0"])
-
-    # rename the Volume column to volume_out_share
-    frame = frame.rename(columns={"Volume": "volume_out_share"})
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(
-        reg_panel, frame, how="outer", on=["Date", "Token"], sort=False
-    )
-
-    return reg_panel
-
-
-def _merge_compound_rate(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge compound rate data.
-    """
-
-    path = rf"{COMPOUND_DATA_PATH}"  # use your path
-    all_files = glob.glob(path + "/*_processed.csv")
-
-    # merge all csv files into one dataframe with token name in the file name as the primary key
-    list_df = []
-    for filename in all_files:
-        df_comp_rate = pd.read_csv(filename, index_col=None, header=0)
-        token = filename.split("_")[-2]
-        # skip the file with token name "WBTC2"
-        if token == "WBTC2":
-            continue
-
-        if token == "ETH":
-            df_comp_rate["token"] = "WETH"
-        else:
-            df_comp_rate["token"] = token
-
-        list_df.append(df_comp_rate)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date in "YYYY-MM-DD" to datetime
-    frame["block_timestamp"] = pd.to_datetime(
-        frame["block_timestamp"], format="%Y-%m-%d"
-    )
-
-    # rename the column "block_timestamp" to "Date"
-    frame = frame.rename(columns={"block_timestamp": "Date"})
-    frame = frame.rename(columns={"token": "Token"})
-
-    # only keep the columne "borrow_rate" and "supply_rates" and block_timestamp and token
-    frame = frame[["Date", "Token", "borrow_rate", "supply_rates"]]
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    return reg_panel
-
-
-def _merge_compound_supply_share(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge compound supply share data.
-    """
-
-    # combine all csv files with "_processed" at the end
-    # of the name in data/data_compound into a panel dataset.
-    # each csv file's title contains the date, and has columes: Token, Borrow, and has row number
-    # the new combined dataframe has colume: Date, Token, Borrow
-    # get all csv files in data/data_compound
-    path = rf"{COMPOUND_DATA_PATH}"  # use your path
-    all_files = glob.glob(path + "/*_processed.csv")
-
-    # merge all csv files into one dataframe with token name in the file name as the primary key
-    list_df = []
-    for filename in all_files:
-        df_comp_share = pd.read_csv(filename, index_col=None, header=0)
-        token = filename.split("_")[-2]
-        # skip the file with token name "WBTC2"
-        if token == "WBTC2":
-            continue
-
-        if token == "ETH":
-            df_comp_share["token"] = "WETH"
-        else:
-            df_comp_share["token"] = token
-
-        list_df.append(df_comp_share)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # calculate the supply share of each token each day
-    frame["total_supply_usd"] = frame["total_supply_usd"].astype(float)
-    frame["total_supply"] = frame.groupby("block_timestamp")[
-        "total_supply_usd"
-    ].transform("sum")
-    frame["total_supply_usd"] = frame["total_supply_usd"] / frame["total_supply"]
-    frame = frame.drop(columns=["total_supply"])
-
-    # convert date in "YYYY-MM-DD" to datetime
-    frame["block_timestamp"] = pd.to_datetime(
-        frame["block_timestamp"], format="%Y-%m-%d"
-    )
-
-    # rename the column "block_timestamp" to "Date"
-    frame = frame.rename(columns={"block_timestamp": "Date"})
-    frame = frame.rename(columns={"token": "Token"})
-    frame = frame.rename(columns={"total_supply_usd": "Supply_share"})
-
-    # only keep columnes of "Date", "Token", "Borrow_share"
-    frame = frame[["Date", "Token", "Supply_share"]]
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    return reg_panel
-
-
-def _merge_compound_borrow_share(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge compound borrow share data.
-    """
-
-    # combine all csv files with "_processed" at the end
-    # of the name in data/data_compound into a panel dataset.
-    # each csv file's title contains the date, and has columes: Token, Borrow, and has row number
-    # the new combined dataframe has colume: Date, Token, Borrow
-    # get all csv files in data/data_compound
-    path = rf"{COMPOUND_DATA_PATH}"  # use your path
-    all_files = glob.glob(path + "/*_processed.csv")
-
-    # merge all csv files into one dataframe with token name in the file name as the primary key
-    list_df = []
-    for filename in all_files:
-        df_comp_share = pd.read_csv(filename, index_col=None, header=0)
-        token = filename.split("_")[-2]
-        # skip the file with token name "WBTC2"
-        if token == "WBTC2":
-            continue
-
-        if token == "ETH":
-            df_comp_share["token"] = "WETH"
-        else:
-            df_comp_share["token"] = token
-
-        list_df.append(df_comp_share)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # calculate the supply share of each token each day
-    frame["total_borrow_usd"] = frame["total_borrow_usd"].astype(float)
-    frame["total_borrow"] = frame.groupby("block_timestamp")[
-        "total_borrow_usd"
-    ].transform("sum")
-    frame["total_borrow_usd"] = frame["total_borrow_usd"] / frame["total_borrow"]
-    frame = frame.drop(columns=["total_borrow"])
-
-    # convert date in "YYYY-MM-DD" to datetime
-    frame["block_timestamp"] = pd.to_datetime(
-        frame["block_timestamp"], format="%Y-%m-%d"
+    frame = frame[frame["token"] != "WBTC2"]
+    return frame.assign(
+        block_timestamp=pd.to_datetime(frame["block_timestamp"], format="%Y-%m-%d")
     )
 
-    # rename the column "block_timestamp" to "Date"
-    frame = frame.rename(columns={"block_timestamp": "Date"})
-    frame = frame.rename(columns={"token": "Token"})
-    frame = frame.rename(columns={"total_borrow_usd": "Borrow_share"})
-
-    # only keep columnes of "Date", "Token", "Borrow_share"
-    frame = frame[["Date", "Token", "Borrow_share"]]
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    return reg_panel
-
-
-def _merge_tvl_share(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge tvl share data.
-    """
-
-    # get all csv files in data/data_network/merged/volume_share
-    path = rf"{NETWORK_DATA_PATH}/merged/tvl_share"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        df_tvl_share = pd.read_csv(filename, index_col=None, header=0)
-        date = filename.split("_")[-1].split(".")[0]
-        df_tvl_share["Date"] = date
-        list_df.append(df_tvl_share)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date in "YYYYMMDD" to datetime
-    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y%m%d")
-
-    # rename the column "token" to "Token"
-    frame = frame.rename(columns={"token": "Token"})
-    frame = frame.rename(columns={"total_tvl": "TVL_share"})
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    return reg_panel
-
-
-def _merge_in_centrality(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge inflow eigenvector centrality data.
-    """
-
-    # get all csv files in data/data_network/merged/inflow_centrality
-    path = rf"{NETWORK_DATA_PATH}/merged/inflow_centrality"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        df_in_cent = pd.read_csv(filename, index_col=None, header=0)
-        date = filename.split("_")[-1].split(".")[0]
-        df_in_cent["Date"] = date
-        list_df.append(df_in_cent)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date in "YYYYMMDD" to datetime
-    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y%m%d")
-
-    # rename the column "token" to "Token"
-    frame = frame.rename(columns={"token": "Token"})
-    frame = frame.rename(columns={"eigenvector_centrality": "Inflow_centrality"})
-
-    # only keep columnes of "Date", "Token", "Inflow_centrality"
-    frame = frame[["Date", "Token", "Inflow_centrality"]]
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    return reg_panel
-
-
-def _merge_out_centrality(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge outflow eigenvector centrality data.
-    """
-
-    # get all csv files in data/data_network/merged/outflow_centrality
-    path = rf"{NETWORK_DATA_PATH}/merged/outflow_centrality"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        df_out_cent = pd.read_csv(filename, index_col=None, header=0)
-        date = filename.split("_")[-1].split(".")[0]
-        df_out_cent["Date"] = date
-        list_df.append(df_out_cent)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date in "YYYYMMDD" to datetime
-    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y%m%d")
-
-    # rename the column "token" to "Token"
-    frame = frame.rename(columns={"token": "Token"})
-    frame = frame.rename(columns={"eigenvector_centrality": "Outflow_centrality"})
-
-    # only keep columnes of "Date", "Token", "Outflow_centrality"
-    frame = frame[["Date", "Token", "Outflow_centrality"]]
 
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    # rename the column "token" to "Token"
-    reg_panel = reg_panel.rename(columns={"token": "Token"})
-
-    return reg_panel
-
-
-def _merge_betweenness(reg_panel: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge betweenness centrality data.
-    """
-
-    # get all csv files in data/data_betweenness/betweenness
-    path = rf"{BETWEENNESS_DATA_PATH}/betweenness"  # use your path
-    all_files = glob.glob(path + "/*.csv")
-
-    # extract date from file name
-    # combine data from all csv files into one dataframe, dropping row number of each csv file
-    list_df = []
-    for filename in all_files:
-        if filename.split("_")[-2].split(".")[0] == "v2v3":
-            df_between = pd.read_csv(filename, index_col=None, header=0)
-            date = filename.split("_")[-1].split(".")[0]
-            df_between["Date"] = date
-            list_df.append(df_between)
-
-    # combine all csv files into one dataframe
-    frame = pd.concat(list_df, axis=0, ignore_index=True)
-
-    # convert date in "YYYYMMDD" to datetime
-    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y%m%d")
-
-    # rename the column "node" to "Token"
-    frame = frame.rename(columns={"node": "Token"})
-
-    # merge the two dataframe into one panel dataset via outer join
-    reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
-
-    return reg_panel
+def _compound_share(column: str) -> Callable[[pd.DataFrame], pd.DataFrame]:
+    """
+    Return the transform computing the daily share of each token in a
+    compound total, such as the total supply in USD
+    """
+
+    def transform(frame: pd.DataFrame) -> pd.DataFrame:
+        frame = _prepare_compound(frame)
+        total = frame[column].astype(float)
+        return frame.assign(
+            **{column: total / total.groupby(frame["block_timestamp"]).transform("sum")}
+        )
+
+    return transform
+
+
+COMPOUND_RENAME_DICT = {"block_timestamp": "Date", "token": "Token"}
+
+# Daily sources joined on Date and Token into the panel
+PANEL_SOURCES = [
+    {
+        "name": "volume_share",
+        "data_path": f"{NETWORK_DATA_PATH}/merged/volume_share",
+        "columns": ["Token", "Volume"],
+        "rename_dict": {"Volume": "Volume_share"},
+        "data_col": ["Volume_share"],
+    },
+    {
+        "name": "volume_in_share",
+        "data_path": f"{NETWORK_DATA_PATH}/merged/volume_in_share",
+        "columns": ["Token", "Volume"],
+        "rename_dict": {"Volume": "volume_in_share"},
+        "data_col": ["volume_in_share"],
+    },
+    {
+        "name": "volume_out_share",
+        "data_path": f"{NETWORK_DATA_PATH}/merged/volume_out_share",
+        "columns": ["Token", "Volume"],
+        "rename_dict": {"Volume": "volume_out_share"},
+        "data_col": ["volume_out_share"],
+    },
+    {
+        "name": "compound_rate",
+        "data_path": COMPOUND_DATA_PATH,
+        "pattern": "*_processed.csv",
+        "name_column": "token",
+        "name_parser": _compound_token,
+        "columns": ["block_timestamp", "borrow_rate", "supply_rates"],
+        "transform": _prepare_compound,
+        "rename_dict": COMPOUND_RENAME_DICT,
+        "data_col": ["borrow_rate", "supply_rates"],
+    },
+    {
+        "name": "compound_supply_share",
+        "data_path": COMPOUND_DATA_PATH,
+        "pattern": "*_processed.csv",
+        "name_column": "token",
+        "name_parser": _compound_token,
+        "columns": ["block_timestamp", "total_supply_usd"],
+        "transform": _compound_share("total_supply_usd"),
+        "rename_dict": {**COMPOUND_RENAME_DICT, "total_supply_usd": "Supply_share"},
+        "data_col": ["Supply_share"],
+    },
+    {
+        "name": "compound_borrow_share",
+        "data_path": COMPOUND_DATA_PATH,
+        "pattern": "*_processed.csv",
+        "name_column": "token",
+        "name_parser": _compound_token,
+        "columns": ["block_timestamp", "total_borrow_usd"],
+        "transform": _compound_share("total_borrow_usd"),
+        "rename_dict": {**COMPOUND_RENAME_DICT, "total_borrow_usd": "Borrow_share"},
+        "data_col": ["Borrow_share"],
+    },
+    {
+        "name": "tvl_share",
+        "data_path": f"{NETWORK_DATA_PATH}/merged/tvl_share",
+        "rename_dict": {"token": "Token", "total_tvl": "TVL_share"},
+        "data_col": None,
+    },
+    {
+        "name": "inflow_centrality",
+        "data_path": f"{NETWORK_DATA_PATH}/merged/inflow_centrality",
+        "columns": ["token", "eigenvector_centrality"],
+        "rename_dict": {
+            "token": "Token",
+            "eigenvector_centrality": "Inflow_centrality",
+        },
+        "data_col": ["Inflow_centrality"],
+    },
+    {
+        "name": "outflow_centrality",
+        "data_path": f"{NETWORK_DATA_PATH}/merged/outflow_centrality",
+        "columns": ["token", "eigenvector_centrality"],
+        "rename_dict": {
+            "token": "Token",
+            "eigenvector_centrality": "Outflow_centrality",
+        },
+        "data_col": ["Outflow_centrality"],
+    },
+    {
+        "name": "betweenness",
+        "data_path": f"{BETWEENNESS_DATA_PATH}/betweenness",
+        "pattern": "*_v2v3_*.csv",
+        "rename_dict": {"node": "Token"},
+        "data_col": None,
+    },
+]
 
 
 def _merge_prc_gas(reg_panel: pd.DataFrame) -> pd.DataFrame:
@@ -547,78 +249,36 @@ def _merge_prc_gas(reg_panel: pd.DataFrame) -> pd.DataFrame:
     # # reset the index of ret
     # ret = ret.reset_index()
 
-    # copy the ret as a new dataframe named cov
-    cov_gas = ret.copy()
-    cov_eth = ret.copy()
-    cov_sp = ret.copy()
-    std = ret.copy()
-
-    # # set the Date column as index
-    # ret = ret.set_index("Date")
-    # std = std.set_index("Date")
-
-    # sort the dataframe by ascending Date for cov_gas, cov_eth and cov_sp
+    # sort the dataframe by ascending Date
     ret = ret.sort_values(by="Date", ascending=True)
-    cov_gas = cov_gas.sort_values(by="Date", ascending=True)
-    cov_eth = cov_eth.sort_values(by="Date", ascending=True)
-    cov_sp = cov_sp.sort_values(by="Date", ascending=True)
-    std = std.sort_values(by="Date", ascending=True)
 
-    # calcuate the covariance between past 30 days log
-    # return of each column in col and that of Gas_fee
-    for i in col:
-        cov_gas[i] = cov_gas[i].rolling(30).corr(cov_gas["Gas_fee"])
-
-    # calcuate the covariance between past 30 days log
-    # return of each column in col and that of ETH_price
-    for i in col:
-        cov_eth[i] = cov_eth[i].rolling(30).corr(cov_eth["ETH_price"])
-
-    # caculate the covariance between past 30 days log
-    # return of each column in col and that of S&P
-    for i in col:
-        cov_sp[i] = cov_sp[i].rolling(30).corr(cov_sp["S&P"])
-
-    # calculate the standard deviation of each column in col
-    for i in col:
-        std[i] = std[i].rolling(30).std()
-
-    # drop the Gas_fee and ETH_price and S&P500 columns for ret and cov
-    ret = ret.drop(columns=["Gas_fee", "ETH_price", "S&P"])
-    cov_gas = cov_gas.drop(columns=["Gas_fee", "ETH_price", "S&P"])
-    cov_eth = cov_eth.drop(columns=["Gas_fee", "ETH_price", "S&P"])
-    cov_sp = cov_sp.drop(columns=["Gas_fee", "ETH_price", "S&P"])
-    std = std.drop(columns=["Gas_fee", "ETH_price", "S&P"])
+    # calculate the 30-day rolling correlation between the log return of
+    # each column in col and that of Gas_fee, ETH_price and S&P, and the
+    # 30-day rolling standard deviation of each column in col
+    values = ret[col].to_numpy(dtype=float)
+    corr = rolling_corr(
+        values, ret[["Gas_fee", "ETH_price", "S&P"]].to_numpy(dtype=float), 30
+    )
+    measures = {
+        "log_return": values,
+        "corr_gas": corr[:, :, 0],
+        "corr_eth": corr[:, :, 1],
+        "corr_sp": corr[:, :, 2],
+        "std": rolling_std(values, 30),
+    }
     gas = gas.drop(columns=["ETH_price"])
 
-    # ret and cov to panel dataset, column: Date, Token, log return and covariance
-    ret = ret.stack().reset_index()
-    cov_gas = cov_gas.stack().reset_index()
-    cov_eth = cov_eth.stack().reset_index()
-    cov_sp = cov_sp.stack().reset_index()
-    std = std.stack().reset_index()
-
-    # rename the column "level_1" to "Token"
-    ret = ret.rename(columns={"level_1": "Token"})
-    cov_gas = cov_gas.rename(columns={"level_1": "Token"})
-    cov_eth = cov_eth.rename(columns={"level_1": "Token"})
-    cov_sp = cov_sp.rename(columns={"level_1": "Token"})
-    std = std.rename(columns={"level_1": "Token"})
-
-    # rename the column "0" to "log_return" and "0" to "covariance"
-    ret = ret.rename(columns={0: "log_return"})
-    cov_gas = cov_gas.rename(columns={0: "corr_gas"})
-    cov_eth = cov_eth.rename(columns={0: "corr_eth"})
-    cov_sp = cov_sp.rename(columns={0: "corr_sp"})
-    std = std.rename(columns={0: "std"})
+    # convert each measure to panel dataset, column: Date, Token, measure,
+    # and merge them via outer join on "Date" and "Token"
+    for name, measure in measures.items():
+        frame = (
+            pd.DataFrame(measure, index=ret.index, columns=col)
+            .stack()
+            .reset_index()
+            .rename(columns={"level_1": "Token", 0: name})
+        )
+        reg_panel = pd.merge(reg_panel, frame, how="outer", on=["Date", "Token"])
 
-    # merge the ret, cov_gas, cov_eth, cov_sp dataframe into
-    # one panel dataset via outer join on "Date" and "Token
-    reg_panel = pd.merge(reg_panel, ret, how="outer", on=["Date", "Token"])
-    reg_panel = pd.merge(reg_panel, cov_gas, how="outer", on=["Date", "Token"])
-    reg_panel = pd.merge(reg_panel, cov_eth, how="outer", on=["Date", "Token"])
-    reg_panel = pd.merge(reg_panel, cov_sp, how="outer", on=["Date", "Token"])
-    reg_panel = pd.merge(reg_panel, std, how="outer", on=["Date", "Token"])
     reg_panel = pd.merge(reg_panel, gas, how="outer", on=["Date"])
 
     # drop the unnecessary column "Unnamed: 0"
@@ -863,12 +523,15 @@ def _merge_avg_eigenvec(reg_panel: pd.DataFrame) -> pd.DataFrame:
 
 
 def _merge_boom_bust(
-    reg_panel: pd.DataFrame, boom_bust: list = BOOM_BUST
+    reg_panel: pd.DataFrame, boom_bust: list | None = None
 ) -> pd.DataFrame:
     """
-    Function to merge the boom and bust dummy.
+    Function to merge the boom and bust dummy, by default of the S&P cycles.
     """
 
+    if boom_bust is None:
+        boom_bust = load_boom_bust()
+
     reg_panel["is_boom"] = reg_panel["Date"].apply(
         lambda x: is_boom(boom_bust_list=boom_bust, time=x)
     )
@@ -882,16 +545,7 @@ def generate_panel() -> pd.DataFrame:
     """
 
     # Merge the panel dataset with the volume, share, centrality and betweenness
-    reg_panel = _merge_volume_share()
-    reg_panel = _merge_volume_in_share(reg_panel)
-    reg_panel = _merge_volume_out_share(reg_panel)
-    reg_panel = _merge_compound_rate(reg_panel)
-    reg_panel = _merge_compound_supply_share(reg_panel)
-    reg_panel = _merge_compound_borrow_share(reg_panel)
-    reg_panel = _merge_tvl_share(reg_panel)
-    reg_panel = _merge_in_centrality(reg_panel)
-    reg_panel = _merge_out_centrality(reg_panel)
-    reg_panel = _merge_betweenness(reg_panel)
+    reg_panel = assemble_panel(PANEL_SOURCES)
     reg_panel = _merge_prc_gas(reg_panel)
     reg_panel = _merge_nonstable(reg_panel)
     reg_panel = _merge_isweth(reg_panel)
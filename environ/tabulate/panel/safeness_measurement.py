@@ -5,9 +5,9 @@ Functions to construct value stores proxies for Panel.
 import warnings
 import pandas as pd
 import numpy as np
-from tqdm import tqdm
 from environ.utils.config_parser import Config
 from environ.utils.info_logger import print_info_log
+from environ.utils.rolling_moments import rolling_beta, rolling_corr, rolling_mean
 
 # ignore the warnings
 warnings.filterwarnings("ignore")
@@ -113,20 +113,14 @@ def _beta(reg_panel: pd.DataFrame) -> pd.DataFrame:
     # sort the dataframe by date
     ret = ret.sort_values(by=["Date"], ascending=True)
 
-    for i in col:
-        rolling_cov = ret[i].rolling(30).cov(ret["S&P"])
-        rolling_var = ret["S&P"].rolling(30).var()
-        rolling_beta = rolling_cov / rolling_var
-        ret[f"{i}_beta"] = rolling_beta
-
-    # set the date as index
-    ret = ret.set_index("Date")
-
-    # drop the columns in col and "S&P" and "RF"
-    ret = ret.drop(columns=col + ["S&P", "RF"])
-
-    # rename the columns to the original token name
-    ret = ret.rename(columns={f"{col_name}_beta": col_name for col_name in col})
+    # calculate the 30-day rolling beta of each column in col on the S&P
+    ret = pd.DataFrame(
+        rolling_beta(
+            ret[col].to_numpy(dtype=float), ret[["S&P"]].to_numpy(dtype=float), 30
+        )[:, :, 0],
+        index=pd.Index(ret["Date"], name="Date"),
+        columns=col,
+    )
 
     # convert the dataframe to panel dataset
     ret = ret.stack().reset_index()
@@ -191,8 +185,9 @@ def _sentiment(reg_panel: pd.DataFrame) -> pd.DataFrame:
     ret = ret.apply(lambda x: (np.log(x) - np.log(x.shift(1))))
 
     # caculate the covariance between past 30 days
-    for col_name in col:
-        ret[col_name] = ret[col_name].rolling(30).corr(ret["sentiment"])
+    ret[col] = rolling_corr(
+        ret[col].to_numpy(dtype=float), ret[["sentiment"]].to_numpy(dtype=float), 30
+    )[:, :, 0]
 
     # drop the column "sentiment"
     cov_stm = ret.drop(columns=["sentiment"])
@@ -250,8 +245,7 @@ def _rolling_average_return(reg_panel: pd.DataFrame) -> pd.DataFrame:
     ret = ret.replace([np.inf, -np.inf], np.nan)
 
     # get the 30-day rolling average return of each token
-    for col_name in tqdm(col):
-        ret[col_name] = ret[col_name].rolling(30).mean()
+    ret[col] = rolling_mean(ret[col].to_numpy(dtype=float), 30)
 
     # drop Unnamed: 0 column
     ret = ret.drop(columns=["Unnamed: 0"])
@@ -0,0 +1,292 @@
+"""
+Fitting of the regression specifications of the tables, in parallel.
+
+The columns of the panels used by the specifications not cached yet are
+written once to memory-mapped ``.npy`` files, which the worker processes of a
+pool open instead of receiving the panel pickled with each task. The fitted
+summaries are put in the model cache, from which the tables then render.
+"""
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from linearmodels.panel import PanelOLS
+
+from environ.tabulate.model_cache import (
+    RegressionSummary,
+    get_model,
+    model_key,
+    panel_fingerprint,
+    put_model,
+)
+from environ.utils.info_logger import print_info_log
+
+# Panels opened by a worker process, by panel number, with their frames of
+# the columns of each specification
+_worker_panels: dict[int, dict] = {}
+_worker_frames: dict[tuple, pd.DataFrame] = {}
+
+
+def regression_columns(
+    data: pd.DataFrame,
+    dv: str,
+    iv: list[str],
+    panel_index_columns: tuple[list[str], list[bool]] | None = None,
+) -> list[str]:
+    """
+    Return the columns of a panel a regression uses, the panel index columns
+    first
+    """
+
+    columns = [dv, *iv]
+    if panel_index_columns:
+        columns = [
+            column for column in panel_index_columns[0] if column in data.columns
+        ] + columns
+    return list(dict.fromkeys(columns))
+
+
+def regression_key(
+    data: pd.DataFrame,
+    dv: str,
+    iv: list[str],
+    robust: bool = False,
+    panel_index_columns: tuple[list[str], list[bool]] | None = None,
+) -> str:
+    """
+    Key a regression by the panel columns it uses and its specification
+    """
+
+    return model_key(
+        panel_fingerprint(data, regression_columns(data, dv, iv, panel_index_columns)),
+        dv,
+        list(iv),
+        panel_index_columns,
+        robust,
+    )
+
+
+def fit_regression(
+    data: pd.DataFrame,
+    dv: str,
+    iv: list[str],
+    robust: bool = False,
+    panel_index_columns: tuple[list[str], list[bool]] | None = None,
+) -> RegressionSummary:
+    """
+    Fit the fixed-effect regression, PanelOLS with the panel index columns
+    or else OLS, and summarize it
+    """
+
+    if panel_index_columns:
+        data = (
+            data[regression_columns(data, dv, iv, panel_index_columns)]
+            .reset_index()
+            .set_index(panel_index_columns[0])
+        )
+
+    # Define the dependent variable
+    dependent_var = data[dv]
+
+    # Define the independent variables
+    independent_var = data[iv]
+
+    # Run the fixed-effect regression
+    if panel_index_columns:
+        model = PanelOLS(
+            dependent_var,
+            independent_var,
+            entity_effects=panel_index_columns[1][0],
+            time_effects=panel_index_columns[1][1],
+            drop_absorbed=True,
+            check_rank=False,
+        )
+        if robust:
+            model_fit = model.fit(cov_type="kernel", kernel="newey-west")
+        else:
+            model_fit = model.fit()
+    else:
+        model = sm.OLS(dependent_var, independent_var, missing="drop")
+        if robust:
+            model_fit = model.fit(cov_type="HAC", cov_kwds={"maxlags": 1})
+        else:
+            model_fit = model.fit()
+
+    return RegressionSummary.from_fit(model_fit)
+
+
+def _exported_columns(
+    dv: str,
+    iv: list[str],
+    panel_index_columns: tuple[list[str], list[bool]] | None = None,
+) -> list[str]:
+    """
+    Return the columns of a panel, or of its index levels, a worker needs to
+    fit a regression
+    """
+
+    index_columns = panel_index_columns[0] if panel_index_columns else []
+    return list(dict.fromkeys([*index_columns, dv, *iv]))
+
+
+def _export_panel(data: pd.DataFrame, columns: list[str], folder: Path) -> dict:
+    """
+    Write the columns of a panel, or of its index levels, as ``.npy`` files.
+    Columns of numpy dtypes are written as they are, the others as codes
+    with their unique values and dtype.
+
+    Returns the description of the files the workers open.
+    """
+
+    source = data
+    if any(column not in data.columns for column in columns):
+        source = data.reset_index()
+
+    description = {}
+    for i, column in enumerate(columns):
+        series = source[column]
+        file_name = str(folder / f"{i}.npy")
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+            np.save(file_name, series.to_numpy())
+            description[column] = (file_name, None, None)
+        else:
+            codes, uniques = pd.factorize(series)
+            np.save(file_name, codes)
+            description[column] = (file_name, uniques, series.dtype)
+    return description
+
+
+def _init_worker(panels: dict[int, dict]) -> None:
+    """
+    Open the memory-mapped columns of the panels in a worker process
+    """
+
+    _worker_panels.clear()
+    _worker_frames.clear()
+    for panel_id, description in panels.items():
+        _worker_panels[panel_id] = {
+            column: (np.load(file_name, mmap_mode="r"), uniques, dtype)
+            for column, (file_name, uniques, dtype) in description.items()
+        }
+
+
+def _worker_frame(panel_id: int, columns: tuple[str, ...]) -> pd.DataFrame:
+    """
+    Build the frame of some columns of a memory-mapped panel
+    """
+
+    if (panel_id, columns) not in _worker_frames:
+        frame = {}
+        for column in columns:
+            values, uniques, dtype = _worker_panels[panel_id][column]
+            if uniques is None:
+                frame[column] = np.asarray(values)
+            else:
+                # Code -1 stands for a missing value
+                frame[column] = pd.Series(
+                    pd.Categorical.from_codes(np.asarray(values), categories=uniques)
+                ).astype(dtype)
+        _worker_frames[(panel_id, columns)] = pd.DataFrame(frame)
+    return _worker_frames[(panel_id, columns)]
+
+
+def _fit_task(task: tuple) -> RegressionSummary:
+    """
+    Fit one specification on the frame of its memory-mapped columns
+    """
+
+    panel_id, columns, dv, iv, robust, panel_index_columns = task
+    return fit_regression(
+        _worker_frame(panel_id, columns), dv, iv, robust, panel_index_columns
+    )
+
+
+def fit_regression_grid(
+    jobs: list[tuple[pd.DataFrame, list[tuple[str, list[str]]]]],
+    robust: bool = False,
+    panel_index_columns: tuple[list[str], list[bool]] | None = None,
+    max_workers: int | None = None,
+) -> None:
+    """
+    Fit in a process pool the specifications of all the (panel, regressand
+    and independent variables) jobs missing from the model cache, and put
+    them in it. Specifications shared by several jobs are fitted once. With a
+    single process, nothing is done, the specifications being fitted as the
+    tables render.
+
+    Args:
+        jobs (list): The panels with their regressand and independent variables.
+        robust (bool, optional): Whether to use robust standard errors.
+        panel_index_columns (tuple, optional): The panel index and fixed effects.
+        max_workers (int, optional): The number of processes. Defaults to the
+            CPU count.
+    """
+
+    # Without a pool, the specifications are fitted as the tables render
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers < 2:
+        return
+
+    misses = {}
+    for data, reg_combi in jobs:
+        for dv, iv in reg_combi:
+            key = regression_key(data, dv, iv, robust, panel_index_columns)
+            if key not in misses and get_model(key) is None:
+                misses[key] = (data, dv, iv)
+
+    if len(misses) < 2:
+        for key, (data, dv, iv) in misses.items():
+            put_model(key, fit_regression(data, dv, iv, robust, panel_index_columns))
+        return
+
+    # Export the columns of each panel used by its uncached specifications
+    panel_ids, panel_columns = {}, {}
+    for data, dv, iv in misses.values():
+        panel_id = panel_ids.setdefault(id(data), len(panel_ids))
+        panel_columns.setdefault(panel_id, (data, {}))[1].update(
+            dict.fromkeys(_exported_columns(dv, iv, panel_index_columns))
+        )
+
+    tasks = [
+        (
+            panel_ids[id(data)],
+            tuple(_exported_columns(dv, iv, panel_index_columns)),
+            dv,
+            list(iv),
+            robust,
+            panel_index_columns,
+        )
+        for data, dv, iv in misses.values()
+    ]
+    print_info_log(
+        f"Fitting {len(tasks)} regressions on {min(max_workers, len(tasks))} "
+        "processes",
+        "progress",
+    )
+    with tempfile.TemporaryDirectory(prefix="regression_grid_") as folder:
+        panels = {}
+        for panel_id, (data, columns) in panel_columns.items():
+            os.makedirs(Path(folder) / str(panel_id))
+            panels[panel_id] = _export_panel(
+                data, list(columns), Path(folder) / str(panel_id)
+            )
+        # Fork where possible, since the regression scripts run at module level
+        # and spawned workers would rerun them on import
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(tasks)),
+            mp_context=multiprocessing.get_context(
+                "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+            ),
+            initializer=_init_worker,
+            initargs=(panels,),
+        ) as executor:
+            summaries = list(executor.map(_fit_task, tasks))
+
+    for key, summary in zip(misses, summaries):
+        put_model(key, summary)
@@ -3,11 +3,14 @@ from itertools import product
 from pathlib import Path
 
 import pandas as pd
-import statsmodels.api as sm
-from linearmodels.panel import PanelOLS
 
 from environ.constants import ALL_NAMING_DICT, DATA_PATH, TEST_RESULT_PATH
-from environ.utils.caching import cache
+from environ.tabulate.model_cache import RegressionSummary, get_model, put_model
+from environ.tabulate.regression_grid import (
+    fit_regression,
+    fit_regression_grid,
+    regression_key,
+)
 from environ.utils.variable_constructer import (
     lag_variable_columns,
     map_variable_name_latex,
@@ -30,9 +33,10 @@ def regress(
     iv: list[str] = ["is_boom", "mcap_share"],
     robust: bool = False,
     panel_index_columns: tuple[list[str], list[bool]] | None = None,
-):
+) -> RegressionSummary:
     """
-    Run the fixed-effect regression.
+    Run the fixed-effect regression, or return its cached summary when the
+    same specification already ran on the same panel columns.
 
     Args:
         data (pd.DataFrame): The data to run the regression on.
@@ -40,52 +44,12 @@ def regress(
         iv (list[str], optional): The independent variables. Defaults to ["is_boom", "mcap_share"].
     """
 
-    # if method not in ["ols", "panel"], raise f"method {method} must be either 'ols' or 'panel'"
-    if panel_index_columns:
-        data = data.reset_index().set_index(panel_index_columns[0])
-
-    # Define the dependent variable
-    dependent_var = data[dv]
-
-    # Define the independent variables
-    independent_var = data[iv]
-
-    # Run the fixed-effect regression
-    # catch error and print y and X
-    @cache(ttl=60 * 60 * 24 * 7, min_memory_time=0.00001, min_disk_time=0.1)
-    def regression(
-        dependent_var: pd.Series,
-        independent_var: pd.DataFrame,
-        robust: bool,
-        panel_index_columns: tuple[list[str], list[bool]] | None = None,
-    ):
-        if panel_index_columns:
-            model = PanelOLS(
-                dependent_var,
-                independent_var,
-                entity_effects=panel_index_columns[1][0],
-                time_effects=panel_index_columns[1][1],
-                drop_absorbed=True,
-                check_rank=False,
-            )
-            if robust:
-                model_fit = model.fit(cov_type="kernel", kernel="newey-west")
-            else:
-                model_fit = model.fit()
-        else:
-            model = sm.OLS(dependent_var, independent_var, missing="drop")
-            if robust:
-                model_fit = model.fit(cov_type="HAC", cov_kwds={"maxlags": 1})
-            else:
-                model_fit = model.fit()
-        return model_fit
-
-    return regression(
-        dependent_var,
-        independent_var,
-        robust=robust,
-        panel_index_columns=panel_index_columns,
-    )
+    key = regression_key(data, dv, iv, robust, panel_index_columns)
+    summary = get_model(key)
+    if summary is None:
+        summary = fit_regression(data, dv, iv, robust, panel_index_columns)
+        put_model(key, summary)
+    return summary
 
 
 def render_regression_column(
@@ -114,16 +78,13 @@ def render_regression_column(
     )
 
     # merge three pd.Series: regression_result.params, regression_result.std_errors, regression_result.pvalues into one dataframe
-    result_column = pd.Series({"regressand": dv})
+    # Filled as a dict, since enlarging a Series cell by cell is slow
+    result_column = {"regressand": dv}
     if standard_beta:
         # calculate the standard deviation of [dv] + iv
         line2_items = data[iv].std() / data[dv].std()
     else:
-        line2_items = (
-            regression_result.std_errors
-            if panel_index_columns
-            else regression_result.bse
-        )
+        line2_items = regression_result.bse
 
     for i, v in regression_result.params.items():
         # format v to exactly 3 decimal places
@@ -142,8 +103,8 @@ def render_regression_column(
         result_column["te"] = "yes" if panel_index_columns[1][1] else "no"
     # number of observations with thousands separator and without decimal places
     result_column["nobs"] = f"{regression_result.nobs:,.0f}"
-    result_column["r2"] = f"{regression_result.rsquared:.3f}"
-    return result_column
+    result_column["r2"] = f"{regression_result.r2:.3f}"
+    return pd.Series(result_column)
 
 
 def construct_regress_vars(
@@ -203,6 +164,7 @@ def render_regress_table(
     reg_panel: pd.DataFrame,
     reg_combi: list[tuple[str, list[str]]],
     lag_dv: str | None = None,
+    max_workers: int | None = None,
     **kargs,
     # method: str = "panel",
 ) -> pd.DataFrame:
@@ -214,11 +176,20 @@ def render_regress_table(
         file_name (str): The file suffix of the regression table in latex.
         reg_combi (list[tuple[str, list[str]]]): The list of regressand and independent variables.
         lag_dv (str, optional): The name of the lagged dependent variable.
+        max_workers (int, optional): The number of processes fitting the regressions.
 
     Returns:
         pd.DataFrame: The regression table.
     """
 
+    # Fit the uncached columns in parallel, then render them from the cache
+    fit_regression_grid(
+        [(reg_panel, reg_combi)],
+        robust=kargs.get("robust", False),
+        panel_index_columns=kargs.get("panel_index_columns"),
+        max_workers=max_workers,
+    )
+
     result_table = pd.DataFrame()
     counter = 0
     # initiate all_ivs set
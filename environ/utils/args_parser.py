@@ -28,4 +28,20 @@ def arg_parse_cmd() -> argparse.ArgumentParser:
         help="Provide end date (excluded) to update in format YYYY-MM-DD.",
     )
 
+    # Add argument to rerun pipeline stages even when they are current
+    parser.add_argument(
+        "--force",
+        nargs="*",
+        default=None,
+        help="Rerun the named pipeline stages, or all of them if none is named.",
+    )
+
+    # Add argument to bound the number of concurrent pipeline stages
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=None,
+        help="Maximum number of pipeline stages running at once.",
+    )
+
     return parser
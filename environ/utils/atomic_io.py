@@ -0,0 +1,44 @@
+"""
+Atomic file writes: write to a temporary file in the target directory, then
+rename it over the destination so readers never see a partial file.
+"""
+
+import contextlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, Union
+
+import pandas as pd
+
+
+@contextlib.contextmanager
+def atomic_write(file_path: Union[str, Path], mode: str = "w", **kwargs) -> Iterator:
+    """
+    Context manager yielding a file object whose content replaces
+    ``file_path`` only once the block exits without error
+    """
+
+    file_path = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+def atomic_to_csv(df: pd.DataFrame, file_path: Union[str, Path], **kwargs) -> None:
+    """
+    Write a dataframe to csv atomically
+    """
+
+    with atomic_write(file_path, "w", encoding="utf-8", newline="") as f:
+        df.to_csv(f, **kwargs)
@@ -2,14 +2,178 @@
 credit: https://github.com/danhper/ethereum-tools/blob/master/eth_tools/caching.py
 """
 
+import collections
+import contextlib
 import functools
 import hashlib
 import os
 import pickle
+import sys
+import threading
 import time
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
 from environ.constants import CACHE_PATH
+from environ.utils.atomic_io import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no cross-process locking on Windows
+    fcntl = None
+
+MAX_MEMORY_BYTES = 256 * 1024**2
+MAX_DISK_BYTES = 2 * 1024**3
+
+
+def _hash_value(value, md5sum) -> None:
+    """Updates an md5 with the structure and content of a value. DataFrames,
+    Series and indexes are hashed row-wise with ``pd.util.hash_pandas_object``
+    and arrays from their raw buffer instead of being pickled whole
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        md5sum.update(type(value).__name__.encode("utf-8"))
+        if isinstance(value, pd.DataFrame):
+            md5sum.update(repr(list(value.columns)).encode("utf-8"))
+            md5sum.update(repr(list(value.dtypes.astype(str))).encode("utf-8"))
+        else:
+            md5sum.update(repr((value.name, str(value.dtype))).encode("utf-8"))
+        md5sum.update(repr(list(value.index.names)).encode("utf-8"))
+        try:
+            hashes = pd.util.hash_pandas_object(
+                value, index=not isinstance(value, pd.Index)
+            )
+            md5sum.update(hashes.to_numpy().tobytes())
+        except TypeError:
+            # Unhashable cells, e.g. lists
+            md5sum.update(pickle.dumps(value))
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        md5sum.update(repr((value.dtype.str, value.shape)).encode("utf-8"))
+        md5sum.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        md5sum.update(f"{type(value).__name__}{len(value)}".encode("utf-8"))
+        for item in value:
+            _hash_value(item, md5sum)
+    elif isinstance(value, dict):
+        md5sum.update(f"dict{len(value)}".encode("utf-8"))
+        for item_key in sorted(value, key=repr):
+            _hash_value(item_key, md5sum)
+            _hash_value(value[item_key], md5sum)
+    else:
+        md5sum.update(pickle.dumps(value))
+
+
+def _sizeof(value) -> int:
+    """Estimates the memory taken by a cached value in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class _MemoryCache:
+    """In-memory LRU store of the results of one function, evicting the least
+    recently used results beyond ``max_bytes``, with hit/miss statistics
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def get(self, key: str, ttl: int) -> tuple[object, bool]:
+        """Returns two values, the second indicates if the value was cached
+        or not. If the second value is true, the first value is the
+        actual cached value
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, False
+            inserted_at, value, nbytes = entry
+            if 0 <= ttl <= time.time() - inserted_at:
+                del self.entries[key]
+                self.nbytes -= nbytes
+                return None, False
+            self.entries.move_to_end(key)
+            return value, True
+
+    def put(self, key: str, value) -> None:
+        """Stores a value, evicting the least recently used values beyond the
+        size limit. Values larger than the limit are not stored
+        """
+        nbytes = _sizeof(value)
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[2]
+            self.entries[key] = (time.time(), value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted_bytes) = self.entries.popitem(last=False)
+                self.nbytes -= evicted_bytes
+                self.stats["memory_evictions"] += 1
+
+    def clear(self) -> None:
+        """Drops all the values"""
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+# Shared by the decorators of a same function and memory limit, so that
+# functions decorated at each call of their enclosing function still hit the
+# memory cache
+_memory_caches: dict[tuple[str, int], _MemoryCache] = {}
+_memory_caches_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _file_lock(lock_path: Path) -> Iterator[None]:
+    """Holds an exclusive lock on a file across threads and processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, "a+b") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _cleanup_disk(directory: Path, max_bytes: int) -> int:
+    """Deletes the least recently used cache files of a directory until they
+    take at most ``max_bytes``, and returns the number of files deleted
+    """
+    files = []
+    for filepath in Path(directory).glob("*.pkl"):
+        try:
+            stats = os.stat(filepath)
+        except FileNotFoundError:
+            continue
+        files.append((stats.st_atime, stats.st_size, filepath))
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, filepath in sorted(files):
+        if total <= max_bytes:
+            break
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(filepath)
+            deleted += 1
+        total -= size
+    return deleted
 
 
 def cache(
@@ -19,6 +183,8 @@ def cache(
     directory: Path = CACHE_PATH,
     exclude: Optional[dict] = None,
     should_cache=None,
+    max_memory_bytes: int = MAX_MEMORY_BYTES,
+    max_disk_bytes: int = MAX_DISK_BYTES,
 ) -> Callable:
     """Decorator using on-disk caching. If the function call takes more than
     ``min_memory_time`` and less than ``min_disk_time``, the result will be
@@ -28,7 +194,18 @@ def cache(
     If ``ttl`` is set to a negative value, the cache will never be expired.
     The function result is cached based on its name and the arguments it has
     been passed. This means that if the function is not passed the exact
-    same arguments, the result will not be re-used.
+    same arguments, the result will not be re-used. DataFrames, Series and
+    arrays are keyed by their content hashed with
+    ``pd.util.hash_pandas_object`` rather than by a full pickle.
+
+    The memory cache evicts the least recently used results beyond
+    ``max_memory_bytes``, and is shared by all the decorators of a same
+    function with the same limit. The disk cache deletes the least recently
+    used files of ``directory`` beyond ``max_disk_bytes``. The function runs
+    without any lock held and its result is published by an atomic rename, so
+    parallel workers never read a partial file nor wait on each other; workers
+    missing a same key at once each compute it, the last one replacing the
+    file.
 
     Args:
         ttl (int): Time to live in seconds
@@ -43,11 +220,16 @@ def cache(
         should_cache (callable): Function that receives the function result
             and returns a boolean indicating if the result should be cached or
             not. If not provided, the result will always be cached.
+        max_memory_bytes (int): Size limit of the memory cache in bytes
+        max_disk_bytes (int): Size limit of the cache files in ``directory``
+            in bytes
 
     Returns:
-        callable: Decorated function
+        callable: Decorated function, with a ``cache_stats`` method returning
+            the memory hits, disk hits, misses and evictions
     """
-    os.makedirs(CACHE_PATH, 0o755, exist_ok=True)
+    lock_directory = Path(directory) / ".locks"
+    os.makedirs(lock_directory, 0o755, exist_ok=True)
 
     if exclude is None:
         exclude = {}
@@ -60,11 +242,13 @@ def cache(
         for i, arg in enumerate(args):
             if i not in exclude.get("args", []):
                 reconstructed_args.append(arg)
-        for arg in exclude.get("kwargs", []):
-            del kwargs[arg]
-        to_hash = pickle.dumps((func_name, reconstructed_args, kwargs))
+        reconstructed_kwargs = {
+            name: value
+            for name, value in kwargs.items()
+            if name not in exclude.get("kwargs", [])
+        }
         md5sum = hashlib.md5()
-        md5sum.update(to_hash)
+        _hash_value((func_name, reconstructed_args, reconstructed_kwargs), md5sum)
         return md5sum.hexdigest()
 
     def should_use_file_cache(filepath):
@@ -78,40 +262,54 @@ def cache(
         except FileNotFoundError:
             return False
 
+    def load_file_cache(filepath):
+        """Returns two values as ``get`` of the memory cache, marking the file
+        as recently used
+        """
+        if not should_use_file_cache(filepath):
+            return None, False
+        try:
+            with open(filepath, "rb") as f:
+                value = pickle.load(f)
+            # Keep the mtime, which sets the ttl
+            os.utime(filepath, (time.time(), os.stat(filepath).st_mtime))
+        except FileNotFoundError:
+            return None, False
+        except (EOFError, pickle.UnpicklingError):
+            # Torn file written before the writes were atomic
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(filepath)
+            return None, False
+        return value, True
+
     def decorator(fn: Callable) -> Callable:
-        memory_cache = {}
-
-        def get_from_memory_cache(key):
-            """Returns two values, the second indicates if the value was cached
-            or not. If the second value is true, the first value is the
-            actual cached value
-            """
-            entry = memory_cache.get(key)
-            if not entry:
-                return None, False
-            inserted_at, value = entry
-            if 0 <= ttl <= time.time() - inserted_at:
-                del memory_cache[key]
-                return None, False
-            return value, True
+        func_name = f"{fn.__module__}.{fn.__qualname__}"
+        with _memory_caches_lock:
+            memory_cache = _memory_caches.setdefault(
+                (func_name, max_memory_bytes), _MemoryCache(max_memory_bytes)
+            )
+        stats = memory_cache.stats
 
         def decorated(*args, **kwargs):
             # compute unique key depending on function name and arguments
-            key = compute_key(fn.__name__, args, kwargs)
+            key = compute_key(func_name, args, kwargs)
 
             # return from memory if possible
-            value, cached = get_from_memory_cache(key)
-            if value is not None and cached:
+            value, cached = memory_cache.get(key, ttl)
+            if cached:
+                stats["memory_hits"] += 1
                 return value
 
             # return from disk if possible
             filename = "{0}.pkl".format(key)
             filepath = Path(directory) / filename
-            if should_use_file_cache(filepath):
-                with open(filepath, "rb") as f:
-                    return pickle.load(f)
+            value, cached = load_file_cache(filepath)
+            if cached:
+                stats["disk_hits"] += 1
+                return value
 
-            # not cached, run the computation
+            # not cached, run the computation without holding any lock
+            stats["misses"] += 1
             start = time.time()
             result = fn(*args, **kwargs)
             ellapsed = time.time() - start
@@ -120,17 +318,34 @@ def cache(
                 return result
 
             # if ellapsed time is long enough to store in memory
-            # short enough not to fallback to disk storage or disk storage is not enabled
-            # add to memory cache
+            # short enough not to fallback to disk storage or disk storage is
+            # not enabled add to memory cache
             if min_memory_time <= ellapsed < min_disk_time:
-                memory_cache[key] = (time.time(), result)
+                memory_cache.put(key, result)
 
             # if ellapsed time is long, use disk storage instead of memory
             elif ellapsed >= min_disk_time:
-                with open(filepath, "wb") as f:
+                with atomic_write(filepath, "wb") as f:
                     pickle.dump(result, f)
+                with _file_lock(lock_directory / "cleanup"):
+                    stats["disk_evictions"] += _cleanup_disk(directory, max_disk_bytes)
             return result
 
+        def cache_stats() -> dict:
+            """Returns the hit, miss and eviction counts of the function"""
+            return {
+                name: stats[name]
+                for name in [
+                    "memory_hits",
+                    "disk_hits",
+                    "misses",
+                    "memory_evictions",
+                    "disk_evictions",
+                ]
+            }
+
+        decorated.cache_stats = cache_stats
+        decorated.cache_clear = memory_cache.clear
         return functools.update_wrapper(decorated, fn)
 
     return decorator
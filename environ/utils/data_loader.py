@@ -3,10 +3,194 @@ Util to merge data from different sources
 """
 
 import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable
 
+import numpy as np
 import pandas as pd
 
+from environ.constants import CACHE_PATH
+from environ.utils.atomic_io import atomic_write
+from environ.utils.info_logger import print_info_log
+
+DATA_LOADER_CACHE_PATH: Path = CACHE_PATH / "data_loader"
+
+# Key of the manifest of file mtimes in the metadata of a consolidated file
+MANIFEST_KEY = b"data_loader_mtimes"
+
+
+def date_from_file_names(file_names: pd.Series) -> pd.Series:
+    """
+    Parse the dates ending the file names, as in ``volume_merged_20220101.csv``
+    """
+
+    return pd.to_datetime(file_names.str.split("_").str[-1].str.split(".").str[0])
+
+
+def _get_cache_file(
+    data_path: str | Path,
+    columns: list[str] | None,
+    cache_path: Path,
+    *key_parts: str,
+) -> Path:
+    """
+    Return the consolidated data file cached for a folder, a column selection
+    and the other parts of the key
+    """
+
+    key = json.dumps(
+        [
+            str(Path(data_path).resolve()),
+            None if columns is None else sorted(columns),
+            *key_parts,
+        ]
+    )
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()
+    return Path(cache_path) / f"{digest}.parquet"
+
+
+def _read_cache_file(
+    data_file: Path, file_names: list[str], mtimes: dict[str, int]
+) -> tuple[pd.DataFrame | None, set[str], dict[str, int]]:
+    """
+    Read the rows of the files unchanged since a consolidated data file was
+    written, by the manifest of file mtimes kept in its metadata. The manifest
+    and the rows are read from one open file, so a concurrent replacement of
+    the file cannot mix two versions.
+
+    Returns the rows, the unchanged files and the manifest.
+    """
+
+    # Import pyarrow lazily: it is only required once the cache is used
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.compute as pc  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    try:
+        with open(data_file, "rb") as f:
+            parquet_file = pq.ParquetFile(f)
+            metadata = parquet_file.schema_arrow.metadata or {}
+            manifest = json.loads(metadata.get(MANIFEST_KEY, b"{}"))
+            unchanged = {
+                file_name
+                for file_name in file_names
+                if manifest.get(file_name) == mtimes[file_name]
+            }
+            if not unchanged:
+                return None, unchanged, manifest
+            table = parquet_file.read()
+    except FileNotFoundError:
+        return None, set(), {}
+
+    mask = pc.is_in(table["file_name"], value_set=pa.array(sorted(unchanged)))
+    return table.filter(mask).to_pandas(), unchanged, manifest
+
+
+def _read_file(
+    data_path: str | Path, file_name: str, columns: list[str] | None
+) -> pd.DataFrame:
+    """
+    Read one daily csv file, keeping only the given columns
+    """
+
+    return pd.read_csv(
+        f"{str(data_path)}/{file_name}",
+        usecols=None if columns is None else lambda column: column in columns,
+    )
+
+
+def load_folder(
+    data_path: str | Path,
+    columns: list[str] | None = None,
+    max_workers: int | None = None,
+    use_cache: bool = True,
+    cache_path: Path = DATA_LOADER_CACHE_PATH,
+    pattern: str = "*.csv",
+    name_column: str = "Date",
+    name_parser: Callable[[pd.Series], pd.Series] = date_from_file_names,
+) -> pd.DataFrame:
+    """
+    Read all daily csv files of a folder matching ``pattern`` into one
+    dataframe, keeping only the given columns. The ``name_column`` column,
+    by default the Date, is parsed from the file names by ``name_parser``.
+
+    The files are read concurrently by a thread pool and concatenated once.
+    With ``use_cache``, the result is kept in a consolidated file per folder
+    and column selection, and only the files added or modified since (by
+    mtime) are read again.
+    """
+
+    file_names = sorted(glob.glob(pattern, root_dir=data_path))
+    mtimes = {
+        file_name: os.stat(f"{str(data_path)}/{file_name}").st_mtime_ns
+        for file_name in file_names
+    }
+
+    # Rows of the files unchanged since the cache was written
+    data_file = _get_cache_file(
+        data_path, columns, cache_path, pattern, name_column, name_parser.__qualname__
+    )
+    df_cached, unchanged, manifest = (
+        _read_cache_file(data_file, file_names, mtimes)
+        if use_cache
+        else (None, set(), {})
+    )
+    to_read = [file_name for file_name in file_names if file_name not in unchanged]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(
+            executor.map(
+                lambda file_name: _read_file(data_path, file_name, columns), to_read
+            )
+        )
+
+    parts = [] if df_cached is None else [df_cached]
+    if frames:
+        df_read = pd.concat(frames, ignore_index=True)
+        n_rows = [len(frame) for frame in frames]
+        df_read["file_name"] = np.repeat(to_read, n_rows)
+        names = name_parser(pd.Series(to_read))
+        df_read[name_column] = np.repeat(names.to_numpy(), n_rows)
+        parts.append(df_read)
+
+    df_merged = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    if len(df_merged) > 0:
+        # Keep the rows in file order
+        df_merged = df_merged.sort_values(
+            "file_name",
+            key=lambda names: names.map({name: i for i, name in enumerate(file_names)}),
+            kind="stable",
+            ignore_index=True,
+        )
+
+    if use_cache and (to_read or len(unchanged) < len(manifest)):
+        try:
+            # Import pyarrow lazily: it is only required once the cache is used
+            import pyarrow as pa  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+            # The manifest goes in the metadata, so that the rows and the
+            # manifest are replaced together by one atomic write
+            table = pa.Table.from_pandas(df_merged, preserve_index=False)
+            table = table.replace_schema_metadata(
+                {
+                    **(table.schema.metadata or {}),
+                    MANIFEST_KEY: json.dumps(mtimes).encode("utf-8"),
+                }
+            )
+            os.makedirs(cache_path, exist_ok=True)
+            with atomic_write(data_file, "wb") as f:
+                pq.write_table(table, f)
+        except (ImportError, NotImplementedError, TypeError, ValueError) as e:
+            # Columns of mixed types cannot be stored in parquet
+            print_info_log(f"{data_path} not cached: {e}", "warning")
+
+    return df_merged.drop(columns="file_name", errors="ignore")
+
 
 def load_data(
     panel_main: pd.DataFrame,
@@ -28,12 +212,18 @@ def load_data(
         pd.DataFrame: Merged dataframe
     """
 
-    df_merged = pd.DataFrame()
-    for file_name in glob.glob("*.csv", root_dir=data_path):
-        df_data = pd.read_csv(f"{str(data_path)}/{file_name}")
-        df_data["Date"] = pd.to_datetime(file_name.split("_")[-1].split(".")[0])
-        df_merged = pd.concat([df_merged, df_data])
+    # Only read the columns kept after renaming
+    columns = [
+        column
+        for column, new_column in rename_dict.items()
+        if new_column in data_col
+    ] + [
+        column
+        for column in data_col
+        if column != "Date" and column not in rename_dict.values()
+    ]
 
+    df_merged = load_folder(data_path, columns=columns)
     df_merged.rename(columns=rename_dict, inplace=True)
 
     return panel_main.merge(df_merged[data_col], **kwargs)
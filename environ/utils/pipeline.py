@@ -0,0 +1,312 @@
+"""
+Content-addressed runner of the processing stages.
+
+Each stage declares the globs of the files it reads and writes and the stages
+it runs after. Its key hashes the content of its input files, the source of
+the modules of the package its function imports, directly or not, and the
+arguments of the function. A stage whose key is unchanged since its last run
+and whose outputs exist is skipped. Stages run concurrently as soon as the
+stages they run after are done, so a changed input only reruns the stages
+reading it, and the downstream stages whose inputs it changes. Each stage runs
+in a fresh spawned process, so that the stages forking worker pools never
+fork a process running other stages in its threads.
+
+The key and the file digests of each stage are kept in
+``<PIPELINE_CACHE_PATH>/<stage>.json``. A file is only read again when its
+size or mtime changed.
+"""
+
+import ast
+import functools
+import glob
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from environ.constants import CACHE_PATH
+from environ.utils.atomic_io import atomic_write
+from environ.utils.info_logger import print_info_log
+
+PIPELINE_CACHE_PATH: Path = CACHE_PATH / "pipeline"
+
+
+@dataclass
+class Stage:
+    """
+    A processing stage: a picklable function without required arguments, the
+    globs of the files it reads and writes, and the names of the stages it runs
+    after
+    """
+
+    name: str
+    func: Callable[[], None]
+    inputs: list[str | Path] = field(default_factory=list)
+    outputs: list[str | Path] = field(default_factory=list)
+    after: list[str] = field(default_factory=list)
+
+
+def _expand(patterns: list[str | Path]) -> list[str]:
+    """
+    Return the sorted files matched by a list of globs
+    """
+
+    files = set()
+    for pattern in patterns:
+        files.update(
+            path
+            for path in glob.glob(str(pattern), recursive=True)
+            if os.path.isfile(path)
+        )
+    return sorted(files)
+
+
+def _file_digest(path: str, previous: dict) -> list:
+    """
+    Return the size, mtime and md5 of a file, reusing the previous digest of
+    the file when its size and mtime are unchanged
+    """
+
+    stat = os.stat(path)
+    if path in previous and previous[path][:2] == [stat.st_size, stat.st_mtime_ns]:
+        return previous[path]
+    md5sum = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            md5sum.update(chunk)
+    return [stat.st_size, stat.st_mtime_ns, md5sum.hexdigest()]
+
+
+def _imported_modules(source: str, module_name: str) -> set[str]:
+    """
+    Return the modules, and the candidate submodules, named by the import
+    statements of a module source
+    """
+
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                package = module_name.rsplit(".", node.level)[0]
+                base = f"{package}.{base}" if base else package
+            names.add(base)
+            names.update(f"{base}.{alias.name}" for alias in node.names)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def code_digest(module_name: str) -> str:
+    """
+    Hash the source of a module and of all the modules of its top-level
+    package it imports, directly or not
+    """
+
+    package = module_name.split(".")[0]
+    seen, pending, sources = set(), [module_name], {}
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            continue
+        if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+            continue
+        with open(spec.origin, "r", encoding="utf-8") as f:
+            sources[name] = f.read()
+        pending.extend(
+            imported
+            for imported in _imported_modules(sources[name], name)
+            if imported.split(".")[0] == package
+        )
+
+    md5sum = hashlib.md5()
+    for name in sorted(sources):
+        md5sum.update(name.encode("utf-8"))
+        md5sum.update(sources[name].encode("utf-8"))
+    return md5sum.hexdigest()
+
+
+def _call_signature(func: Callable) -> list:
+    """
+    Return the qualified name and the bound arguments of a stage function
+    """
+
+    args, kwargs = [], {}
+    while isinstance(func, functools.partial):
+        args = list(func.args) + args
+        kwargs = {**func.keywords, **kwargs}
+        func = func.func
+    return [f"{func.__module__}.{func.__qualname__}", repr(args), repr(kwargs)]
+
+
+def _inner_module(func: Callable) -> str:
+    """
+    Return the module defining a stage function
+    """
+
+    while isinstance(func, functools.partial):
+        func = func.func
+    return func.__module__
+
+
+class _StageCache:
+    """
+    Key and file digests of the last successful run of a stage
+    """
+
+    def __init__(self, stage: Stage, cache_path: Path) -> None:
+        self.stage = stage
+        self.manifest_file = Path(cache_path) / f"{stage.name}.json"
+        self.previous = {}
+        if self.manifest_file.exists():
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                self.previous = json.load(f)
+
+    def compute_key(self) -> tuple[str, dict]:
+        """
+        Return the key of the stage and the digests of its input files
+        """
+
+        previous_files = self.previous.get("files", {})
+        files = {
+            path: _file_digest(path, previous_files)
+            for path in _expand(self.stage.inputs)
+        }
+        key = json.dumps(
+            [
+                _call_signature(self.stage.func),
+                code_digest(_inner_module(self.stage.func)),
+                [[path, digest[2]] for path, digest in files.items()],
+            ]
+        )
+        return hashlib.md5(key.encode("utf-8")).hexdigest(), files
+
+    def is_current(self, key: str) -> bool:
+        """
+        Check whether the stage last ran with this key and its outputs exist
+        """
+
+        return self.previous.get("key") == key and all(
+            glob.glob(str(pattern), recursive=True) for pattern in self.stage.outputs
+        )
+
+    def save(self, key: str, files: dict) -> None:
+        """
+        Record a successful run of the stage
+        """
+
+        os.makedirs(self.manifest_file.parent, exist_ok=True)
+        with atomic_write(self.manifest_file, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "files": files}, f)
+
+
+def _run_stage(func: Callable[[], None]) -> float:
+    """
+    Run a stage function, in a worker process, and return its running time
+    """
+
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _result(future: Future, stage: Stage) -> float:
+    """
+    Return the running time of a finished stage, failing with the stage named
+    """
+
+    try:
+        return future.result()
+    except Exception as e:
+        raise RuntimeError(f"Stage {stage.name} failed") from e
+
+
+def run_pipeline(
+    stages: list[Stage],
+    max_workers: int | None = None,
+    force: list[str] | None = None,
+    cache_path: Path = PIPELINE_CACHE_PATH,
+) -> dict[str, dict]:
+    """
+    Run the stages in dependency order, concurrently where independent,
+    skipping the current ones, and print a timing and cache-hit report.
+    The stages named in force always run.
+
+    Returns the status, hashing time and running time of each stage.
+    """
+
+    names = [stage.name for stage in stages]
+    for stage in stages:
+        unknown = set(stage.after) - set(names)
+        if unknown:
+            raise ValueError(f"{stage.name} runs after unknown stages {unknown}")
+    force = set(names if force == [] else force or [])
+
+    start = time.perf_counter()
+    report, pending, running = {}, list(stages), {}
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        while pending or running:
+            for stage in [s for s in pending if set(s.after) <= set(report)]:
+                pending.remove(stage)
+                hash_start = time.perf_counter()
+                stage_cache = _StageCache(stage, cache_path)
+                key, files = stage_cache.compute_key()
+                hash_time = time.perf_counter() - hash_start
+                if stage.name not in force and stage_cache.is_current(key):
+                    report[stage.name] = {
+                        "status": "cached",
+                        "hash": hash_time,
+                        "run": 0.0,
+                    }
+                    continue
+
+                print_info_log(f"Running stage {stage.name}", "progress")
+                future = executor.submit(_run_stage, stage.func)
+                running[future] = (stage, stage_cache, key, files, hash_time)
+            if not running:
+                if pending and not any(set(s.after) <= set(report) for s in pending):
+                    raise ValueError(f"Stages {[s.name for s in pending]} form a cycle")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, stage_cache, key, files, hash_time = running.pop(future)
+                run_time = _result(future, stage)
+                stage_cache.save(key, files)
+                report[stage.name] = {
+                    "status": "ran",
+                    "hash": hash_time,
+                    "run": run_time,
+                }
+
+    for name in names:
+        result = report[name]
+        print_info_log(
+            f"{name:32s} {result['status']:6s} hash {result['hash']:.2f}s, "
+            f"run {result['run']:.2f}s",
+            "pipeline",
+        )
+    n_cached = sum(result["status"] == "cached" for result in report.values())
+    print_info_log(
+        f"{n_cached} of {len(stages)} stages cached, "
+        f"total {time.perf_counter() - start:.2f}s",
+        "pipeline",
+    )
+    return report
+
@@ -0,0 +1,249 @@
+"""
+Rolling moments of all the columns of 2-D arrays in one pass, computed from
+cumulative sums instead of one pandas rolling window per column or group.
+
+As with pandas ``rolling(window)`` and its default ``min_periods``, a window
+statistic is NaN unless the trailing window of the row holds ``window`` rows
+of the same group, all of them finite. Rows must be in time order within each
+group; the groups themselves may be interleaved.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def group_starts(groups: np.ndarray) -> np.ndarray:
+    """
+    Return the first row of the run of each row, for rows ordered by group
+    """
+
+    rows = np.arange(len(groups))
+    is_first = np.ones(len(groups), dtype=bool)
+    is_first[1:] = groups[1:] != groups[:-1]
+    return np.maximum.accumulate(np.where(is_first, rows, 0))
+
+
+def complete_windows(
+    finite: np.ndarray, window: int, starts: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Check whether the trailing window of each row holds ``window`` finite
+    values of the group of the row, given the finite mask of a 2-D array
+    """
+
+    rows = np.arange(len(finite))
+    inside = rows + 1 - window >= (0 if starts is None else starts)
+    return inside[:, None] & (_trailing_sums(finite.astype("int64"), window) == window)
+
+
+def _trailing_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum each column of a 2-D array without missing values over the trailing
+    window of each row, the first rows summing the rows available
+    """
+
+    cum_values = np.zeros((len(values) + 1, values.shape[1]), dtype=values.dtype)
+    np.cumsum(values, axis=0, out=cum_values[1:])
+    sums = cum_values[1:].copy()
+    sums[window:] -= cum_values[1:-window]
+    return sums
+
+
+def window_sums(
+    values: np.ndarray, window: int, starts: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Sum each column of a 2-D array over the trailing window of each row, NaN
+    where the window is incomplete
+    """
+
+    finite = np.isfinite(values)
+    return np.where(
+        complete_windows(finite, window, starts),
+        _trailing_sums(np.where(finite, values, 0.0), window),
+        np.nan,
+    )
+
+
+def constant_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Check whether the trailing window of each row holds one repeated value,
+    in which case its variance is exactly zero
+    """
+
+    rows = np.arange(len(values))[:, None]
+    is_repeat = np.zeros(values.shape, dtype=bool)
+    is_repeat[1:] = values[1:] == values[:-1]
+    run_start = np.maximum.accumulate(np.where(is_repeat, 0, rows), axis=0)
+    return rows - run_start + 1 >= window
+
+
+def _column_means(values: np.ndarray) -> np.ndarray:
+    """
+    Return the mean of the finite values of each column
+    """
+
+    finite = np.isfinite(values)
+    total = np.where(finite, values, 0.0).sum(axis=0)
+    return total / np.maximum(finite.sum(axis=0), 1)
+
+
+def _center(values: np.ndarray) -> np.ndarray:
+    """
+    Subtract the mean of the finite values of each column, which leaves the
+    moments unchanged and keeps the cumulative sums small
+    """
+
+    return values - _column_means(values)
+
+
+def _sort_groups(
+    groups: np.ndarray | None, n_rows: int
+) -> tuple[np.ndarray | None, np.ndarray | None]:
+    """
+    Return the stable order bringing the rows of each group together and the
+    first row of the group of each ordered row
+    """
+
+    if groups is None:
+        return None, None
+    codes, _ = pd.factorize(groups)
+    order = np.argsort(codes, kind="stable")
+    starts = group_starts(codes[order])
+    # Rows without a group never complete a window
+    starts[codes[order] < 0] = n_rows
+    return order, starts
+
+
+def _unsort(values: np.ndarray, order: np.ndarray | None) -> np.ndarray:
+    """
+    Put the rows computed in group order back in the input order
+    """
+
+    if order is None:
+        return values
+    result = np.empty_like(values)
+    result[order] = values
+    return result
+
+
+def rolling_mean(
+    values: np.ndarray, window: int, groups: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Rolling mean of each column of a 2-D array
+    """
+
+    order, starts = _sort_groups(groups, len(values))
+    if order is not None:
+        values = values[order]
+    means = _column_means(values)
+    return _unsort(window_sums(values - means, window, starts) / window + means, order)
+
+
+def rolling_std(
+    values: np.ndarray,
+    window: int,
+    groups: np.ndarray | None = None,
+    ddof: int = 1,
+) -> np.ndarray:
+    """
+    Rolling standard deviation of each column of a 2-D array, exactly zero
+    over windows of one repeated value
+    """
+
+    order, starts = _sort_groups(groups, len(values))
+    if order is not None:
+        values = values[order]
+    centered = _center(values)
+    finite = np.isfinite(centered)
+    centered = np.where(finite, centered, 0.0)
+    complete = complete_windows(finite, window, starts)
+
+    sums = _trailing_sums(centered, window)
+    squares = _trailing_sums(centered**2, window)
+    var = np.maximum(squares - sums**2 / window, 0.0) / (window - ddof)
+    var[constant_windows(values, window)] = 0.0
+    return _unsort(np.where(complete, np.sqrt(var), np.nan), order)
+
+
+def rolling_moments(
+    x: np.ndarray,
+    y: np.ndarray,
+    window: int,
+    groups: np.ndarray | None = None,
+    ddof: int = 1,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rolling covariance of each column of x, of shape (rows, k), with each
+    column of y, of shape (rows, m), and the variances of both over the same
+    rows, where the two columns are finite.
+
+    Returns the covariance, the variance of x and the variance of y, each of
+    shape (rows, k, m). The variances are exactly zero and the covariance is
+    zero over windows of one repeated value.
+    """
+
+    order, starts = _sort_groups(groups, len(x))
+    if order is not None:
+        x, y = x[order], y[order]
+    n_rows, k, m = len(x), x.shape[1], y.shape[1]
+
+    # Pair every column of x with every column of y, masking both jointly
+    x_pair = np.broadcast_to(_center(x)[:, :, None], (n_rows, k, m))
+    y_pair = np.broadcast_to(_center(y)[:, None, :], (n_rows, k, m))
+    finite = (np.isfinite(x_pair) & np.isfinite(y_pair)).reshape(n_rows, k * m)
+    x_pair = np.where(finite, x_pair.reshape(n_rows, k * m), 0.0)
+    y_pair = np.where(finite, y_pair.reshape(n_rows, k * m), 0.0)
+    complete = complete_windows(finite, window, starts)
+
+    def sums(values: np.ndarray) -> np.ndarray:
+        return np.where(complete, _trailing_sums(values, window), np.nan)
+
+    sum_x, sum_y = sums(x_pair), sums(y_pair)
+    cov = (sums(x_pair * y_pair) - sum_x * sum_y / window) / (window - ddof)
+    var_x = np.maximum(sums(x_pair**2) - sum_x**2 / window, 0.0) / (window - ddof)
+    var_y = np.maximum(sums(y_pair**2) - sum_y**2 / window, 0.0) / (window - ddof)
+    cov, var_x, var_y = (
+        moment.reshape(n_rows, k, m) for moment in (cov, var_x, var_y)
+    )
+
+    constant_x = np.broadcast_to(constant_windows(x, window)[:, :, None], cov.shape)
+    constant_y = np.broadcast_to(constant_windows(y, window)[:, None, :], cov.shape)
+    defined = ~np.isnan(cov)
+    var_x[constant_x & defined] = 0.0
+    var_y[constant_y & defined] = 0.0
+    cov[(constant_x | constant_y) & defined] = 0.0
+
+    return _unsort(cov, order), _unsort(var_x, order), _unsort(var_y, order)
+
+
+def rolling_corr(
+    x: np.ndarray, y: np.ndarray, window: int, groups: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Rolling correlation of each column of x with each column of y, of shape
+    (rows, k, m), NaN over windows where either column is constant
+    """
+
+    cov, var_x, var_y = rolling_moments(x, y, window, groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(var_x == 0) | (var_y == 0)] = np.nan
+    return corr
+
+
+def rolling_beta(
+    x: np.ndarray, y: np.ndarray, window: int, groups: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Rolling beta of each column of x on each column of y, the covariance over
+    the variance of y, of shape (rows, k, m), NaN over windows where the
+    column of y is constant
+    """
+
+    cov, _, var_y = rolling_moments(x, y, window, groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = cov / var_y
+    beta[var_y == 0] = np.nan
+    return beta
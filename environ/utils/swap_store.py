@@ -0,0 +1,128 @@
+"""
+Columnar on-disk store for fetched Uniswap swaps.
+
+Swaps are kept as typed, zstd-compressed Parquet files partitioned by
+version and date: ``<SWAP_STORE_PATH>/version=<version>/date=<YYYY-MM-DD>/swaps.parquet``.
+The swaps of the v2 and v3 archives, kept by top 50 pool list, are partitioned
+by their list too, as ``version=<version>/top_list=<label>/date=<YYYY-MM-DD>``.
+"""
+
+import os
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+from environ.constants import SWAP_STORE_PATH
+from environ.utils.atomic_io import atomic_write
+
+SWAP_STORE_VERSIONS = ["v2", "v3", "subgraph_v3"]
+
+
+def get_swap_path(
+    version: str,
+    date_label: str,
+    top_list_label: str | None = None,
+    store_path: Path = SWAP_STORE_PATH,
+) -> Path:
+    """
+    Return the store file of one version, top 50 pool list and day, for date
+    labels formatted either as YYYYMMDD or YYYY-MM-DD
+    """
+
+    date_str = pd.Timestamp(date_label).strftime("%Y-%m-%d")
+    swap_path = Path(store_path) / f"version={version}"
+    if top_list_label is not None:
+        swap_path = swap_path / f"top_list={top_list_label}"
+    return swap_path / f"date={date_str}" / "swaps.parquet"
+
+
+def has_swaps(
+    version: str,
+    date_label: str,
+    top_list_label: str | None = None,
+    archive_file: Union[str, Path, None] = None,
+    store_path: Path = SWAP_STORE_PATH,
+) -> bool:
+    """
+    Check whether the store holds the swaps of one version, top 50 pool list
+    and day, and with ``archive_file`` whether they are at least as new as
+    the archive file they were converted from
+    """
+
+    swap_path = get_swap_path(version, date_label, top_list_label, store_path)
+    if not swap_path.exists():
+        return False
+    if archive_file is None or not os.path.exists(archive_file):
+        return True
+    return os.path.getmtime(swap_path) >= os.path.getmtime(archive_file)
+
+
+def write_swaps(
+    swaps: pd.DataFrame,
+    version: str,
+    date_label: str,
+    top_list_label: str | None = None,
+    store_path: Path = SWAP_STORE_PATH,
+) -> Path:
+    """
+    Write the swaps of one version, top 50 pool list and day to the store
+    atomically
+    """
+
+    swap_path = get_swap_path(version, date_label, top_list_label, store_path)
+    swap_path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(swap_path, "wb") as f:
+        swaps.to_parquet(f, engine="pyarrow", compression="zstd")
+    return swap_path
+
+
+def read_swaps(
+    version: str,
+    date_label: str,
+    columns: list[str] | None = None,
+    drop_columns: list[str] | None = None,
+    pools: list[str] | None = None,
+    top_list_label: str | None = None,
+    store_path: Path = SWAP_STORE_PATH,
+) -> pd.DataFrame:
+    """
+    Read the swaps of one version, top 50 pool list and day. Only ``columns``
+    (or all columns but ``drop_columns``) are decoded, and only the swaps in
+    ``pools`` are kept, filtered inside the Parquet reader.
+    """
+
+    return read_swap_file(
+        get_swap_path(version, date_label, top_list_label, store_path),
+        columns=columns,
+        drop_columns=drop_columns,
+        pools=pools,
+    )
+
+
+def read_swap_file(
+    file_path: Union[str, Path],
+    columns: list[str] | None = None,
+    drop_columns: list[str] | None = None,
+    pools: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Read a store file with column selection and pool filters pushed down
+    """
+
+    if drop_columns is not None:
+        # Import pyarrow lazily: it is only required once the store is used
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        schema = pq.read_schema(file_path)
+        index_columns = schema.pandas_metadata["index_columns"]
+        columns = [
+            name
+            for name in (columns or schema.names)
+            if name not in index_columns and name not in drop_columns
+        ]
+
+    filters = None if pools is None else [("pool", "in", list(pools))]
+    return pd.read_parquet(
+        file_path, engine="pyarrow", columns=columns, filters=filters
+    )
@@ -0,0 +1,110 @@
+"""
+Columnar on-disk store for the daily volume measures of the token networks.
+
+The measures of one version (v2, v3 or merged) and day are kept as one long,
+zstd-compressed Parquet table partitioned by version and date:
+``<VOLUME_STORE_PATH>/version=<version>/date=<YYYY-MM-DD>/volume.parquet``.
+Each row holds one measure of an edge (Source, Target) or of a Token.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from environ.constants import VOLUME_STORE_PATH
+from environ.utils.atomic_io import atomic_write
+
+# Edge measure, then the token measures
+VOLUME_MEASURES = [
+    "volume",
+    "volume_in",
+    "volume_in_share",
+    "volume_out",
+    "volume_out_share",
+    "volume_total",
+    "volume_share",
+]
+
+VOLUME_COLUMNS = ["measure", "Source", "Target", "Token", "Volume"]
+
+
+def get_volume_path(
+    version: str, date_label: str, store_path: Path = VOLUME_STORE_PATH
+) -> Path:
+    """
+    Return the store file of one version and day, for date labels formatted
+    either as YYYYMMDD or YYYY-MM-DD
+    """
+
+    date_str = pd.Timestamp(date_label).strftime("%Y-%m-%d")
+    return (
+        Path(store_path) / f"version={version}" / f"date={date_str}" / "volume.parquet"
+    )
+
+
+def volume_frame_to_measures(frame: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    Split a long table of one day back into its measure frames
+    """
+
+    measures = {}
+    for measure, df_measure in frame.groupby("measure", sort=False, observed=True):
+        columns = ["Source", "Target"] if measure == "volume" else ["Token"]
+        measures[measure] = df_measure[columns + ["Volume"]].reset_index(drop=True)
+    return measures
+
+
+def write_volume(
+    frame: pd.DataFrame, version: str, store_path: Path = VOLUME_STORE_PATH
+) -> list[Path]:
+    """
+    Write a long table of volume measures of one version, keyed by a date
+    column of YYYYMMDD or YYYY-MM-DD labels, to the store. The table is
+    converted to Arrow once and each day is sliced from it and replaces its
+    store file atomically.
+    """
+
+    # Import pyarrow lazily: it is only required once the store is used
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    dates = (
+        frame["date"]
+        .map(
+            {
+                label: pd.Timestamp(label).strftime("%Y-%m-%d")
+                for label in frame["date"].unique()
+            }
+        )
+        .to_numpy()
+    )
+    order = np.argsort(dates, kind="stable")
+    dates = dates[order]
+    table = pa.Table.from_pandas(
+        frame.iloc[order].reindex(columns=VOLUME_COLUMNS), preserve_index=False
+    )
+
+    day_labels, day_starts = np.unique(dates, return_index=True)
+    day_ends = np.append(day_starts[1:], len(dates))
+    volume_paths = []
+    for date_str, start, end in zip(day_labels, day_starts, day_ends):
+        volume_path = get_volume_path(version, date_str, store_path)
+        volume_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(volume_path, "wb") as f:
+            pq.write_table(table.slice(start, end - start), f, compression="zstd")
+        volume_paths.append(volume_path)
+    return volume_paths
+
+
+def read_volume(
+    version: str, date_label: str, store_path: Path = VOLUME_STORE_PATH
+) -> dict[str, pd.DataFrame]:
+    """
+    Read the volume measures of one version and day
+    """
+
+    return volume_frame_to_measures(
+        pd.read_parquet(get_volume_path(version, date_label, store_path))
+    )
+
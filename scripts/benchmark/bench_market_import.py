@@ -0,0 +1,83 @@
+"""
+Benchmark the start-up time of the panel modules, which no longer load the
+market data at import, against importing pandas alone. With --load, also
+time the first call of each market loader in a fresh process, which reads
+the on-disk cache of the processed frames once it is written.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "environ.process.pre_panel",
+    "environ.process.pre_herfin",
+    "environ.tabulate.panel.panel_generator",
+]
+
+LOADERS = [
+    "environ.process.market.sp:load_sp",
+    "environ.process.market.boom_bust:load_boom_bust",
+    "environ.process.market.eth_gas:load_gas_eth",
+    "environ.process.market.prepare_market_data:load_market_data",
+    "environ.process.market.dollar_exchange_rate:load_dollar_exchange_rate",
+    "environ.process.market.market_cap:load_mcap",
+    "environ.process.market.stable_share:load_stable_share",
+    "environ.process.market.clique:load_clique",
+    "environ.process.market.cluster_coef:load_cluster_coef",
+    "environ.process.market.trading_volume:load_trading_volume",
+]
+
+
+def time_in_subprocess(setup: str, statement: str, repeat: int) -> float:
+    """
+    Return the median time of running a statement after a setup, each time in
+    a fresh interpreter
+    """
+
+    code = (
+        f"import time\n{setup}\nstart = time.perf_counter()\n{statement}\n"
+        "print(time.perf_counter() - start)"
+    )
+    times = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()[-1]
+        )
+        for _ in range(repeat)
+    ]
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the start-up time of the panel modules."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of fresh interpreters."
+    )
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="Also time the first call of each market loader (needs the data).",
+    )
+    args = parser.parse_args()
+
+    pandas_time = time_in_subprocess("", "import pandas", args.repeat)
+    print(f"{'pandas':50s} {pandas_time:.3f}s")
+    for module in MODULES:
+        import_time = time_in_subprocess("", f"import {module}", args.repeat)
+        print(f"{module:50s} {import_time:.3f}s")
+
+    if args.load:
+        for loader in LOADERS:
+            module, function = loader.split(":")
+            load_time = time_in_subprocess(
+                f"from {module} import {function}", f"{function}()", args.repeat
+            )
+            print(f"{loader:50s} {load_time:.3f}s")
@@ -0,0 +1,181 @@
+"""
+Benchmark the date-range network centrality engine against the per-date
+networkx graph on synthetic daily token networks, and check that both write
+the same centrality within tolerance and both refuse a day whose graph is not
+strongly connected.
+"""
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+import networkx as nx
+import pandas as pd
+
+from environ.process.network import network_graph
+
+CENTRALITY_FOLDERS = ["inflow_centrality", "outflow_centrality"]
+
+
+def make_synthetic_network(
+    network_path: str, date_list: list[datetime.datetime], n_pools: int, seed: int = 0
+) -> None:
+    """
+    Write synthetic v3 primary token and in/out flow files of each date, with
+    hub tokens taking part in most pools and the pool volumes drifting from day
+    to day
+    """
+
+    rng = np.random.default_rng(seed)
+    symbols = np.array(
+        network_graph.config["dev"]["config"]["token_library"]["v3"]["token"],
+        dtype=object,
+    )
+    popularity = 1 / np.arange(1, len(symbols) + 1)
+    popularity /= popularity.sum()
+    token0 = rng.choice(symbols, n_pools, p=popularity)
+    token1 = rng.choice(symbols, n_pools, p=popularity)
+    volume = rng.lognormal(12, 2, (n_pools, 2))
+
+    for folder in ["primary_tokens", "inout_flow", "tvl", "tvl_share"]:
+        os.makedirs(os.path.join(network_path, "v3", folder), exist_ok=True)
+    for folder in CENTRALITY_FOLDERS:
+        os.makedirs(os.path.join(network_path, "v3", folder), exist_ok=True)
+    edge_path = os.path.join(network_path, "v3", "inout_flow")
+    token_path = os.path.join(network_path, "v3", "primary_tokens")
+
+    for date in date_list:
+        date_str = date.strftime("%Y%m%d")
+        volume *= rng.lognormal(0, 0.1, volume.shape)
+        active = rng.random(n_pools) < 0.9
+
+        edges = pd.DataFrame(
+            {
+                "Source": np.column_stack([token0, token1])[active].ravel(),
+                "Target": np.column_stack([token1, token0])[active].ravel(),
+                "Volume": volume[active].ravel(),
+            }
+        )
+        edges.to_csv(os.path.join(edge_path, f"inout_flow_tokens_v3_{date_str}.csv"))
+
+        tokens = pd.unique(np.concatenate([token0[active], token1[active]]))
+        pd.DataFrame(
+            {"token": tokens, "total_tvl": rng.lognormal(15, 2, len(tokens))}
+        ).to_csv(os.path.join(token_path, f"primary_tokens_v3_{date_str}.csv"))
+
+
+def make_one_way_day(network_path: str, date: datetime.datetime) -> None:
+    """
+    Write a day whose graph is weakly but not strongly connected, DAI being
+    reached from WETH with no edge back
+    """
+
+    date_str = date.strftime("%Y%m%d")
+    pd.DataFrame(
+        {
+            "Source": ["USDC", "WETH", "WETH"],
+            "Target": ["WETH", "DAI", "USDC"],
+            "Volume": [1.0, 2.0, 3.0],
+        }
+    ).to_csv(
+        os.path.join(
+            network_path, "v3", "inout_flow", f"inout_flow_tokens_v3_{date_str}.csv"
+        )
+    )
+    pd.DataFrame(
+        {"token": ["USDC", "WETH", "DAI"], "total_tvl": [1.0, 2.0, 3.0]}
+    ).to_csv(
+        os.path.join(
+            network_path, "v3", "primary_tokens", f"primary_tokens_v3_{date_str}.csv"
+        )
+    )
+
+
+def check_one_way_day(date: datetime.datetime) -> None:
+    """
+    Check that both engines refuse the centrality of a graph that is not
+    strongly connected
+    """
+
+    for compute in [
+        lambda: network_graph.prepare_network_graph(date, "v3", directed=True),
+        lambda: network_graph.prepare_network_graph_range([date], "v3"),
+    ]:
+        try:
+            compute()
+        except nx.AmbiguousSolution:
+            continue
+        raise AssertionError("The one-way day was not refused")
+
+
+def read_centrality(network_path: str, date_list: list[datetime.datetime]) -> dict:
+    """
+    Read the centrality files written for each date
+    """
+
+    return {
+        (folder, date): pd.read_csv(
+            os.path.join(
+                network_path,
+                "v3",
+                folder,
+                f"centrality_v3_{date.strftime('%Y%m%d')}.csv",
+            ),
+            index_col=0,
+        )
+        for folder in CENTRALITY_FOLDERS
+        for date in date_list
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the date-range network centrality engine."
+    )
+    parser.add_argument(
+        "--n_days", type=int, default=60, help="Number of synthetic days."
+    )
+    parser.add_argument(
+        "--n_pools", type=int, default=400, help="Number of pools in each day."
+    )
+    parser.add_argument(
+        "--rtol", type=float, default=1e-6, help="Relative tolerance of the check."
+    )
+    args = parser.parse_args()
+
+    dates = [
+        datetime.datetime(2022, 1, 1) + datetime.timedelta(days=i)
+        for i in range(args.n_days)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_path:
+        network_graph.config["dev"]["config"]["data"]["NETWORK_DATA_PATH"] = tmp_path
+        make_synthetic_network(tmp_path, dates, args.n_pools)
+
+        start = time.perf_counter()
+        for day in dates:
+            network_graph.prepare_network_graph(day, "v3", directed=True)
+        networkx_time = time.perf_counter() - start
+        networkx_centrality = read_centrality(tmp_path, dates)
+
+        start = time.perf_counter()
+        network_graph.prepare_network_graph_range(dates, "v3")
+        batch_time = time.perf_counter() - start
+        batch_centrality = read_centrality(tmp_path, dates)
+
+        one_way_date = dates[-1] + datetime.timedelta(days=1)
+        make_one_way_day(tmp_path, one_way_date)
+        check_one_way_day(one_way_date)
+
+    for key, expected in networkx_centrality.items():
+        pd.testing.assert_frame_equal(
+            batch_centrality[key], expected, check_dtype=False, rtol=args.rtol
+        )
+
+    print(f"days:       {args.n_days}")
+    print(f"networkx:   {networkx_time:.3f}s")
+    print(f"date-range: {batch_time:.3f}s")
+    print(f"speedup:    {networkx_time / batch_time:.1f}x")
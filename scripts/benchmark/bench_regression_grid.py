@@ -0,0 +1,130 @@
+"""
+Benchmark the regression tables of a synthetic token-date panel fitted one
+specification after the other against the process pool of the regression
+grid, and check that both render the same tables. The model cache is kept in
+a temporary folder and emptied before each run.
+"""
+
+import argparse
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from environ.tabulate import model_cache
+from environ.tabulate.regression_grid import fit_regression_grid
+from environ.tabulate.render_regression import (
+    construct_regress_vars,
+    render_regress_table,
+)
+
+DEPENDENT_VARIABLES = ["Volume_share", "avg_eigenvector_centrality", "TVL_share"]
+IV_CHUNK_LIST = [
+    [["mcap_share", "std"]],
+    [["stableshare"], ["corr_gas"]],
+    [["corr_eth"], ["corr_eth", "is_boom"]],
+]
+PANEL_INDEX_COLUMNS = (["Token", "Date"], [True, False])
+
+
+def make_synthetic_panel(n_tokens: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Make a token-date panel with the regression variables, their lags and
+    missing values
+    """
+
+    rng = np.random.default_rng(seed)
+    panel = pd.DataFrame(
+        {
+            "Token": np.repeat([f"T{i}" for i in range(n_tokens)], n_days),
+            "Date": np.tile(pd.date_range("2020-01-01", periods=n_days), n_tokens),
+        }
+    )
+    variables = DEPENDENT_VARIABLES + [
+        v for chunk in IV_CHUNK_LIST for ivs in chunk for v in ivs if v != "is_boom"
+    ]
+    for variable in dict.fromkeys(variables):
+        panel[variable] = rng.normal(size=len(panel))
+        panel.loc[rng.random(len(panel)) < 0.02, variable] = np.nan
+    for dv in DEPENDENT_VARIABLES:
+        panel[f"{dv}_lag_1"] = panel.groupby("Token")[dv].shift(1)
+    panel["is_boom"] = (panel["Date"].dt.month % 2).astype(int)
+    return panel
+
+
+def render_tables(panels: dict[str, pd.DataFrame], reg_combi: list, **kwargs) -> dict:
+    """
+    Render the table of each panel from an empty model cache
+    """
+
+    model_cache._model_cache.clear()
+    model_cache.MODEL_CACHE_PATH = Path(tempfile.mkdtemp())
+    fit_regression_grid(
+        [(panel, reg_combi) for panel in panels.values()],
+        robust=True,
+        panel_index_columns=PANEL_INDEX_COLUMNS,
+        **kwargs,
+    )
+    return {
+        name: render_regress_table(
+            panel,
+            reg_combi,
+            panel_index_columns=PANEL_INDEX_COLUMNS,
+            robust=True,
+            max_workers=1,
+        )
+        for name, panel in panels.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the parallel regression grid."
+    )
+    parser.add_argument(
+        "--n_tokens", type=int, default=100, help="Number of synthetic tokens."
+    )
+    parser.add_argument(
+        "--n_days", type=int, default=700, help="Number of synthetic days."
+    )
+    parser.add_argument(
+        "--max_workers", type=int, default=None, help="Number of processes."
+    )
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    synthetic_panel = make_synthetic_panel(args.n_tokens, args.n_days)
+    synthetic_panels = {
+        "full": synthetic_panel,
+        "boom": synthetic_panel[synthetic_panel["is_boom"] == 1],
+        "bust": synthetic_panel[synthetic_panel["is_boom"] == 0],
+    }
+    synthetic_combi = construct_regress_vars(
+        dependent_variables=DEPENDENT_VARIABLES,
+        iv_chunk_list=IV_CHUNK_LIST,
+        with_lag_dv=True,
+        without_lag_dv=False,
+    )
+
+    start = time.perf_counter()
+    expected = render_tables(synthetic_panels, synthetic_combi, max_workers=1)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = render_tables(
+        synthetic_panels, synthetic_combi, max_workers=args.max_workers
+    )
+    grid_time = time.perf_counter() - start
+
+    for name, table in expected.items():
+        pd.testing.assert_frame_equal(result[name], table)
+
+    n_fits = len(synthetic_combi) * len(synthetic_panels)
+    print(f"rows:     {len(synthetic_panel)}")
+    print(f"fits:     {n_fits}")
+    print(f"serial:   {serial_time:.3f}s")
+    print(f"grid:     {grid_time:.3f}s")
+    print(f"speedup:  {serial_time / grid_time:.1f}x")
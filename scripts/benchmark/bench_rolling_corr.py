@@ -0,0 +1,129 @@
+"""
+Benchmark the grouped rolling correlation kernel of construct_panel against
+the per-token pandas rolling correlation on a synthetic token-date panel, and
+check that both give the same correlations within tolerance.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from environ.utils.rolling_moments import rolling_corr
+
+CORR_VAR = {
+    "corr_gas": "gas_price_usd_log_return_1",
+    "corr_eth": "ether_price_usd_log_return_1",
+    "corr_sp": "S&P_log_return_1",
+}
+VARIABLE_LOG_RETURN = "dollar_exchange_rate_log_return_1"
+
+
+def make_synthetic_panel(n_tokens: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Make a panel of daily log returns with gaps, infinities, tokens listed on
+    different days and stablecoins whose exchange rate stays constant
+    """
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=n_days)
+    market = pd.DataFrame(
+        rng.normal(0, 0.05, (n_days, len(CORR_VAR))),
+        columns=list(CORR_VAR.values()),
+    )
+    market["Date"] = dates
+
+    frames = []
+    for i in range(n_tokens):
+        first_day = rng.integers(0, n_days // 2)
+        log_return = rng.normal(0, 0.03, n_days - first_day)
+        if i % 10 == 0:
+            log_return[:] = 0.0
+        log_return[rng.random(len(log_return)) < 0.01] = np.nan
+        log_return[rng.random(len(log_return)) < 0.001] = np.inf
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Token": f"T{i}",
+                    "Date": dates[first_day:],
+                    VARIABLE_LOG_RETURN: log_return,
+                }
+            )
+        )
+
+    panel = pd.concat(frames, ignore_index=True).merge(market, on="Date")
+    return panel.sample(frac=1, random_state=seed).sort_values(["Token", "Date"])
+
+
+def legacy_corr(panel: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Compute the correlations token by token as construct_panel used to
+    """
+
+    panel = panel.copy()
+    for k, price_log_return in CORR_VAR.items():
+        for _, group_data in panel.groupby("Token"):
+            corr = (
+                group_data[price_log_return]
+                .rolling(window)
+                .corr(group_data[VARIABLE_LOG_RETURN])
+            )
+            panel.loc[corr.index, k] = corr
+    return panel
+
+
+def kernel_corr(panel: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Compute the correlations of all tokens at once as construct_panel does
+    """
+
+    panel = panel.copy()
+    corr = rolling_corr(
+        panel[list(CORR_VAR.values())].to_numpy(dtype=float),
+        panel[[VARIABLE_LOG_RETURN]].to_numpy(dtype=float),
+        window,
+        groups=panel["Token"].to_numpy(),
+    )
+    panel[list(CORR_VAR)] = corr[:, :, 0]
+    return panel
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the grouped rolling correlation kernel."
+    )
+    parser.add_argument(
+        "--n_tokens", type=int, default=100, help="Number of synthetic tokens."
+    )
+    parser.add_argument(
+        "--n_days", type=int, default=1000, help="Number of synthetic days."
+    )
+    parser.add_argument("--window", type=int, default=30, help="Rolling window.")
+    parser.add_argument(
+        "--rtol", type=float, default=1e-7, help="Relative tolerance of the check."
+    )
+    args = parser.parse_args()
+
+    synthetic_panel = make_synthetic_panel(args.n_tokens, args.n_days)
+
+    start = time.perf_counter()
+    expected = legacy_corr(synthetic_panel, args.window)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = kernel_corr(synthetic_panel, args.window)
+    kernel_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(
+        result[list(CORR_VAR)],
+        expected[list(CORR_VAR)],
+        check_dtype=False,
+        rtol=args.rtol,
+        atol=args.rtol,
+    )
+
+    print(f"rows:     {len(synthetic_panel)}")
+    print(f"pandas:   {legacy_time:.3f}s")
+    print(f"kernel:   {kernel_time:.3f}s")
+    print(f"speedup:  {legacy_time / kernel_time:.1f}x")
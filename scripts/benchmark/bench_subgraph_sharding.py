@@ -0,0 +1,151 @@
+"""
+Benchmark the sharded intra-day swap fetching against a single sequential
+cursor, on a local stub GraphQL server with a synthetic busy day.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import re
+import time
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from environ.fetch import fetch_subgraph_swaps_v3
+from environ.fetch.fetch_utils.http_client import configure_endpoint
+
+DAY_START = 1672531200  # 2023-01-01 UTC
+
+
+def make_synthetic_day(n_swaps: int, seed: int = 0) -> list[dict]:
+    """
+    Generate a synthetic day of swaps ordered by id, half of them packed in
+    one busy hour
+    """
+
+    rng = np.random.default_rng(seed)
+    timestamps = np.where(
+        rng.random(n_swaps) < 0.5,
+        DAY_START + 14 * 3600 + rng.integers(0, 3600, n_swaps),
+        DAY_START + rng.integers(0, 86400, n_swaps),
+    )
+    swaps = [
+        {
+            "id": f"0x{rng.bytes(32).hex()}#{i % 7}",
+            "transaction": {"id": f"0x{i:064x}", "timestamp": str(ts)},
+            "amountUSD": str(rng.random() * 1e4),
+        }
+        for i, ts in enumerate(timestamps)
+    ]
+    return sorted(swaps, key=lambda swap: swap["id"])
+
+
+def make_stub_app(swaps: list[dict], latency: float) -> web.Application:
+    """
+    Serve the swaps through a stub of the subgraph 'swaps' query, answering
+    each request after a fixed latency
+    """
+
+    ids = [swap["id"] for swap in swaps]
+    # Serialize once so that the stub spends its time waiting, not encoding
+    encoded = [json.dumps(swap) for swap in swaps]
+    timestamps = np.array([int(swap["transaction"]["timestamp"]) for swap in swaps])
+    stats = {"requests": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        query = (await request.json())["query"]
+        first = int(re.search(r"first: (\d+)", query).group(1))
+        gte = int(re.search(r"timestamp_gte: (\d+)", query).group(1))
+        lte = int(re.search(r"timestamp_lte: (\d+)", query).group(1))
+        id_gt = re.search(r'id_gt: "([^"]+)"', query)
+
+        start = 0 if id_gt is None else bisect.bisect_right(ids, id_gt.group(1))
+        window = timestamps[start:]
+        batch = [
+            encoded[start + i]
+            for i in np.flatnonzero((window >= gte) & (window <= lte))[:first]
+        ]
+
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        return web.Response(
+            text='{"data": {"swaps": [' + ",".join(batch) + "]}}",
+            content_type="application/json",
+        )
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    app["stats"] = stats
+    return app
+
+
+async def run_benchmark(
+    n_swaps: int, latency: float, n_shards: int, page_budget: int
+) -> None:
+    """
+    Fetch the synthetic day with both strategies and compare them
+    """
+
+    app = make_stub_app(make_synthetic_day(n_swaps), latency)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+    fetch_subgraph_swaps_v3.UNISWAP_V3_SUBGRAPH_URL = f"http://127.0.0.1:{port}/"
+    # The stub is only bounded by its latency
+    configure_endpoint(fetch_subgraph_swaps_v3.UNISWAP_V3_SUBGRAPH_URL, rate=1e6)
+
+    day_end = DAY_START + 86399
+    try:
+        async with aiohttp.ClientSession() as session:
+            app["stats"]["requests"] = 0
+            start = time.perf_counter()
+            sequential = await fetch_subgraph_swaps_v3.fetch_all_swaps_for_period_async(
+                session, DAY_START, day_end
+            )
+            sequential_time = time.perf_counter() - start
+            sequential_requests = app["stats"]["requests"]
+
+            app["stats"]["requests"] = 0
+            start = time.perf_counter()
+            sharded = await fetch_subgraph_swaps_v3.fetch_sharded_swaps_for_period_async(
+                session,
+                DAY_START,
+                day_end,
+                n_shards=n_shards,
+                page_budget=page_budget,
+            )
+            sharded_time = time.perf_counter() - start
+            sharded_requests = app["stats"]["requests"]
+    finally:
+        await runner.cleanup()
+
+    assert [swap["id"] for swap in sharded] == [swap["id"] for swap in sequential]
+    assert len(sharded) == n_swaps
+
+    print(f"swaps: {n_swaps}, latency: {latency * 1000:.0f}ms")
+    print(f"sequential: {sequential_time:.2f}s, {sequential_requests} requests")
+    print(
+        f"sharded ({n_shards} shards, page budget {page_budget}): "
+        f"{sharded_time:.2f}s, {sharded_requests} requests"
+    )
+    print(f"speedup: {sequential_time / sharded_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark sharded intra-day swap fetching on a stub server."
+    )
+    parser.add_argument("--n_swaps", type=int, default=100000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--n_shards", type=int, default=8)
+    parser.add_argument("--page_budget", type=int, default=2)
+    args = parser.parse_args()
+
+    asyncio.run(
+        run_benchmark(args.n_swaps, args.latency, args.n_shards, args.page_budget)
+    )
@@ -0,0 +1,89 @@
+"""
+Benchmark the columnar trading direction derivation against the legacy
+row-wise apply on a synthetic busy day of swaps.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from environ.process.betweeness_centrality.betweeness_scripts import (
+    add_trading_direction,
+)
+
+
+def make_synthetic_swaps(n_swaps: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic day of v3 swaps with random directions
+    """
+
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"TKN{i}" for i in range(200)], dtype=object)
+    amount0 = rng.normal(size=n_swaps) * 1e3
+    amount1 = -np.sign(amount0) * rng.random(n_swaps) * 1e3
+
+    return pd.DataFrame(
+        {
+            "transaction": rng.integers(0, n_swaps // 2, n_swaps).astype(str),
+            "pool": rng.integers(0, 50, n_swaps).astype(str),
+            "token0_symbol": rng.choice(symbols, n_swaps),
+            "token1_symbol": rng.choice(symbols, n_swaps),
+            "amount0": amount0,
+            "amount1": amount1,
+            "amountUSD": np.abs(amount0),
+        }
+    )
+
+
+def legacy_trading_direction(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row-wise implementation previously used in manipulate_data
+    """
+
+    data["Source"] = data.apply(
+        lambda x: x.token0_symbol if float(x.amount0) > 0 else x.token1_symbol,
+        axis=1,
+    )
+    data["Pool_Out_Volume"] = data.apply(
+        lambda x: x.amount0 if x.Source == x.token0_symbol else x.amount1, axis=1
+    )
+    data["Target"] = data.apply(
+        lambda x: x.token1_symbol if float(x.amount0) > 0 else x.token0_symbol,
+        axis=1,
+    )
+    data["Pool_In_Volume"] = data.apply(
+        lambda x: x.amount0 if x.Target == x.token0_symbol else x.amount1, axis=1
+    )
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the trading direction derivation of a swap day."
+    )
+    parser.add_argument(
+        "--n_swaps",
+        type=int,
+        default=500_000,
+        help="Number of synthetic swaps in the day.",
+    )
+    args = parser.parse_args()
+
+    swaps = make_synthetic_swaps(args.n_swaps)
+
+    start = time.perf_counter()
+    legacy = legacy_trading_direction(swaps.copy())
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar = add_trading_direction(swaps.copy())
+    columnar_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(legacy, columnar)
+
+    print(f"swaps:    {args.n_swaps}")
+    print(f"row-wise: {legacy_time:.3f}s")
+    print(f"columnar: {columnar_time:.3f}s")
+    print(f"speedup:  {legacy_time / columnar_time:.1f}x")
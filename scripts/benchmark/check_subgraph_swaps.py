@@ -0,0 +1,133 @@
+"""
+Check the streaming subgraph swap reader against the former json_normalize
+path on synthetic records, including records with missing keys and with a
+null pool or transaction. The former path gives a column of the null object
+duplicating the renamed pool or transaction id, so the reader is checked
+against it on the records with their null objects left out.
+"""
+
+import argparse
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from environ.process.betweeness_centrality.subgraph_swaps import (
+    SUBGRAPH_SWAP_NESTED,
+    SUBGRAPH_SWAP_RENAME,
+    SUBGRAPH_SWAP_SKIP,
+    SUBGRAPH_SWAP_TYPES,
+    read_subgraph_swaps,
+)
+
+
+def make_records(n_records: int, null_share: float, seed: int = 0) -> list[dict]:
+    """
+    Make subgraph swap records, some with a null pool or transaction, a
+    missing tick or an extra key
+    """
+
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(n_records):
+        token0 = {"id": f"0x{i % 7:040x}", "symbol": f"T{i % 7}"}
+        token1 = {"id": f"0x{i % 5 + 7:040x}", "symbol": f"T{i % 5 + 7}"}
+        record = {
+            "amount0": str(rng.normal()),
+            "amount1": str(rng.normal()),
+            "amountUSD": str(abs(rng.normal()) * 1000),
+            "id": f"0x{i:064x}#{i % 3}",
+            "logIndex": str(i % 100),
+            "origin": f"0x{i % 11:040x}",
+            "pool": {
+                "id": f"0x{i % 13:040x}",
+                "token0": {**token0, "decimals": "18", "name": "Token0"},
+                "token1": {**token1, "decimals": "6", "name": "Token1"},
+            },
+            "recipient": f"0x{i % 17:040x}",
+            "sender": f"0x{i % 19:040x}",
+            "sqrtPriceX96": str(rng.integers(1, 10**12)),
+            "tick": str(rng.integers(-1000, 1000)),
+            "token0": token0,
+            "token1": token1,
+            "transaction": {
+                "blockNumber": str(12_000_000 + i),
+                "id": f"0x{i:064x}",
+                "timestamp": str(1_620_000_000 + i),
+            },
+        }
+        if i % 10 == 3:
+            del record["tick"]
+        if i % 10 == 7:
+            record["extra"] = "x"
+        for key in SUBGRAPH_SWAP_NESTED:
+            if rng.random() < null_share:
+                record[key] = None
+        records.append(record)
+    return records
+
+
+def legacy_frame(records: list[dict]) -> pd.DataFrame:
+    """
+    Flatten the records as manipulate_data used to
+    """
+
+    data_v3 = pd.json_normalize(records, sep="_")
+    data_v3 = data_v3.drop(columns=SUBGRAPH_SWAP_SKIP)
+    data_v3 = data_v3.rename(columns=SUBGRAPH_SWAP_RENAME)
+    return data_v3.astype(
+        {k: v for k, v in SUBGRAPH_SWAP_TYPES.items() if k in data_v3.columns}
+    )
+
+
+def without_null_objects(records: list[dict]) -> list[dict]:
+    """
+    Leave out the null nested objects of the records
+    """
+
+    return [
+        {
+            key: value
+            for key, value in record.items()
+            if not (key in SUBGRAPH_SWAP_NESTED and value is None)
+        }
+        for record in records
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the streaming subgraph swap reader."
+    )
+    parser.add_argument(
+        "--n_records", type=int, default=2000, help="Number of synthetic swaps."
+    )
+    parser.add_argument(
+        "--null_share",
+        type=float,
+        default=0.05,
+        help="Share of null pools and of null transactions.",
+    )
+    args = parser.parse_args()
+
+    for null_share in [0.0, args.null_share]:
+        synthetic_records = make_records(args.n_records, null_share)
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            json.dump(synthetic_records, f)
+            f.flush()
+            result = read_subgraph_swaps(f.name)
+
+        expected = legacy_frame(without_null_objects(synthetic_records))
+        pd.testing.assert_frame_equal(result, expected)
+
+        # The pool ids of the records with a pool are kept
+        has_pool = [record["pool"] is not None for record in synthetic_records]
+        assert result.loc[has_pool, "pool"].notna().all()
+        assert result.loc[[not x for x in has_pool], "pool"].isna().all()
+        print(f"null share {null_share}: {len(result)} records match")
+
+    # The former path gives duplicate columns for null nested objects
+    legacy = legacy_frame(make_records(args.n_records, args.null_share))
+    duplicates = legacy.columns[legacy.columns.duplicated()].tolist()
+    print(f"json_normalize duplicate columns: {duplicates}")
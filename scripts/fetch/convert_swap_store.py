@@ -0,0 +1,80 @@
+"""
+Convert the existing JSON/CSV swap archives into the columnar swap store.
+"""
+
+import argparse
+
+import pandas as pd
+from tqdm import tqdm
+
+from environ.constants import UNISWAP_V2_DATA_PATH, UNISWAP_V3_DATA_PATH
+from environ.process.betweeness_centrality.subgraph_swaps import read_subgraph_swaps
+from environ.utils import swap_store
+from environ.utils.info_logger import print_info_log
+
+# Archive file patterns of each store version, and whether the archive files
+# are kept in a folder per top 50 pool list
+ARCHIVE_PATTERNS = {
+    "v2": (UNISWAP_V2_DATA_PATH, "swap/*/uniswap_v2_swaps_*.csv", True),
+    "v3": (UNISWAP_V3_DATA_PATH, "swap/*/uniswap_v3_swaps_*.csv", True),
+    "subgraph_v3": (
+        UNISWAP_V3_DATA_PATH,
+        "subgraph_swap/uniswap_v3_swaps_*.json",
+        False,
+    ),
+}
+
+
+def convert_swap_archive(version: str, force: bool = False) -> int:
+    """
+    Convert the archive files of one version whose store file is missing or
+    older than the archive, and return the number of converted days
+    """
+
+    data_path, pattern, by_top_list = ARCHIVE_PATTERNS[version]
+    archive_files = sorted(data_path.glob(pattern))
+
+    converted = 0
+    for archive_file in tqdm(archive_files, desc=f"swap store {version}"):
+        date_label = archive_file.stem.split("_")[-1]
+        top_list_label = archive_file.parent.name if by_top_list else None
+        if not force and swap_store.has_swaps(
+            version, date_label, top_list_label, archive_file
+        ):
+            continue
+
+        if archive_file.suffix == ".json":
+            swaps = read_subgraph_swaps(str(archive_file))
+        else:
+            swaps = pd.read_csv(archive_file, index_col=0)
+
+        swap_store.write_swaps(swaps, version, date_label, top_list_label)
+        converted += 1
+
+    print_info_log(
+        f"Converted {converted} of {len(archive_files)} {version} swap files",
+        "progress",
+    )
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert JSON/CSV swap archives into the columnar swap store."
+    )
+    parser.add_argument(
+        "--version",
+        nargs="+",
+        default=swap_store.SWAP_STORE_VERSIONS,
+        choices=swap_store.SWAP_STORE_VERSIONS,
+        help="Swap versions to convert.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert all files, including the ones already up to date.",
+    )
+    args = parser.parse_args()
+
+    for swap_version in args.version:
+        convert_swap_archive(swap_version, force=args.force)
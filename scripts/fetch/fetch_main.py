@@ -2,10 +2,26 @@
 """
 Main script for fetching DeFi data.
 """
+# Import python modules
+import functools
+
 # Import internal modules.
+from environ.constants import (
+    BETWEENNESS_DATA_PATH,
+    COMPOUND_DATA_PATH,
+    CONFIG_PATH,
+    GLOBAL_DATA_PATH,
+    NETWORK_DATA_PATH,
+    PANEL_VAR_INFO,
+    PROCESSED_DATA_PATH,
+    SWAP_STORE_PATH,
+    UNISWAP_V3_DATA_PATH,
+    VOLUME_STORE_PATH,
+)
 from environ.utils.config_parser import Config
 from environ.utils.info_logger import print_info_log
 from environ.utils.args_parser import arg_parse_cmd
+from environ.utils.pipeline import Stage, run_pipeline
 
 # from environ.fetch.data_fetcher import fetch_data
 from environ.process.data_processor import process_data, create_data_folders
@@ -17,14 +33,90 @@ from environ.process.eigen_cluster.prepare_eigen_cluster import (
     prepare_eigencentrality_data,
 )
 
+# Each stage is skipped when its input files and code are unchanged since its
+# last run and its outputs exist
+STAGES = [
+    Stage(
+        name="process_data_v3",
+        func=functools.partial(process_data, "v3"),
+        inputs=[
+            # Swap archives, pool lists and directional volumes
+            UNISWAP_V3_DATA_PATH / "**" / "*.csv",
+            UNISWAP_V3_DATA_PATH / "subgraph_swap" / "uniswap_v3_swaps_*.json",
+            # Swap store, read in place of the archives when as new
+            SWAP_STORE_PATH / "version=v3" / "**" / "swaps.parquet",
+            SWAP_STORE_PATH / "version=subgraph_v3" / "**" / "swaps.parquet",
+            # Data paths and token library
+            CONFIG_PATH,
+        ],
+        outputs=[
+            NETWORK_DATA_PATH / "v3" / "inout_flow" / "*.csv",
+            BETWEENNESS_DATA_PATH / "betweenness" / "*.csv",
+            BETWEENNESS_DATA_PATH / "swap_route" / "*.csv",
+            VOLUME_STORE_PATH / "**" / "*",
+        ],
+    ),
+    Stage(
+        name="betweenness",
+        func=prepare_betweenness_data,
+        inputs=[BETWEENNESS_DATA_PATH / "betweenness" / "*.csv"],
+        outputs=[NETWORK_DATA_PATH / "*" / "betweenness" / "*.csv"],
+        after=["process_data_v3"],
+    ),
+    Stage(
+        name="eigencentrality",
+        func=prepare_eigencentrality_data,
+        inputs=[
+            BETWEENNESS_DATA_PATH / "swap_route" / "*.csv",
+            NETWORK_DATA_PATH / "*" / "inout_flow" / "*.csv",
+        ],
+        outputs=[
+            NETWORK_DATA_PATH / "*" / "clustering_ind" / "*.csv",
+            NETWORK_DATA_PATH / "*" / "total_eigen_centrality_undirected" / "*.csv",
+            NETWORK_DATA_PATH / "*" / "eigen_centrality_undirected" / "*.csv",
+            NETWORK_DATA_PATH / "*" / "eigen_centrality_undirected_multi" / "*.csv",
+        ],
+        after=["process_data_v3"],
+    ),
+    Stage(
+        name="compound",
+        func=prepare_compound_data,
+        inputs=[COMPOUND_DATA_PATH / "compound_*.csv"],
+        outputs=[COMPOUND_DATA_PATH / "processed" / "compound_*.csv"],
+    ),
+    Stage(
+        name="panel",
+        func=prepare_panel_data,
+        inputs=[
+            *[
+                var_info["data_path"] / "*.csv"
+                for var_info in PANEL_VAR_INFO["panel_var"]
+            ],
+            GLOBAL_DATA_PATH / "**" / "*",
+        ],
+        outputs=[PROCESSED_DATA_PATH / "panel_main.pickle.zip"],
+        after=["betweenness", "eigencentrality", "compound"],
+    ),
+    Stage(
+        name="herfin",
+        func=prepare_herfin_data,
+        inputs=[
+            PROCESSED_DATA_PATH / "panel_main.pickle.zip",
+            GLOBAL_DATA_PATH / "**" / "*",
+        ],
+        outputs=[PROCESSED_DATA_PATH / "herf_panel_merged.pickle.zip"],
+        after=["panel"],
+    ),
+]
+
 
 if __name__ == "__main__":
     # Initize the config and parse the running date.
     print_info_log("DeFi data fetching script started", "progress")
 
     config = Config()
-    # args = arg_parse_cmd()
-    # parsed_args = args.parse_args()
+    args = arg_parse_cmd()
+    parsed_args = args.parse_args()
     # ###testing
     # parsed_args.start = "2021-05-18"
     # parsed_args.end = "2021-05-31"
@@ -34,17 +126,7 @@ if __name__ == "__main__":
 
     # Process data
     # create_data_folders()
-    # print_info_log("processing v2", "progress")
-    # process_data("v2")
-    print_info_log("processing v3", "progress")
-    process_data("v3")
-    # print_info_log("processing v2v3 merged", "progress")
-    # process_data("merged")
-
-    prepare_betweenness_data()
-    prepare_eigencentrality_data()
-    print_info_log("processing Compound data", "progress")
-    prepare_compound_data()
-    prepare_panel_data()
-    prepare_herfin_data()
+    # To also process v2 and the v2v3 merged data, add their stages, e.g.
+    # Stage(name="process_data_v2", func=functools.partial(process_data, "v2"), ...)
+    run_pipeline(STAGES, max_workers=parsed_args.max_workers, force=parsed_args.force)
     print_info_log("Fetch script finished", "progress")
@@ -23,6 +23,24 @@ if __name__ == "__main__":
         default=8,
         help="Maximum number of concurrent days to process.",
     )
+    parser.add_argument(
+        "--n_shards",
+        type=int,
+        default=4,
+        help="Number of time windows of each day fetched concurrently.",
+    )
+    parser.add_argument(
+        "--page_budget",
+        type=int,
+        default=10,
+        help="Pages fetched from a time window before splitting it in two.",
+    )
+    parser.add_argument(
+        "--max_concurrent_requests",
+        type=int,
+        default=32,
+        help="Maximum number of requests in flight.",
+    )
     args = parser.parse_args()
 
     # --- Main Execution ---
@@ -33,6 +51,9 @@ if __name__ == "__main__":
                 overall_start_date_str=args.start_date,
                 overall_end_date_str=args.end_date,
                 max_concurrent_days=args.max_concurrent,
+                n_shards=args.n_shards,
+                page_budget=args.page_budget,
+                max_concurrent_requests=args.max_concurrent_requests,
             )
         )
     except RuntimeError as e:
@@ -44,6 +65,9 @@ if __name__ == "__main__":
                     overall_start_date_str=args.start_date,
                     overall_end_date_str=args.end_date,
                     max_concurrent_days=args.max_concurrent,
+                    n_shards=args.n_shards,
+                    page_budget=args.page_budget,
+                    max_concurrent_requests=args.max_concurrent_requests,
                 )
             )
         else:
@@ -1,11 +1,10 @@
-from environ.process.betweeness_centrality.betweeness_scripts import get_betweenness_centrality
+from environ.process.betweeness_centrality.scheduler import (
+    schedule_betweenness_centrality,
+)
 import datetime
 
 if __name__ == "__main__":
 
-    from multiprocessing import Pool
-    from functools import partial
-
     involve_version = "subgraph_v3"  # candidate: v2, v3, v2v3
 
     top50_list_label = "2021MAY"
@@ -18,15 +17,7 @@ if __name__ == "__main__":
     for i in range((end_date - start_date).days):
         date = start_date + datetime.timedelta(i)
         date_str = date.strftime("%Y-%m-%d")
-        date_list.append(date_str)
+        date_list.append((date_str, top50_list_label))
 
-    # Multiprocess
-    p = Pool()
-    p.map(
-        partial(
-            get_betweenness_centrality,
-            top_list_label=top50_list_label,
-            uniswap_version=involve_version,
-        ),
-        date_list,
-    )
+    # Multiprocess, skipping the days whose outputs are current
+    schedule_betweenness_centrality(date_list, involve_version)
@@ -4,6 +4,7 @@ from itertools import product
 import pandas as pd
 
 from environ.constants import PROCESSED_DATA_PATH, TABLE_PATH
+from environ.tabulate.regression_grid import fit_regression_grid
 from environ.tabulate.render_regression import (
     construct_regress_vars,
     render_regress_table,
@@ -68,9 +69,21 @@ for b in betw_cents:
         )
     )
 
-for k, q in {"full": "", "boom": "is_boom", "bust": "~is_boom"}.items():
+reg_panels = {
+    k: reg_panel[reg_panel["is_boom"] == (q == "boom")] if q else reg_panel
+    for k, q in {"full": "", "boom": "is_boom", "bust": "~is_boom"}.items()
+}
+
+# fit the regressions of the three tables at once in a process pool
+fit_regression_grid(
+    [(panel, reg_combi) for panel in reg_panels.values()],
+    robust=True,
+    panel_index_columns=(["Token", "Date"], [True, False]),
+)
+
+for k, panel in reg_panels.items():
     reg_result = render_regress_table(
-        reg_panel=reg_panel[reg_panel["is_boom"] == (q == "boom")] if q else reg_panel,
+        reg_panel=panel,
         reg_combi=reg_combi,
         panel_index_columns=(["Token", "Date"], [True, False]),
         standard_beta=False,
@@ -11,5 +11,5 @@ setup(
         "matplotlib",
         "web3",
     ],
-    extras_require={"dev": ["pylint", "black"]},
+    extras_require={"dev": ["pylint", "black", "pytest"]},
 )
@@ -0,0 +1,260 @@
+"""
+Check the rolling moments kernel against the pandas rolling windows it
+replaces, alone and inside the price panels of panel_generator and
+safeness_measurement, on fixed prices with gaps, a zero price, a pegged token
+and a token listed late.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import environ.tabulate.panel.panel_generator as panel_generator
+import environ.tabulate.panel.safeness_measurement as safeness_measurement
+from environ.utils.rolling_moments import (
+    rolling_beta,
+    rolling_corr,
+    rolling_mean,
+    rolling_std,
+)
+
+WINDOW = 30
+N_DAYS = 150
+TOKENS = ["AAA", "BBB", "PEG", "NEW"]
+DATES = pd.date_range("2021-01-01", periods=N_DAYS)
+
+
+def assert_close(result: pd.DataFrame, expected: pd.DataFrame) -> None:
+    """
+    Assert that two frames are equal within the tolerance of the kernel
+    """
+
+    pd.testing.assert_frame_equal(
+        result, expected, check_dtype=False, check_names=False, rtol=1e-7, atol=1e-9
+    )
+
+
+def make_returns(seed: int = 0) -> pd.DataFrame:
+    """
+    Make daily log returns with gaps, infinities and a constant column
+    """
+
+    rng = np.random.default_rng(seed)
+    returns = pd.DataFrame(rng.normal(0, 0.03, (N_DAYS, 4)), columns=list("wxyz"))
+    returns.iloc[[10, 45, 46, 90], 0] = np.nan
+    returns.iloc[60, 0] = np.inf
+    returns.iloc[:40, 1] = np.nan
+    returns["z"] = 0.0
+    return returns
+
+
+def test_rolling_moments_match_pandas() -> None:
+    """
+    Each moment of each column equals the pandas rolling window of the column
+    """
+
+    returns = make_returns()
+    x = returns[["w", "x", "z"]]
+    y = returns[["y"]]
+
+    corr = rolling_corr(x.to_numpy(), y.to_numpy(), WINDOW)[:, :, 0]
+    beta = rolling_beta(x.to_numpy(), y.to_numpy(), WINDOW)[:, :, 0]
+    for i, column in enumerate(x.columns):
+        x_window = x[column].rolling(WINDOW)
+        y_window = y["y"].rolling(WINDOW)
+        np.testing.assert_allclose(
+            corr[:, i], x_window.corr(y["y"]), rtol=1e-7, atol=1e-9
+        )
+        np.testing.assert_allclose(
+            beta[:, i], x_window.cov(y["y"]) / y_window.var(), rtol=1e-7, atol=1e-9
+        )
+
+    assert_close(
+        pd.DataFrame(rolling_std(returns.to_numpy(), WINDOW), columns=returns.columns),
+        returns.rolling(WINDOW).std(),
+    )
+    finite = returns.replace([np.inf, -np.inf], np.nan)
+    assert_close(
+        pd.DataFrame(rolling_mean(finite.to_numpy(), WINDOW), columns=returns.columns),
+        finite.rolling(WINDOW).mean(),
+    )
+
+
+def test_grouped_rolling_corr_matches_pandas() -> None:
+    """
+    The grouped correlation of interleaved groups equals the pandas rolling
+    correlation of each group on its own
+    """
+
+    returns = make_returns()
+    panel = pd.concat(
+        [
+            pd.DataFrame({"group": "g0", "day": DATES, "x": returns["w"]}),
+            pd.DataFrame({"group": "g1", "day": DATES, "x": returns["x"]}),
+            pd.DataFrame({"group": "g2", "day": DATES[:20], "x": returns["w"][:20]}),
+        ],
+        ignore_index=True,
+    ).merge(pd.DataFrame({"day": DATES, "y": returns["y"]}), on="day")
+    panel = panel.sort_values(["day", "group"], ignore_index=True)
+
+    corr = rolling_corr(
+        panel[["x"]].to_numpy(),
+        panel[["y"]].to_numpy(),
+        WINDOW,
+        groups=panel["group"].to_numpy(),
+    )[:, 0, 0]
+
+    expected = pd.Series(np.nan, index=panel.index)
+    for _, group in panel.groupby("group"):
+        expected[group.index] = group["x"].rolling(WINDOW).corr(group["y"])
+    np.testing.assert_allclose(corr, expected, rtol=1e-7, atol=1e-9)
+
+
+@pytest.fixture(name="global_data")
+def fixture_global_data(tmp_path, monkeypatch) -> dict[str, pd.Series]:
+    """
+    Write the token prices, gas fees, S&P index, risk free rate and sentiment
+    of the same days in a global data folder the panel modules read
+    """
+
+    rng = np.random.default_rng(1)
+    prices = pd.DataFrame(
+        np.exp(np.cumsum(rng.normal(0, 0.05, (N_DAYS, len(TOKENS))), axis=0)),
+        columns=TOKENS,
+    )
+    prices.iloc[[12, 50, 51, 100], 1] = np.nan
+    prices.iloc[70, 1] = 0.0
+    prices["PEG"] = 1.0
+    prices.iloc[:45, 3] = np.nan
+    series = {
+        "gas": pd.Series(np.exp(rng.normal(0, 1, N_DAYS))),
+        "eth": pd.Series(np.exp(np.cumsum(rng.normal(0, 0.05, N_DAYS)))),
+        "sp": pd.Series(3000 * np.exp(np.cumsum(rng.normal(0, 0.01, N_DAYS)))),
+        "rf": pd.Series(rng.integers(0, 10, N_DAYS) / 1000),
+        "sentiment": pd.Series(np.exp(rng.normal(0, 0.3, N_DAYS))),
+    }
+
+    for folder in ["token_market", "gas_fee", "risk_free_rate", "sentiment"]:
+        (tmp_path / folder).mkdir()
+    # The price files are dated one day after the other inputs
+    price_file = prices.copy()
+    price_file.insert(0, "Date", (DATES + pd.DateOffset(days=1)).strftime("%Y-%m-%d"))
+    price_file.to_csv(tmp_path / "token_market" / "primary_token_price_2.csv")
+    pd.DataFrame(
+        {
+            "Date(UTC)": DATES.strftime("%m/%d/%Y"),
+            "Gas Fee USD": series["gas"],
+            "ETH Price (USD)": series["eth"],
+        }
+    ).to_csv(tmp_path / "gas_fee" / "avg_gas_fee.csv", index=False)
+    with open(
+        tmp_path / "risk_free_rate" / "F-F_Research_Data_Factors_daily.CSV",
+        "w",
+        encoding="utf-8",
+    ) as rf_file:
+        rf_file.write("header\n" * 5)
+        for date, rate in zip(DATES, series["rf"]):
+            rf_file.write(f"{date:%Y%m%d},0.1,0.1,0.1,{rate}\n")
+        rf_file.write("footer\n" * 2)
+    pd.DataFrame(
+        {"Date": DATES.strftime("%Y-%m-%d"), "sentiment": series["sentiment"]}
+    ).to_csv(tmp_path / "sentiment" / "sentiment.csv", index=False)
+
+    for module in (panel_generator, safeness_measurement):
+        monkeypatch.setattr(module, "GLOBAL_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr(
+        pd,
+        "read_excel",
+        lambda *args, **kwargs: pd.DataFrame({"Date": DATES, "S&P": series["sp"]}),
+    )
+    # _merge_prc_gas saves the merged prices in a test folder
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "test").mkdir()
+
+    return {"prices": prices.set_index(DATES)} | {
+        name: values.set_axis(DATES) for name, values in series.items()
+    }
+
+
+def panel_measure(panel: pd.DataFrame, measure: str) -> pd.DataFrame:
+    """
+    Pivot a measure of the panel back to one column per token
+    """
+
+    panel = panel.dropna(subset=["Token"])
+    return panel.pivot(index="Date", columns="Token", values=measure).reindex(
+        index=DATES, columns=TOKENS
+    )
+
+
+def empty_panel() -> pd.DataFrame:
+    """
+    Regression panel without rows, to read the merged measures alone
+    """
+
+    return pd.DataFrame(
+        {
+            "Date": pd.Series(dtype="datetime64[ns]"),
+            "Token": pd.Series(dtype=object),
+            "Unnamed: 0": pd.Series(dtype=float),
+        }
+    )
+
+
+def test_merge_prc_gas(global_data) -> None:
+    """
+    The correlations and std of _merge_prc_gas equal the pandas rolling
+    windows of the token log returns
+    """
+
+    log_returns = {
+        name: np.log(values) - np.log(values.shift(1))
+        for name, values in global_data.items()
+    }
+    panel = panel_generator._merge_prc_gas(  # pylint: disable=protected-access
+        empty_panel()
+    )
+
+    tokens = log_returns["prices"]
+    for measure, benchmark in [
+        ("corr_gas", "gas"),
+        ("corr_eth", "eth"),
+        ("corr_sp", "sp"),
+    ]:
+        expected = tokens.rolling(WINDOW).corr(log_returns[benchmark])
+        assert_close(panel_measure(panel, measure), expected)
+    assert_close(panel_measure(panel, "std"), tokens.rolling(WINDOW).std())
+
+
+def test_safeness_measurement(global_data) -> None:
+    """
+    The beta, sentiment correlation and average return of
+    safeness_measurement equal the pandas rolling windows
+    """
+
+    prices = global_data["prices"]
+    panel = safeness_measurement.merge_safeness_measurement(
+        empty_panel().drop(columns=["Unnamed: 0"])
+    )
+
+    excess = (prices / prices.shift(1) - 1).replace([np.inf, -np.inf], np.nan)
+    # the risk free rate file is in percent
+    risk_free = global_data["rf"] / 100
+    excess = excess.sub(risk_free, axis=0)
+    sp_excess = global_data["sp"] / global_data["sp"].shift(1) - 1 - risk_free
+    beta = excess.rolling(WINDOW).cov(sp_excess).div(
+        sp_excess.rolling(WINDOW).var(), axis=0
+    )
+    assert_close(panel_measure(panel, "beta"), beta)
+
+    log_returns = np.log(prices) - np.log(prices.shift(1))
+    sentiment = global_data["sentiment"]
+    sentiment_returns = np.log(sentiment) - np.log(sentiment.shift(1))
+    assert_close(
+        panel_measure(panel, "corr_sentiment"),
+        log_returns.rolling(WINDOW).corr(sentiment_returns),
+    )
+    assert_close(
+        panel_measure(panel, "average_return"),
+        log_returns.replace([np.inf, -np.inf], np.nan).rolling(WINDOW).mean(),
+    )